@@ -0,0 +1,350 @@
+# cli.py
+# NON-INTERACTIVE COMMAND LINE COMMANDS (for scripts/admin tasks) - run with: python cli.py --help
+
+# IMPORT BUILT IN LIBRARIES:
+import asyncio
+import csv
+import json
+from datetime import datetime, time
+from pathlib import Path
+
+# IMPORT THIRD-PARTY LIBRARIES:
+import click
+from rich.console import Console
+from rich.table import Table
+from rich.progress import Progress
+
+# IMPORT CUSTOM MODULES:
+from core.user_auth_models import UserManager, BCRYPT_WORK_FACTOR, measure_kdf_timings
+from core.journal_models import JournalManager, JournalEntry
+from core.mood_analytics import MOOD_SCORES
+from core.journal_export import EXPORT_FORMATS, get_export_format
+from core.metrics import METRICS_ENV_VAR, PROMETHEUS_PREFIX, load_metrics_file, format_prometheus
+from core.journal_client import get_server_address
+from core.login_limiter import format_wait_time
+from core.session_tokens import delete_session_token
+from core.journal_storage import create_journal_storage
+from core.schema_migrations import migrate_journal_entries
+from ui.emojis import EMOJI_SUCCESSFUL, EMOJI_WARNING
+
+# IMPORT CONSTANT FILE PATHS
+from core.file_paths import USER_ACCOUNTS_JSON_FILE, JOURNAL_ENTRIES_JSON_FILE, METRICS_FILE, SCHEMA_MIGRATION_FILE_NAME
+
+# IMPORT CUSTOM EXCEPTION CLASSES:
+from core.exception_classes import UserNotFoundError, ErrorGettingUserAccount, AuthenticationError, ExportPermissionError, LoginRateLimitedError
+
+# For rich console printing
+console = Console()
+
+
+@click.group()
+def cli():
+    """Mindful Moments command line tools."""
+
+
+# BULK USER IMPORT COMMAND
+@cli.command("import-users")
+@click.argument("import_file", type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option("--format", "file_format", type=click.Choice(["csv", "jsonl"]), default=None,
+              help="File format (default: from file extension). CSV needs a username,password header row.")
+def import_users(import_file, file_format):
+    """Create many user accounts at once from a CSV or JSONL file of usernames and passwords."""
+    file_format = file_format or import_file.suffix.lstrip(".").lower()
+    if file_format not in ("csv", "jsonl"):
+        raise click.BadParameter("Use a .csv or .jsonl file, or set --format.", param_hint="IMPORT_FILE")
+    user_manager = UserManager(USER_ACCOUNTS_JSON_FILE)
+    report = user_manager.bulk_register_users(read_credentials(import_file, file_format))
+    for username, reason in report["skipped"]:
+        console.print(f"[red]{EMOJI_WARNING} Skipped '{username}': {reason}[/red]")
+    console.print(
+        f"[green]{EMOJI_SUCCESSFUL} Imported {report['imported']} accounts ({len(report['skipped'])} skipped) "
+        f"in {report['seconds']:.2f}s - {report['accounts_per_second']:.1f} accounts/second[/green]"
+    )
+
+
+def read_credentials(import_file, file_format):
+    """Generator yielding (username, password) pairs from a CSV (username,password columns) or JSONL file."""
+    with open(import_file, 'r', newline='', encoding='utf-8') as file:
+        if file_format == "csv":
+            for row in csv.DictReader(file):
+                yield row.get("username"), row.get("password")
+        else:
+            for line in file:
+                if line.strip():
+                    record = json.loads(line)
+                    yield record.get("username"), record.get("password")
+
+
+# LOGIN OPTIONS SHARED BY JOURNAL COMMANDS
+# Username/password can also be set with environment variables, e.g. when piping entries in on stdin
+JOURNAL_FIELDS = ("wins", "challenges", "gratitude", "goals")
+DATE_FORMATS = ["%Y-%m-%d", "%d-%m-%Y"]
+
+def login_options(command):
+    """Adds --username and --password options (prompted for if not given) to a command."""
+    command = click.option("--password", envvar="MINDFUL_MOMENTS_PASSWORD", prompt=True, hide_input=True,
+                           help="Account password (or MINDFUL_MOMENTS_PASSWORD environment variable).")(command)
+    command = click.option("--username", envvar="MINDFUL_MOMENTS_USERNAME", prompt=True,
+                           help="Account username (or MINDFUL_MOMENTS_USERNAME environment variable).")(command)
+    return command
+
+
+def authenticate(username, password):
+    """Authenticates once per command. Returns (UserManager, logged in UserAccount), raises ClickException if login fails."""
+    user_manager = UserManager(USER_ACCOUNTS_JSON_FILE)
+    try:
+        user_account = user_manager.get_user_account(username.strip().lower())
+        authenticated_user = user_manager.authenticate_user(user_account, password)
+    except LoginRateLimitedError as err:
+        raise click.ClickException(f"Too many failed login attempts. Try again in {format_wait_time(err.retry_after_seconds)}.")
+    except (UserNotFoundError, ErrorGettingUserAccount, AuthenticationError):
+        authenticated_user = None
+    if not authenticated_user:
+        raise click.ClickException("Login unsuccessful. Incorrect username or password.")
+    return user_manager, authenticated_user
+
+
+def login(username, password):
+    """Authenticates once per command. Returns a JournalManager for the logged in user, raises ClickException if login fails."""
+    user_manager, authenticated_user = authenticate(username, password)
+    return JournalManager(JOURNAL_ENTRIES_JSON_FILE, authenticated_user)
+
+
+# ADD JOURNAL ENTRIES COMMAND
+@cli.command("add")
+@login_options
+@click.option("--mood", type=click.Choice(list(MOOD_SCORES), case_sensitive=False), help="Mood rating.")
+@click.option("--wins", help="What went well today.")
+@click.option("--challenges", help="Challenges faced today.")
+@click.option("--gratitude", help="What you are grateful for today.")
+@click.option("--goals", help="Goal for tomorrow.")
+@click.option("--file", "entries_file", type=click.File('r', encoding='utf-8'),
+              help="JSONL file of entries to add instead ('-' for stdin), one object per line with mood, wins, "
+                   "challenges, gratitude, goals and optional timestamp fields.")
+def add_entries(username, password, mood, wins, challenges, gratitude, goals, entries_file):
+    """Add a journal entry from options, or many entries from a JSONL file/stdin in one write."""
+    if entries_file:
+        # Whole batch is read first, so entries are only saved (in one write) if every entry is valid
+        entry_records = [(line_number, line) for line_number, line in enumerate(entries_file.read().splitlines(), 1) if line.strip()]
+    else:
+        entry_records = [(None, {"mood": mood, "wins": wins, "challenges": challenges, "gratitude": gratitude, "goals": goals})]
+    journal_entries, invalid_entries = [], []
+    for line_number, entry_data in entry_records:
+        try:
+            journal_entries.append(make_journal_entry(json.loads(entry_data) if line_number else entry_data))
+        except ValueError as err:       # Includes json.JSONDecodeError
+            invalid_entries.append(f"line {line_number}: {err}" if line_number else str(err))
+    if invalid_entries:
+        raise click.ClickException("No entries added. Invalid entries:\n" + "\n".join(invalid_entries))
+    if not journal_entries:
+        raise click.ClickException("No entries found to add.")
+    journal_manager = login(username, password)
+    try:
+        entries_saved = journal_manager.save_journal_entries(journal_entries)
+    finally:
+        journal_manager.close()     # Saves updated indexes (and entries waiting in write-behind storage)
+    if not entries_saved:
+        raise click.ClickException("Sorry! There was a problem saving your entries.")
+    console.print(f"[green]{EMOJI_SUCCESSFUL} Added {len(journal_entries)} journal entries.[/green]")
+
+
+def make_journal_entry(entry_data):
+    """Returns JournalEntry from an entry dict (command line options or JSONL record), raises ValueError if invalid."""
+    if not isinstance(entry_data, dict):
+        raise ValueError("entry must be a JSON object")
+    mood_labels = {mood_label.lower(): mood_label for mood_label in MOOD_SCORES}
+    mood_label = mood_labels.get(str(entry_data.get("mood") or "").lower())
+    if mood_label is None:
+        raise ValueError(f"mood must be one of {', '.join(MOOD_SCORES)}")
+    missing_fields = [field_name for field_name in JOURNAL_FIELDS if not str(entry_data.get(field_name) or "").strip()]
+    if missing_fields:
+        raise ValueError(f"missing {', '.join(missing_fields)}")
+    timestamp = entry_data.get("timestamp")
+    if timestamp is not None:
+        try:
+            timestamp = datetime.fromisoformat(timestamp).isoformat()
+        except (TypeError, ValueError):
+            raise ValueError(f"invalid timestamp '{timestamp}', use ISO format e.g. 2025-06-01T09:30:00")
+    return JournalEntry(mood_label, *(str(entry_data[field_name]).strip() for field_name in JOURNAL_FIELDS), timestamp=timestamp)
+
+
+# LIST JOURNAL ENTRIES COMMAND
+@cli.command("list")
+@login_options
+@click.option("--limit", type=click.IntRange(min=1), default=10, show_default=True, help="Number of entries to list.")
+@click.option("--offset", type=click.IntRange(min=0), default=0, show_default=True, help="Number of entries to skip.")
+@click.option("--since", type=click.DateTime(DATE_FORMATS), help="Only entries on or after this date.")
+@click.option("--until", type=click.DateTime(DATE_FORMATS), help="Only entries on or before this date.")
+@click.option("--oldest-first", is_flag=True, help="List oldest entries first (default: newest first).")
+@click.option("--format", "output_format", type=click.Choice(["table", "jsonl"]), default="table", show_default=True)
+def list_entries(username, password, limit, offset, since, until, oldest_first, output_format):
+    """List journal entries, newest first."""
+    journal_manager = login(username, password)
+    if since or until:
+        start = since or datetime.min
+        end = datetime.combine(until.date(), time.max) if until else datetime.max
+        entries = journal_manager.get_entries_between(start, end)
+        if not oldest_first:
+            entries.reverse()
+        entries = entries[offset:offset + limit]
+    else:
+        entries = journal_manager.iter_user_entries(newest_first=not oldest_first, offset=offset, limit=limit)
+    if output_format == "jsonl":
+        for entry in entries:
+            click.echo(json.dumps(entry.to_dict()))
+        return
+    entries_table = Table(show_lines=True)
+    for column_name in ("Date", "Mood", "Wins", "Challenges", "Gratitude", "Goal"):
+        entries_table.add_column(column_name, style="cyan" if column_name == "Date" else None)
+    for entry in entries:
+        entries_table.add_row(entry.get_display_datetime(), entry.mood, entry.wins, entry.challenges, entry.gratitude, entry.goals)
+    console.print(entries_table)
+
+
+# EXPORT JOURNAL ENTRIES COMMAND
+@cli.command("export")
+@login_options
+@click.argument("output_file", type=click.File('w', encoding='utf-8', lazy=True), default="-")
+@click.option("--format", "export_format", type=click.Choice(list(EXPORT_FORMATS)), default=None,
+              help="Export format (default: from OUTPUT_FILE extension, otherwise jsonl).")
+@click.option("--all-users", is_flag=True, help="Export every user's entries (admin accounts only).")
+def export_entries(username, password, output_file, export_format, all_users):
+    """Export your journal entries (oldest first) as JSONL, CSV or Markdown to OUTPUT_FILE (default: stdout).
+       Entries are streamed to the file one at a time, so any number of entries can be exported.
+    """
+    journal_manager = login(username, password)
+    export_format = export_format or get_export_format(output_file.name)
+    try:
+        entry_count = journal_manager.export_entries(output_file, export_format, all_users=all_users)
+    except ExportPermissionError:
+        raise click.ClickException("Only admin accounts can export every user's entries.")
+    if output_file.name != "-":
+        console.print(f"[green]{EMOJI_SUCCESSFUL} Exported {entry_count} journal entries to {output_file.name}[/green]")
+
+
+# MOOD STATS COMMAND
+@cli.command("stats")
+@login_options
+@click.option("--json", "as_json", is_flag=True, help="Print mood summary as JSON.")
+def mood_stats(username, password, as_json):
+    """Show your mood summary: distribution, weekly/monthly averages, streaks and trend."""
+    journal_manager = login(username, password)
+    if as_json:
+        click.echo(json.dumps(journal_manager.get_mood_summary(), indent=4))
+    else:
+        from journal import view_mood_summary      # Imported here, only needed for rich summary tables
+        view_mood_summary(journal_manager)
+
+
+# REVOKE SESSIONS COMMAND
+@cli.command("revoke-sessions")
+@login_options
+def revoke_sessions(username, password):
+    """Log out everywhere: revoke every saved "stay logged in" session for your account, on every device."""
+    user_manager, authenticated_user = authenticate(username, password)
+    if not user_manager.revoke_sessions(authenticated_user):
+        raise click.ClickException("Sorry! There was a problem revoking your sessions.")
+    delete_session_token(authenticated_user.username)
+    console.print(f"[green]{EMOJI_SUCCESSFUL} All saved logins for {authenticated_user} have been revoked.[/green]")
+
+
+# METRICS COMMAND
+@cli.command("metrics")
+@click.option("--format", "output_format", type=click.Choice(["table", "json", "prometheus"]), default="table", show_default=True)
+@click.option("--kdf-samples", type=click.IntRange(min=0), default=0, show_default=True,
+              help="Also time this many bcrypt password hashes and checks now, to check the work factor.")
+@click.option("--work-factor", type=click.IntRange(4, 31), default=BCRYPT_WORK_FACTOR, show_default=True,
+              help="bcrypt work factor used by --kdf-samples (default is the app's configured work factor).")
+def show_metrics(output_format, kdf_samples, work_factor):
+    """Show timings and counters saved by runs with MINDFUL_MOMENTS_METRICS=1 (totals across runs).
+       --kdf-samples also shows how long one password hash and check take at the work factor (bcrypt cost).
+    """
+    metrics = load_metrics_file(METRICS_FILE)
+    kdf_timings = measure_kdf_timings(kdf_samples, work_factor) if kdf_samples else None
+    if output_format == "json":
+        click.echo(json.dumps({**metrics, "kdf": kdf_timings} if kdf_timings else metrics, indent=4))
+        return
+    if output_format == "prometheus":
+        click.echo(format_prometheus(metrics) + (format_kdf_prometheus(kdf_timings) if kdf_timings else ""), nl=False)
+        return
+    if kdf_timings:
+        print_kdf_timings(kdf_timings)
+    if not metrics.get("timers") and not metrics.get("counters"):
+        console.print(f"[yellow]{EMOJI_WARNING} No metrics saved yet. Run the app with {METRICS_ENV_VAR}=1 to record them.[/yellow]")
+        return
+    timers_table = Table(title="Timings", show_lines=True)
+    for column_name in ("Metric", "Calls", "Total ms", "Average ms", "Max ms"):
+        timers_table.add_column(column_name, justify="left" if column_name == "Metric" else "right")
+    for metric_name, timer_totals in sorted(metrics.get("timers", {}).items()):
+        timers_table.add_row(metric_name, str(timer_totals["count"]), f"{timer_totals['total_seconds'] * 1000:.1f}",
+                             f"{timer_totals['total_seconds'] * 1000 / max(timer_totals['count'], 1):.2f}",
+                             f"{timer_totals['max_seconds'] * 1000:.2f}")
+    counters_table = Table(title="Counters", show_lines=True)
+    counters_table.add_column("Metric")
+    counters_table.add_column("Total", justify="right")
+    for metric_name, counter_total in sorted(metrics.get("counters", {}).items()):
+        counters_table.add_row(metric_name, str(counter_total))
+    for metrics_table in (timers_table, counters_table):
+        if metrics_table.row_count:
+            console.print(metrics_table)
+
+
+def print_kdf_timings(kdf_timings):
+    """Prints a table of bcrypt hash/check timings measured by measure_kdf_timings()."""
+    kdf_table = Table(title=f"Password hashing (bcrypt work factor {kdf_timings['work_factor']})", show_lines=True)
+    for column_name in ("Operation", "Samples", "Average ms", "Last ms"):
+        kdf_table.add_column(column_name, justify="left" if column_name == "Operation" else "right")
+    for operation in ("hash", "verify"):
+        operation_timings = kdf_timings[operation]
+        kdf_table.add_row(operation, str(operation_timings["count"]), f"{operation_timings['average_seconds'] * 1000:.1f}",
+                          f"{operation_timings['last_seconds'] * 1000:.1f}")
+    console.print(kdf_table)
+
+
+def format_kdf_prometheus(kdf_timings):
+    """Returns bcrypt work factor and average hash/check seconds as Prometheus gauges."""
+    lines = [f"# TYPE {PROMETHEUS_PREFIX}kdf_work_factor gauge", f"{PROMETHEUS_PREFIX}kdf_work_factor {kdf_timings['work_factor']}"]
+    for operation in ("hash", "verify"):
+        metric_name = f"{PROMETHEUS_PREFIX}kdf_{operation}_average_seconds"
+        lines += [f"# TYPE {metric_name} gauge", f"{metric_name} {kdf_timings[operation]['average_seconds']:.6f}"]
+    return "\n".join(lines) + "\n"
+
+
+# MIGRATE STORED RECORDS COMMAND
+@cli.command("migrate")
+def migrate_records():
+    """Rewrite stored user accounts and journal entries saved by older app versions in the current record format.
+       The app can be used while this runs, and if stopped (CTRL + C) it carries on from where it stopped next time.
+    """
+    accounts_upgraded = UserManager(USER_ACCOUNTS_JSON_FILE).upgrade_user_accounts()
+    journal_storage = create_journal_storage(JOURNAL_ENTRIES_JSON_FILE)
+    progress_file_path = Path(JOURNAL_ENTRIES_JSON_FILE).with_name(SCHEMA_MIGRATION_FILE_NAME)
+    try:
+        with Progress(console=console) as progress:
+            users_task = progress.add_task("Upgrading journal entries (users)", total=None)
+            entries_upgraded = migrate_journal_entries(
+                journal_storage, progress_file_path,
+                report_progress=lambda users_done, total_users: progress.update(users_task, completed=users_done, total=total_users)
+            )
+    finally:
+        journal_storage.close()
+    console.print(f"[green]{EMOJI_SUCCESSFUL} Upgraded {accounts_upgraded} user accounts and {entries_upgraded} journal entries.[/green]")
+
+
+# JOURNAL SERVER COMMAND
+@cli.command("serve")
+def serve():
+    """Run the journal server: one process keeping accounts and journals loaded for many app sessions (python main.py --server)."""
+    from core.journal_server import JournalServer     # Imported here, only needed when running the server
+    server_address = get_server_address()
+    journal_server = JournalServer()
+    console.print(f"[green]{EMOJI_SUCCESSFUL} Journal server listening on {server_address}. Press CTRL + C to stop.[/green]")
+    try:
+        asyncio.run(journal_server.serve(server_address))
+    except KeyboardInterrupt:
+        pass
+    console.print(f"[green]{EMOJI_SUCCESSFUL} Journal server stopped, all entries saved.[/green]")
+
+
+if __name__ == "__main__":
+    cli()
@@ -8,7 +8,8 @@ class DataManagerError(Exception):
 
 class DataFileCorruptedError(json.JSONDecodeError, DataManagerError):
     """Raised when JSON data file is corrupt or invalid."""
-    pass
+    def __init__(self, message, doc="", pos=0):
+        super().__init__(message, doc, pos)
 
 class FileLoadingError(DataManagerError):
     """Raised when there is an unexpected error during attempt to load JSON file."""
@@ -18,6 +19,22 @@ class FileSavingError(DataManagerError):
     """Raised when there is an unexpected error during attempt to save JSON file."""
     pass
 
+class JournalStorageError(DataManagerError):
+    """Raised when journal storage backend is unknown or misconfigured."""
+    pass
+
+class ExportPermissionError(DataManagerError):
+    """Raised when a user who isn't an admin tries to export every user's journal entries."""
+    pass
+
+class JournalServerError(DataManagerError):
+    """Raised when the journal server can't be reached or can't complete a request."""
+    pass
+
+class SchemaMigrationError(DataManagerError):
+    """Raised when a stored record's schema version has no migration to the current version."""
+    pass
+
 class UserManagerError(DataManagerError):
     """Base class for User management related errors."""
     pass
@@ -42,6 +59,12 @@ class AuthenticationError(UserManagerError):
     """Raised when error during authenticating user's account login credentials."""
     pass
 
+class LoginRateLimitedError(UserManagerError):
+    """Raised when a login is attempted too soon after too many failed attempts (password isn't checked)."""
+    def __init__(self, message, retry_after_seconds):
+        super().__init__(message)
+        self.retry_after_seconds = retry_after_seconds
+
 class AccountRegistrationError(Exception):
     """Raised when error with registering new user account."""
     pass
@@ -10,3 +10,72 @@ USER_ACCOUNTS_JSON_FILE = Path('data_storage/user_accounts.json')
 # CONSTANT FILE PATH TO JOURNAL ENTRIES JSON
 JOURNAL_ENTRIES_JSON_FILE = Path('data_storage/journal_entries.json')
 
+# FILE NAME (next to user accounts JSON) FOR FAILED LOGIN LIMITS, e.g. data_storage/login_attempts.json (see login_limiter.py)
+LOGIN_ATTEMPTS_FILE_NAME = 'login_attempts.json'
+
+# FILE NAME (next to user accounts JSON) FOR THE SECRET KEY SIGNING "STAY LOGGED IN" SESSION TOKENS (see session_tokens.py)
+SESSION_SECRET_FILE_NAME = 'session_secret.key'
+
+# FOLDER FOR SESSION TOKENS SAVED ON THIS DEVICE, one <SHA-256 of username>.token file per user who chose to stay logged in
+SESSION_TOKEN_DIR = Path('data_storage/sessions')
+
+# FOLDER OF EXTRA ENCOURAGEMENT QUOTE PACKS, one sub-folder per mood rating key, e.g. quote_packs/4/<pack name>.txt
+# (one quote per line, added to the built-in quotes in quotes.py, see quote_engine.py)
+QUOTE_PACK_DIR = Path('quote_packs')
+
+# FOLDER FOR EACH USER'S QUOTE SHUFFLE BAG (which quotes were shown already), one <username>.json file per user
+QUOTE_BAG_DIR = Path('data_storage/quote_bags')
+
+# FILE NAME (next to journal entries JSON) FOR THE PROGRESS OF AN UNFINISHED RECORD MIGRATION (python cli.py migrate)
+SCHEMA_MIGRATION_FILE_NAME = 'schema_migration.json'
+
+# FOLDER NAME (next to journal entries JSON) FOR PER-USER INDEXES, e.g. data_storage/user_indexes/<username>.search.json
+USER_INDEX_DIR_NAME = 'user_indexes'
+# Updated indexes are saved on logout, and when entries are saved at most every USER_INDEX_SAVE_INTERVAL seconds (not on
+# every save, which would rewrite each whole index file). Indexes not saved (e.g. app killed) are rebuilt from entries
+USER_INDEX_SAVE_INTERVAL = 30.0
+
+
+# CONSTANT FILE PATH TO SQLITE DATABASE (used when a storage engine below is set to "sqlite")
+SQLITE_DATABASE_FILE = Path('data_storage/mindful_moments.db')
+
+
+# USER ACCOUNTS STORAGE CONFIG
+# "json"   = accounts kept in user_accounts.json
+# "sqlite" = accounts kept in the SQLite database, existing accounts in user_accounts.json are copied across on first use
+USER_STORAGE_ENGINE = "json"
+
+# JOURNAL STORAGE CONFIG
+# "sqlite"  = journal_entries table in the SQLite database, indexed by username and timestamp
+# "sharded" = one append-only file per user in journal_entries_shards/, only the logged in user's file is read
+# "log"     = append-only log file (journal_entries.jsonl) next to the JSON file, compacted into the JSON file periodically
+# "json"    = whole JSON file rewritten on every save
+# Existing entries in journal_entries.json (+ log) are split into shards the first time the "sharded" backend is used
+JOURNAL_STORAGE_BACKEND = "sharded"
+
+# Number of entries appended to the log before it is compacted into the JSON file
+JOURNAL_LOG_COMPACT_THRESHOLD = 500
+
+# WRITE-BEHIND SAVES (e.g. kiosks where many entries are created in quick succession), works with any backend above
+# True = saves are appended to a small write-ahead log (journal_entries.wal.jsonl) and moved into the storage backend
+# by a background thread every JOURNAL_WRITE_BEHIND_INTERVAL seconds or once JOURNAL_WRITE_BEHIND_MAX_PENDING entries
+# are waiting, and on logout. Entries left in the log (e.g. after a crash) are moved into storage on next startup
+JOURNAL_WRITE_BEHIND = False
+JOURNAL_WRITE_BEHIND_INTERVAL = 2.0
+JOURNAL_WRITE_BEHIND_MAX_PENDING = 50
+
+# ADMIN ACCOUNTS (usernames) allowed to export every user's journal entries, e.g. ("adminuser",)
+ADMIN_USERNAMES = ()
+
+# METRICS (opt-in: set environment variable MINDFUL_MOMENTS_METRICS=1 before starting the app, see metrics.py)
+# Timings/counters are added to METRICS_FILE (JSON) when the app exits, and also written in Prometheus text format
+METRICS_FILE = Path('data_storage/metrics.json')
+METRICS_PROMETHEUS_FILE = Path('data_storage/metrics.prom')
+
+# JOURNAL SERVER (python cli.py serve) - one warm process serving many app sessions (python main.py --server)
+# "unix" = Unix socket file (only the account running the server can connect), "tcp" = localhost TCP port
+# Unix sockets aren't available on Windows, so "tcp" is always used there
+JOURNAL_SERVER_TRANSPORT = "unix"
+JOURNAL_SERVER_SOCKET = Path('data_storage/mindful_moments.sock')
+JOURNAL_SERVER_HOST = "127.0.0.1"
+JOURNAL_SERVER_PORT = 8765
@@ -29,11 +29,11 @@ def display_menu(menu_options):
         print()
 
 
-def get_menu_choice(menu_options):
-    """ Get valid menu choice from user """
+def get_menu_choice(menu_options, prompt="Choose a menu option. Enter a number: "):
+    """ Get valid menu choice from user, prompt can be given for menus that are not numbered """
     while True:
         try:
-            user_choice = input("Choose a menu option. Enter a number: ").strip()
+            user_choice = input(prompt).strip().lower()
             if user_choice in menu_options.keys():
                 return user_choice
             else:
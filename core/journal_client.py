@@ -0,0 +1,163 @@
+# journal_client.py
+# CLIENT FOR THE JOURNAL SERVER (see journal_server.py) - used by: python main.py --server
+# RemoteUserManager and RemoteJournalManager have the same methods main.py and journal.py use on UserManager and
+# JournalManager, but send each call to the server, so the app doesn't load any data files itself.
+
+# IMPORT BUILT IN LIBRARIES:
+import json
+import socket
+
+# IMPORT THIRD-PARTY LIBRARIES:
+from rich import print
+
+# IMPORT CUSTOM CORE MODULES:
+from core.user_auth_models import UserAccount
+from core.login_limiter import make_rate_limited_error
+from ui.emojis import EMOJI_WARNING
+
+# IMPORT JOURNAL SERVER CONFIG
+from core.file_paths import JOURNAL_SERVER_TRANSPORT, JOURNAL_SERVER_SOCKET, JOURNAL_SERVER_HOST, JOURNAL_SERVER_PORT
+
+# IMPORT CUSTOM EXCEPTION CLASSES:
+from core.exception_classes import JournalServerError, UserNotFoundError
+
+
+# PROTOCOL: one JSON object per line each way (UTF-8), e.g.
+#   {"command": "login", "username": "...", "password": "..."}  ->  {"ok": true, "authenticated": true}
+#   {"command": "count_entries"}                                ->  {"ok": true, "count": 12}
+# Failed requests get {"ok": false, "error": <error code>, "message": <text>}
+MAX_MESSAGE_BYTES = 16 * 1024 * 1024    # Longest request/response line (e.g. search results with many entries)
+SERVER_TIMEOUT_SECONDS = 30
+
+
+def get_server_address(transport=JOURNAL_SERVER_TRANSPORT):
+    """Returns the journal server's Unix socket path, or (host, port) for TCP (always TCP where Unix sockets aren't available)."""
+    if transport == "unix" and hasattr(socket, "AF_UNIX"):
+        return JOURNAL_SERVER_SOCKET
+    return (JOURNAL_SERVER_HOST, JOURNAL_SERVER_PORT)
+
+
+# CONNECTION TO THE JOURNAL SERVER
+class JournalClient:
+    """One connection (session) to the journal server. request() sends a command and returns the response dict."""
+    def __init__(self, address=None, timeout=SERVER_TIMEOUT_SECONDS):
+        self.address = address or get_server_address()
+        try:
+            if isinstance(self.address, tuple):
+                self.connection = socket.create_connection(self.address, timeout=timeout)
+            else:
+                self.connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                self.connection.settimeout(timeout)
+                self.connection.connect(str(self.address))
+        except OSError as err:
+            raise JournalServerError(
+                f"[red]{EMOJI_WARNING} Could not connect to the journal server at {self.address}. "
+                f"Start it with: python cli.py serve[/red]\n"
+            ) from err
+        self.server_file = self.connection.makefile('rwb')
+
+    def request(self, command, **fields):
+        """Sends command (with fields) to the server and returns its response dict, raises JournalServerError if it failed."""
+        try:
+            self.server_file.write(json.dumps({"command": command, **fields}).encode('utf-8') + b"\n")
+            self.server_file.flush()
+            response_line = self.server_file.readline(MAX_MESSAGE_BYTES + 1)
+        except OSError as err:
+            raise JournalServerError(f"[red]{EMOJI_WARNING} Lost connection to the journal server.[/red]\n") from err
+        if not response_line:
+            raise JournalServerError(f"[red]{EMOJI_WARNING} The journal server closed the connection.[/red]\n")
+        response = json.loads(response_line)
+        if not response.get("ok"):
+            raise JournalServerError(f"[red]{EMOJI_WARNING} Journal server error: {response.get('message')}[/red]\n")
+        return response
+
+    def close(self):
+        """Closes the connection (the server logs the session out)."""
+        self.server_file.close()
+        self.connection.close()
+
+
+# REMOTE MANAGERS (same methods as UserManager/JournalManager used by main.py and journal.py)
+class RemoteUserManager:
+    """Checks, registers and logs in user accounts through the journal server. Password hashes never leave the server."""
+    def __init__(self, client):
+        self.client = client
+
+    def is_existing_user(self, username):
+        """Returns True if username has an account on the server."""
+        return self.client.request("exists", username=username)["exists"]
+
+    def get_user_account(self, username):
+        """Returns a UserAccount (without password hash) if username exists on the server, otherwise raises UserNotFoundError."""
+        if not self.is_existing_user(username):
+            raise UserNotFoundError(f"[red]{EMOJI_WARNING} {username} not found.[/red]")
+        return UserAccount(username, None)
+
+    def authenticate_user(self, user_account, password):
+        """Logs this session in on the server. Returns user_account if the password is correct, otherwise None.
+           Raises LoginRateLimitedError if the server turned the attempt away after too many failed logins.
+        """
+        response = self.client.request("login", username=user_account.username, password=password)
+        if "retry_after_seconds" in response:
+            raise make_rate_limited_error(response["retry_after_seconds"])
+        return user_account if response["authenticated"] else None
+
+    def resume_session(self, username, session_token):
+        """Logs this session in on the server with a saved session token. Returns UserAccount if valid, otherwise None."""
+        response = self.client.request("resume_session", username=username, session_token=session_token)
+        return UserAccount(username, None) if response["authenticated"] else None
+
+    def create_session_token(self, user_account):
+        """Returns a new session token from the server for the logged in user."""
+        return self.client.request("create_session")["session_token"]
+
+    def register_user(self, username, password):
+        """Registers a new account on the server. Returns True if registered, False if username is taken or invalid."""
+        return self.client.request("register", username=username, password=password)["registered"]
+
+
+class RemoteJournalManager:
+    """Reads and saves the logged in user's journal entries through the journal server (see RemoteUserManager.authenticate_user)."""
+    def __init__(self, client, current_user):
+        self.client = client
+        self.current_user = current_user
+
+    def count_user_entries(self):
+        return self.client.request("count_entries")["count"]
+
+    def iter_user_entries(self, newest_first=True, offset=0, limit=None):
+        """Returns list of JournalEntry instances within offset/limit (newest first by default), e.g. one page of entries."""
+        response = self.client.request("list_entries", newest_first=newest_first, offset=offset, limit=limit)
+        return self.make_entries(response["entries"])
+
+    def save_journal_entry(self, journal_entry):
+        return self.save_journal_entries([journal_entry])
+
+    def save_journal_entries(self, journal_entries):
+        """Saves entries on the server, returns True if saved, otherwise False."""
+        try:
+            entry_dicts = [journal_entry.to_dict() for journal_entry in journal_entries]
+            return self.client.request("save_entries", entries=entry_dicts)["saved"]
+        except JournalServerError as err:
+            print(f"[red]{EMOJI_WARNING} Error occurred while saving journal entry: {err}[/red]\n")
+            return False
+
+    def search(self, query):
+        return self.make_entries(self.client.request("search", query=query)["entries"])
+
+    def get_entries_between(self, start, end):
+        response = self.client.request("entries_between", start=start.isoformat(), end=end.isoformat())
+        return self.make_entries(response["entries"])
+
+    def get_mood_summary(self):
+        return self.client.request("mood_summary")["summary"]
+
+    def close(self):
+        """Logs this session out on the server (the server keeps the user's journal loaded for other sessions)."""
+        self.client.request("logout")
+        return 0
+
+    @staticmethod
+    def make_entries(entry_dicts):
+        from core.journal_models import JournalEntry    # Imported here, only needed once logged in
+        return [JournalEntry.from_dict(entry_dict) for entry_dict in entry_dicts]
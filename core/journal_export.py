@@ -0,0 +1,91 @@
+# journal_export.py
+# STREAMING EXPORT OF JOURNAL ENTRIES TO JSONL, CSV OR MARKDOWN
+# Entries pass through generators one at a time (storage -> formatter -> file), so memory use stays the same for any number of entries
+
+# IMPORT BUILT IN LIBRARIES:
+import csv
+import io
+import json
+from datetime import datetime
+
+
+# JOURNAL ENTRY FIELDS IN EXPORT ORDER (with headings used for Markdown)
+EXPORT_FIELDS = {
+    "timestamp": "Created on",
+    "mood": "Mood Rating",
+    "wins": "Wins of the day",
+    "challenges": "Challenges of the day",
+    "gratitude": "Gratitude of the day",
+    "goals": "Goal for tomorrow",
+}
+
+
+def jsonl_lines(entry_records, include_username=False):
+    """Yields one JSON line per (username, entry dict) record."""
+    for username, entry_dict in entry_records:
+        yield json.dumps({"username": username, **entry_dict} if include_username else entry_dict) + "\n"
+
+
+def csv_lines(entry_records, include_username=False):
+    """Yields CSV header row then one row per (username, entry dict) record."""
+    field_names = (["username"] if include_username else []) + list(EXPORT_FIELDS)
+    row_buffer = io.StringIO()
+    csv_writer = csv.DictWriter(row_buffer, fieldnames=field_names, extrasaction='ignore', lineterminator='\n')
+    csv_writer.writeheader()
+    yield pop_buffer(row_buffer)
+    for username, entry_dict in entry_records:
+        csv_writer.writerow({"username": username, **entry_dict})
+        yield pop_buffer(row_buffer)
+
+
+def pop_buffer(text_buffer):
+    """Returns text written to text_buffer and empties it, so it only ever holds one row."""
+    text = text_buffer.getvalue()
+    text_buffer.seek(0)
+    text_buffer.truncate()
+    return text
+
+
+def markdown_lines(entry_records, include_username=False):
+    """Yields a Markdown document: one section per entry (grouped under a heading per user if include_username)."""
+    yield "# Mindful Moments Journal\n"
+    entry_heading = "###" if include_username else "##"
+    current_username = None
+    for username, entry_dict in entry_records:
+        if include_username and username != current_username:
+            current_username = username
+            yield f"\n## {username}\n"
+        display_datetime = datetime.fromisoformat(entry_dict["timestamp"]).strftime("%d-%m-%Y %H:%M")
+        yield f"\n{entry_heading} {display_datetime} - {entry_dict.get('mood')}\n\n"
+        for field_name, field_heading in list(EXPORT_FIELDS.items())[2:]:
+            yield f"- **{field_heading}:** {entry_dict.get(field_name) or ''}\n"
+
+
+# EXPORT FORMATS: format name: (line generator, file suffix)
+EXPORT_FORMATS = {
+    "jsonl": (jsonl_lines, ".jsonl"),
+    "csv": (csv_lines, ".csv"),
+    "markdown": (markdown_lines, ".md"),
+}
+
+def get_export_format(file_path, default="jsonl"):
+    """Returns export format name for a file path by its suffix (e.g. entries.csv -> "csv"), otherwise default."""
+    for export_format, (_, file_suffix) in EXPORT_FORMATS.items():
+        if str(file_path).lower().endswith(file_suffix):
+            return export_format
+    return default
+
+
+def write_export(entry_records, output_file, export_format="jsonl", include_username=False):
+    """Writes (username, entry dict) records to an open text file in export_format. Returns number of entries written."""
+    line_generator, _ = EXPORT_FORMATS[export_format]
+    entry_count = 0
+
+    def count_records():
+        nonlocal entry_count
+        for entry_record in entry_records:
+            entry_count += 1
+            yield entry_record
+
+    output_file.writelines(line_generator(count_records(), include_username))
+    return entry_count
@@ -1,27 +1,60 @@
 # journal_models.py
 # CLASSES, METHODS/HELPERS FOR JOURNAL ENTRY DATA REPRESENTATION AND MANAGING USER'S JOURNAL ENTRIES
 
-# IMPORT THIRD-PARTY LIBRARIES:
+# IMPORT BUILT IN LIBRARIES:
+import time
+from array import array
 from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+
+# IMPORT THIRD-PARTY LIBRARIES:
 from rich import print
 from rich.table import Table
 from rich.console import Console
+from rich.segment import Segment, Segments
 
 # IMPORT CUSTOM CORE MODULES:
 from core.user_auth_models import BaseDataManager
+from core.journal_storage import create_journal_storage
+from core.search_index import SearchIndex
+from core.mood_analytics import MoodSummary, MOOD_SCORES
+from core.timestamp_index import TimestampIndex, timestamp_to_epoch_us, epoch_us_to_datetime
+from core.journal_export import write_export
+from core.metrics import timed, count
+from core.schema_migrations import upgrade_entry_dict, SCHEMA_VERSION_FIELD, JOURNAL_ENTRY_SCHEMA_VERSION
 from ui.emojis import EMOJI_DATE_TIME, EMOJI_HEART, EMOJI_WINS, EMOJI_CHALLENGES, EMOJI_GRATITUDE, EMOJI_GOALS, EMOJI_WARNING
 
 # IMPORT CONSTANT FILE PATHS
-from core.file_paths import JOURNAL_ENTRIES_JSON_FILE
+from core.file_paths import JOURNAL_ENTRIES_JSON_FILE, USER_INDEX_DIR_NAME, USER_INDEX_SAVE_INTERVAL, ADMIN_USERNAMES
+
+# IMPORT CUSTOM EXCEPTION CLASSES:
+from core.exception_classes import ExportPermissionError
 
 # Custom Exception Classes
 class UserNotLoggedInError(Exception):
     """Exception raised when a method requires a logged in user, but none is found."""
     pass
 
+# COMPACT FIELD ENCODING: mood label stored as small integer code (same as mood score), timestamp as integer
+# microseconds since 1970-01-01 (see timestamp_index.py)
+MOOD_CODES = dict(MOOD_SCORES)
+MOOD_LABELS = {mood_code: mood_label for mood_label, mood_code in MOOD_CODES.items()}
+CUSTOM_MOOD_CODE = 0        # Used for free text moods not in MOOD_CODES (label kept as text)
+
+# ENTRY DISPLAY: one shared console, and rendered entry tables kept in an LRU cache so re-viewing entries skips rendering
+console = Console()
+ENTRY_RENDER_CACHE_SIZE = 256       # Rendered entries kept (about 50 pages of 5 entries)
+
+
 # CLASS FOR JOURNAL ENTRY: FOR DATA REPRESNTATION
 class JournalEntry():
-    """Represents a journal entry, used for saving and loading from JSON file."""
+    """Represents a journal entry, used for saving and loading from JSON file.
+       Uses __slots__ (no per-instance __dict__), mood as an integer code and timestamp as integer microseconds,
+       while timestamp/mood properties still give the ISO string/label used in JSON storage.
+    """
+    __slots__ = ("timestamp_us", "mood_code", "custom_mood", "wins", "challenges", "gratitude", "goals")
+
     def __init__(self, mood, wins, challenges, gratitude, goals, timestamp=None):
         """Use timestamp for loading from JSON file, otherwise create new timestamp."""
         self.timestamp = timestamp or datetime.now().isoformat()
@@ -31,9 +64,33 @@ class JournalEntry():
         self.gratitude = gratitude
         self.goals = goals
 
+    @property
+    def timestamp(self):
+        """ISO format timestamp string (as stored in JSON)."""
+        return epoch_us_to_datetime(self.timestamp_us).isoformat()
+
+    @timestamp.setter
+    def timestamp(self, timestamp):
+        self.timestamp_us = timestamp_to_epoch_us(timestamp)
+
+    @property
+    def mood(self):
+        """Mood label, e.g. "Good"."""
+        return self.custom_mood if self.mood_code == CUSTOM_MOOD_CODE else MOOD_LABELS[self.mood_code]
+
+    @mood.setter
+    def mood(self, mood_label):
+        self.mood_code = MOOD_CODES.get(mood_label, CUSTOM_MOOD_CODE)
+        self.custom_mood = None if self.mood_code != CUSTOM_MOOD_CODE else mood_label
+
+    def get_datetime(self):
+        """Returns entry creation time as a datetime."""
+        return epoch_us_to_datetime(self.timestamp_us)
+
     def to_dict(self):
-        """Converts the journal entry to dict format for JSON storage."""
+        """Converts the journal entry to dict format for JSON storage (in the current schema version)."""
         return {
+            SCHEMA_VERSION_FIELD: JOURNAL_ENTRY_SCHEMA_VERSION,
             "timestamp": self.timestamp,
             "mood": self.mood,
             "wins": self.wins,
@@ -44,7 +101,10 @@ class JournalEntry():
 
     @classmethod
     def from_dict(cls, entry_dict):
-        """Reconstructs a JournalEntry instance loaded from dict data - used when loading from JSON file."""
+        """Reconstructs a JournalEntry instance loaded from dict data - used when loading from JSON file.
+           Entries saved in an older schema version are upgraded first (see schema_migrations.py).
+        """
+        entry_dict = upgrade_entry_dict(entry_dict)
         return cls(
             timestamp=entry_dict["timestamp"],
             mood=entry_dict["mood"],
@@ -56,57 +116,295 @@ class JournalEntry():
 
     def get_display_datetime(self):
         """Returns user friendly timestamp format for display."""
-        return datetime.fromisoformat(self.timestamp).strftime("%d-%m-%Y %H:%M")
+        return self.get_datetime().strftime("%d-%m-%Y %H:%M")
     
+    def get_render_key(self):
+        """Returns the entry's timestamp and contents as a tuple, used as the render cache key."""
+        return (self.timestamp_us, self.mood, self.wins, self.challenges, self.gratitude, self.goals)
+
+    @timed("journal.display_entry")
     def display_entry(self):
         """Formatted printed journal entry for display."""
-        console = Console()
-        table = Table(title="Mindful Moments Reflections\n", show_lines=True)
-        table.add_column(f"{EMOJI_DATE_TIME} Journal Entry created on", style="cyan")
-        table.add_column(f"{self.get_display_datetime()}", style="magenta", no_wrap=False)
-        table.add_row(f"{EMOJI_HEART} Mood Rating", self.mood)
-        table.add_row(f"{EMOJI_WINS} Wins of the day", self.wins)
-        table.add_row(f"{EMOJI_CHALLENGES} Challenges of the day", self.challenges)
-        table.add_row(f"{EMOJI_GRATITUDE} Gratitude of the day", self.gratitude)
-        table.add_row(f"{EMOJI_GOALS} Goal for tomorrow", self.goals)
-        console.print(table)
+        display_entries([self])
+
+
+# ENTRY DISPLAY HELPERS
+@lru_cache(maxsize=ENTRY_RENDER_CACHE_SIZE)
+def render_entry(render_key, width):
+    """Returns an entry's table rendered for a terminal width, as rich Segments ready to print.
+       Cached by entry timestamp and contents (JournalEntry.get_render_key) plus width, so a re-viewed entry isn't
+       rendered again unless the terminal is resized.
+    """
+    timestamp_us, mood, wins, challenges, gratitude, goals = render_key
+    table = Table(title="Mindful Moments Reflections\n", show_lines=True)
+    table.add_column(f"{EMOJI_DATE_TIME} Journal Entry created on", style="cyan")
+    table.add_column(epoch_us_to_datetime(timestamp_us).strftime("%d-%m-%Y %H:%M"), style="magenta", no_wrap=False)
+    table.add_row(f"{EMOJI_HEART} Mood Rating", mood)
+    table.add_row(f"{EMOJI_WINS} Wins of the day", wins)
+    table.add_row(f"{EMOJI_CHALLENGES} Challenges of the day", challenges)
+    table.add_row(f"{EMOJI_GRATITUDE} Gratitude of the day", gratitude)
+    table.add_row(f"{EMOJI_GOALS} Goal for tomorrow", goals)
+    return tuple(console.render(table, console.options.update_width(width)))
+
+@timed("journal.display_entries")
+def display_entries(entries, separator=None):
+    """Prints entries (e.g. one page) with a single console write, each table followed by separator text if given.
+       Tables come from the render cache (see render_entry).
+    """
+    width = console.width
+    page_segments = []
+    for entry in entries:
+        page_segments.extend(render_entry(entry.get_render_key(), width))
+        if separator:
+            page_segments.append(Segment(f"{separator}\n\n"))
+    console.print(Segments(page_segments))
+
+# COLUMNAR BATCH OF JOURNAL ENTRIES: FOR BULK OPERATIONS/ANALYTICS OVER LONG HISTORIES
+class JournalEntryBatch:
+    """Stores many entries as one array/list per field instead of one object per entry.
+       timestamps_us (array of 64-bit ints) and mood_codes (array of 8-bit ints) can be used directly for analytics
+       (e.g. numpy.frombuffer) without creating a JournalEntry for each entry.
+    """
+    __slots__ = ("timestamps_us", "mood_codes", "custom_moods", "wins", "challenges", "gratitude", "goals")
+
+    def __init__(self):
+        self.timestamps_us = array('q')
+        self.mood_codes = array('b')
+        self.custom_moods = {}      # Position: free text mood label (only for CUSTOM_MOOD_CODE entries)
+        self.wins = []
+        self.challenges = []
+        self.gratitude = []
+        self.goals = []
+
+    @classmethod
+    def from_dicts(cls, entry_dicts):
+        """Builds a batch from entry dicts (e.g. from storage), in the order given."""
+        batch = cls()
+        for entry_dict in entry_dicts:
+            batch.append_dict(entry_dict)
+        return batch
+
+    def append_dict(self, entry_dict):
+        """Adds one entry dict to the end of the batch (upgraded first if saved in an older schema version)."""
+        entry_dict = upgrade_entry_dict(entry_dict)
+        mood_label = entry_dict["mood"]
+        mood_code = MOOD_CODES.get(mood_label, CUSTOM_MOOD_CODE)
+        if mood_code == CUSTOM_MOOD_CODE:
+            self.custom_moods[len(self.mood_codes)] = mood_label
+        self.timestamps_us.append(timestamp_to_epoch_us(entry_dict["timestamp"]))
+        self.mood_codes.append(mood_code)
+        self.wins.append(entry_dict["wins"])
+        self.challenges.append(entry_dict["challenges"])
+        self.gratitude.append(entry_dict["gratitude"])
+        self.goals.append(entry_dict["goals"])
+
+    def __len__(self):
+        return len(self.timestamps_us)
+
+    def __getitem__(self, position):
+        """Returns JournalEntry at position."""
+        entry = JournalEntry.__new__(JournalEntry)
+        entry.timestamp_us = self.timestamps_us[position]
+        entry.mood_code = self.mood_codes[position]
+        entry.custom_mood = self.custom_moods.get(position % len(self))
+        entry.wins = self.wins[position]
+        entry.challenges = self.challenges[position]
+        entry.gratitude = self.gratitude[position]
+        entry.goals = self.goals[position]
+        return entry
+
+    def __iter__(self):
+        return (self[position] for position in range(len(self)))
+
+    def iter_dicts(self):
+        """Yields entries as dicts (JSON storage format)."""
+        for position in range(len(self)):
+            yield self[position].to_dict()
+
+
+# PER-USER INDEXES KEPT UP TO DATE AS ENTRIES ARE SAVED (saved in index_dir)
+USER_INDEX_CLASSES = {
+    "search": SearchIndex,
+    "mood": MoodSummary,
+    "timestamps": TimestampIndex,
+}
 
 # JOURNAL MANAGER CLASS: FOR MANAGING USER ENTRIES
 class JournalManager(BaseDataManager):
-    """Inherits from BaseDataManager to handle file loading and saving for JSON storage."""
-    def __init__(self, json_file_path=JOURNAL_ENTRIES_JSON_FILE, current_user=None):
+    """Inherits from BaseDataManager to handle file loading and saving for JSON storage.
+       Reading and writing entries is delegated to a journal storage backend (see journal_storage.py).
+    """
+    def __init__(self, json_file_path=JOURNAL_ENTRIES_JSON_FILE, current_user=None, storage=None, index_dir=None,
+                 index_save_interval=USER_INDEX_SAVE_INTERVAL):
         super().__init__(json_file_path)
         self.current_user = current_user
-        self.journal_data = self.load_json_file() or {}
+        self.storage = storage or create_journal_storage(json_file_path)
+        self.index_dir = Path(index_dir) if index_dir else Path(json_file_path).with_name(USER_INDEX_DIR_NAME)
+        self.user_indexes = {}      # Current user's indexes (index name: UserIndex), loaded on first use
+        self.unsaved_indexes = set()    # Index names updated by saves but not saved yet (saved on close or every index_save_interval)
+        self.index_save_interval = index_save_interval
+        self.indexes_saved_at = time.monotonic()
 
     def validate_user(self):
         """Helper method used to ensure a user is logged in (and has a username attribute)."""
         if not self.current_user or not hasattr(self.current_user, 'username'):
             raise UserNotLoggedInError(f"[red]{EMOJI_WARNING} No user is currently logged in.[/red]")
 
+    @timed("journal.get_user_entries")
     def get_user_entries(self):
         """Retrieves and returns a list of JournalEntry instances for the validated current user."""
         self.validate_user()
-        user_entries = self.journal_data.get(self.current_user.username, [])
+        user_entries = self.storage.load_user_entries(self.current_user.username)
         return [JournalEntry.from_dict(entry) for entry in user_entries]
 
+    def get_entry_batch(self):
+        """Returns all of the validated current user's entries (oldest first) as a JournalEntryBatch for bulk operations."""
+        self.validate_user()
+        return JournalEntryBatch.from_dicts(self.storage.iter_user_entries(self.current_user.username, newest_first=False))
+
+    def count_user_entries(self):
+        """Returns number of stored entries for the validated current user."""
+        self.validate_user()
+        return self.storage.count_user_entries(self.current_user.username)
+
+    def iter_user_entries(self, newest_first=True, offset=0, limit=None):
+        """Generator yielding JournalEntry instances for the validated current user (newest first by default).
+           Only entries within offset/limit are decoded, e.g. one page of entries at a time.
+        """
+        self.validate_user()
+        for entry_dict in self.storage.iter_user_entries(self.current_user.username, newest_first, offset, limit):
+            yield JournalEntry.from_dict(entry_dict)
+
 
     def save_journal_entry(self, journal_entry):
         """ Saves a journal entry for the current user, returns True if entry saved successfully, otherwise False """
+        return self.save_journal_entries([journal_entry])
+
+    @timed("journal.save_entries")
+    def save_journal_entries(self, journal_entries):
+        """ Saves many journal entries for the current user in one storage write (e.g. batch import from the command line),
+            returns True if entries saved successfully, otherwise False
+        """
         try:
             self.validate_user()
             username = self.current_user.username
-            # Checks if user already has stored entries, otherwise cretes an empty list for saving new entries
-            if username not in self.journal_data:
-                self.journal_data[username] = []
-            # Adds new journal entry to user's list of entries and attempts to save entry
-            self.journal_data[username].append(journal_entry.to_dict())
-            saved_entry = self.save_json_file(self.journal_data)
-            if saved_entry:
+            # Adds new journal entries to user's stored entries (storage backend creates the user's list if needed)
+            entry_dicts = [journal_entry.to_dict() for journal_entry in journal_entries]
+            saved_entries = self.storage.append_entries(username, entry_dicts)
+            if saved_entries:
+                count("journal.entries_saved", len(entry_dicts))
+                self.update_user_indexes(entry_dicts)
                 return True
             else:
                 print(f"[red]{EMOJI_WARNING} Failed to save entry for {username}[/red]\n")
                 return False
         except Exception as err:
             print(f"[red]{EMOJI_WARNING} Error occurred while saving journal entry: {err}[/red]\n")
-            return False
\ No newline at end of file
+            return False
+
+    def close(self):
+        """Writes any saved entries still waiting in write-behind storage, then unsaved indexes (called on logout).
+           Returns number of entries written.
+        """
+        written_count = self.storage.close()
+        self.save_unsaved_indexes()
+        return written_count
+
+    def save_unsaved_indexes(self):
+        """Saves indexes updated by saves but not saved yet (on close, every index_save_interval seconds while saving,
+           and by the journal server, which shares one storage between users' managers and only closes it when the server stops).
+        """
+        for index_name in sorted(self.unsaved_indexes):
+            self.user_indexes[index_name].save()
+        self.unsaved_indexes.clear()
+        self.indexes_saved_at = time.monotonic()
+
+    def get_user_index(self, index_name):
+        """Returns the current user's index (e.g. "search", "mood"), loading it from file on first use.
+           It is rebuilt from stored entries if missing or out of date (entries saved by another process/tool).
+        """
+        self.validate_user()
+        if index_name not in self.user_indexes:
+            user_index = USER_INDEX_CLASSES[index_name](self.current_user.username, self.index_dir)
+            user_index.load()
+            self.user_indexes[index_name] = user_index
+        user_index = self.user_indexes[index_name]
+        if user_index.entry_count != self.count_user_entries():
+            count("journal.index_rebuilds")
+            stored_entries = self.storage.iter_user_entries(self.current_user.username, newest_first=False)
+            user_index.rebuild(map(upgrade_entry_dict, stored_entries))
+            user_index.save()
+        return user_index
+
+    def update_user_indexes(self, entry_dicts):
+        """Adds newly saved entries to each user index. If this fails the index is rebuilt next time it is used instead.
+           Index files are saved on close, or here once index_save_interval seconds have passed since they were last saved,
+           so each save costs no more than the new entries instead of rewriting every whole index file.
+        """
+        entry_count = self.count_user_entries()
+        for index_name, index_class in USER_INDEX_CLASSES.items():
+            try:
+                if index_name not in self.user_indexes:
+                    self.user_indexes[index_name] = index_class(self.current_user.username, self.index_dir)
+                    self.user_indexes[index_name].load()
+                user_index = self.user_indexes[index_name]
+                if user_index.entry_count == entry_count - len(entry_dicts):
+                    for entry_dict in entry_dicts:      # Index was up to date before these entries, only add new entries
+                        user_index.add_entry(entry_dict)
+                    self.unsaved_indexes.add(index_name)    # Rebuilt from entries if the app is killed before it is saved
+                else:
+                    self.get_user_index(index_name)
+            except Exception as err:
+                print(f"[red]{EMOJI_WARNING} Could not update {index_name} index: {err}[/red]\n")
+        if time.monotonic() - self.indexes_saved_at >= self.index_save_interval:
+            try:
+                self.save_unsaved_indexes()
+            except Exception as err:
+                print(f"[red]{EMOJI_WARNING} Could not save indexes: {err}[/red]\n")
+
+    @timed("journal.get_mood_summary")
+    def get_mood_summary(self):
+        """Returns mood summary dict (distribution, averages, streaks, trend) for the validated current user."""
+        return self.get_user_index("mood").get_summary()
+
+    @timed("journal.get_entries_between")
+    def get_entries_between(self, start, end):
+        """Returns list of JournalEntry instances (oldest first) created between start and end datetimes (inclusive),
+           for the validated current user. Uses the storage's own timestamp index if it has one (SQLite),
+           otherwise the sorted timestamp index, so only entries in the range are loaded and decoded.
+        """
+        self.validate_user()
+        username = self.current_user.username
+        if self.storage.HAS_TIMESTAMP_INDEX:
+            entry_dicts = self.storage.load_user_entries_between(username, start.isoformat(), end.isoformat())
+        else:
+            matching_positions = self.get_user_index("timestamps").find_positions_between(start, end)
+            entry_dicts = self.storage.load_user_entries_at(username, matching_positions)
+        return [JournalEntry.from_dict(entry_dict) for entry_dict in entry_dicts]
+
+    @timed("journal.export_entries")
+    def export_entries(self, output_file, export_format="jsonl", all_users=False):
+        """Streams the validated current user's entries (oldest first) to an open text file as "jsonl", "csv" or "markdown".
+           all_users exports every user's entries (with a username field), only allowed for ADMIN_USERNAMES.
+           Returns number of entries exported.
+        """
+        self.validate_user()
+        if all_users:
+            if self.current_user.username not in ADMIN_USERNAMES:
+                raise ExportPermissionError(f"[red]{EMOJI_WARNING} Only admins can export every user's journal entries.[/red]\n")
+            usernames = sorted(self.storage.usernames())
+        else:
+            usernames = [self.current_user.username]
+        entry_records = (
+            (username, upgrade_entry_dict(entry_dict)) for username, entry_dict in self.storage.stream_users_entries(usernames)
+        )
+        return write_export(entry_records, output_file, export_format, include_username=all_users)
+
+    @timed("journal.search")
+    def search(self, query):
+        """Returns list of JournalEntry instances (newest first) containing every word in query, for the validated current user.
+           Matching entries are found in the search index, so only matching entries are loaded and decoded.
+        """
+        matching_positions = self.get_user_index("search").search(query)
+        matching_entries = self.storage.load_user_entries_at(self.current_user.username, matching_positions)
+        return [JournalEntry.from_dict(entry_dict) for entry_dict in matching_entries]
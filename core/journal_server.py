@@ -0,0 +1,254 @@
+# journal_server.py
+# ASYNCIO JOURNAL SERVER - one warm process serving many app sessions at once (run with: python cli.py serve)
+# The server keeps user accounts, journal storage and each user's indexes in memory, so sessions started with
+# python main.py --server don't each reload the data files. Protocol and client are in journal_client.py.
+
+# IMPORT BUILT IN LIBRARIES:
+import asyncio
+import json
+import os
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+# IMPORT CUSTOM CORE MODULES:
+from core.user_auth_models import UserManager, UserAccount, get_invalid_credentials_reason
+from core.login_limiter import LOCAL_SOURCE
+from core.journal_models import JournalManager, JournalEntry
+from core.journal_storage import create_journal_storage
+from core.journal_client import MAX_MESSAGE_BYTES, get_server_address
+from core.metrics import count
+
+# IMPORT CONSTANT FILE PATHS
+from core.file_paths import USER_ACCOUNTS_JSON_FILE, JOURNAL_ENTRIES_JSON_FILE
+
+# IMPORT CUSTOM EXCEPTION CLASSES:
+from core.exception_classes import LoginRateLimitedError
+
+
+# COMMANDS: command name: (handler method, True if the session must be logged in)
+SERVER_COMMANDS = {
+    "ping": ("handle_ping", False),
+    "exists": ("handle_exists", False),
+    "register": ("handle_register", False),
+    "login": ("handle_login", False),
+    "logout": ("handle_logout", False),
+    "resume_session": ("handle_resume_session", False),
+    "create_session": ("handle_create_session", True),
+    "count_entries": ("handle_count_entries", True),
+    "list_entries": ("handle_list_entries", True),
+    "save_entries": ("handle_save_entries", True),
+    "search": ("handle_search", True),
+    "entries_between": ("handle_entries_between", True),
+    "mood_summary": ("handle_mood_summary", True),
+}
+
+
+def error_response(error_code, message):
+    """Returns the response sent for a failed request."""
+    return {"ok": False, "error": error_code, "message": message}
+
+
+class JournalServer:
+    """Serves many sessions from one process over a Unix socket (or localhost TCP), one JSON request per line.
+       Every read/write of accounts and entries runs on a single storage thread, so writes from different sessions
+       are serialized while the event loop keeps serving other sessions. bcrypt runs in the bcrypt thread pool,
+       so a slow password check doesn't hold up other sessions' reads and saves.
+    """
+    def __init__(self, accounts_file_path=USER_ACCOUNTS_JSON_FILE, journal_file_path=JOURNAL_ENTRIES_JSON_FILE,
+                 user_manager=None, journal_storage=None):
+        self.user_manager = user_manager or UserManager(accounts_file_path)
+        self.journal_file_path = journal_file_path
+        self.journal_storage = journal_storage or create_journal_storage(journal_file_path)
+        self.journal_managers = {}      # username: JournalManager, shared by all of the user's sessions (indexes kept warm)
+        self.storage_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="journal-storage")
+        self.connections = set()        # Open session writers, closed when the server stops
+        self.serving = threading.Event()    # Set once the server is accepting connections
+        self.loop = None
+        self.stop_requested = None
+
+    async def serve(self, address=None):
+        """Accepts sessions on address (Unix socket path, or (host, port) for TCP) until stop() is called.
+           Entries waiting in write-behind storage and unsaved indexes are written before returning.
+        """
+        address = address or get_server_address()
+        self.loop = asyncio.get_running_loop()
+        self.stop_requested = asyncio.Event()
+        if isinstance(address, tuple):
+            server = await asyncio.start_server(self.handle_connection, *address, limit=MAX_MESSAGE_BYTES)
+        else:
+            address = Path(address)
+            address.parent.mkdir(parents=True, exist_ok=True)
+            address.unlink(missing_ok=True)     # Socket file left by a server that didn't stop cleanly
+            server = await asyncio.start_unix_server(self.handle_connection, path=str(address), limit=MAX_MESSAGE_BYTES)
+            os.chmod(address, 0o600)        # Only the account running the server can connect
+        try:
+            self.loop.add_signal_handler(signal.SIGTERM, self.stop_requested.set)    # e.g. stopped by a service manager
+        except (NotImplementedError, RuntimeError, ValueError):     # Windows, or not running in the main thread
+            pass
+        try:
+            async with server:
+                self.serving.set()
+                await self.stop_requested.wait()
+                server.close()
+                for writer in list(self.connections):
+                    writer.close()
+        finally:
+            self.serving.clear()
+            await self.run_storage(self.close_storage)
+            self.storage_executor.shutdown()
+            if not isinstance(address, tuple):
+                address.unlink(missing_ok=True)
+
+    def stop(self):
+        """Stops serve() (safe to call from another thread)."""
+        self.loop.call_soon_threadsafe(self.stop_requested.set)
+
+    def close_storage(self):
+        """Writes entries waiting in write-behind storage, then each user's unsaved indexes."""
+        self.journal_storage.close()
+        for journal_manager in self.journal_managers.values():
+            journal_manager.save_unsaved_indexes()
+
+    async def run_storage(self, function, *args):
+        """Runs function(*args) on the storage thread and returns its result."""
+        return await self.loop.run_in_executor(self.storage_executor, function, *args)
+
+
+    # SESSIONS
+    async def handle_connection(self, reader, writer):
+        """Serves one session: reads a request line, sends a response line, until the client disconnects."""
+        peer_address = writer.get_extra_info("peername")
+        # Login limits per client address for TCP. The Unix socket only accepts the server's own account, so it is one local source
+        session = {"username": None, "source": f"tcp:{peer_address[0]}" if isinstance(peer_address, tuple) else LOCAL_SOURCE}
+        self.connections.add(writer)
+        try:
+            while request_line := await reader.readline():
+                response = await self.handle_request(session, request_line)
+                writer.write(json.dumps(response).encode('utf-8') + b"\n")
+                await writer.drain()
+        except (ConnectionError, ValueError):      # Client disconnected, or sent a line longer than MAX_MESSAGE_BYTES
+            pass
+        finally:
+            self.connections.discard(writer)
+            writer.close()
+
+    async def handle_request(self, session, request_line):
+        """Runs one request for session. Returns response dict: {"ok": True, ...} or error_response()."""
+        try:
+            request = json.loads(request_line)
+            handler_name, login_required = SERVER_COMMANDS[request["command"]]
+        except (ValueError, TypeError, KeyError):
+            return error_response("bad_request", "Requests must be a JSON object with a known command.")
+        if login_required and session["username"] is None:
+            return error_response("not_logged_in", "Login first.")
+        try:
+            return {"ok": True, **await getattr(self, handler_name)(session, request)}
+        except (KeyError, TypeError, ValueError) as err:
+            return error_response("bad_request", f"Invalid {request['command']} request: {err}")
+        except Exception as err:
+            return error_response("server_error", str(err))
+
+    def get_journal_manager(self, username):
+        """Returns the user's JournalManager, creating it on first use (runs on the storage thread)."""
+        if username not in self.journal_managers:
+            self.journal_managers[username] = JournalManager(self.journal_file_path, UserAccount(username, None), storage=self.journal_storage)
+        return self.journal_managers[username]
+
+    async def run_journal(self, session, method_name, *args):
+        """Runs a JournalManager method for the session's user on the storage thread and returns its result."""
+        return await self.run_storage(lambda: getattr(self.get_journal_manager(session["username"]), method_name)(*args))
+
+
+    # ACCOUNT COMMANDS
+    async def handle_ping(self, session, request):
+        return {"sessions": len(self.connections)}
+
+    async def handle_exists(self, session, request):
+        return {"exists": await self.run_storage(self.user_manager.is_existing_user, request["username"])}
+
+    async def handle_register(self, session, request):
+        username, password = request["username"].strip().lower(), request["password"]
+        if get_invalid_credentials_reason(username, password) or await self.run_storage(self.user_manager.is_existing_user, username):
+            return {"registered": False}
+        hashed_password = await asyncio.wrap_future(self.user_manager.hash_password_async(password))
+        return {"registered": await self.run_storage(self.add_new_account, UserAccount(username, hashed_password))}
+
+    def add_new_account(self, user_account):
+        """Saves user_account unless the username was taken while its password was hashed. Returns True if saved."""
+        if self.user_manager.is_existing_user(user_account.username):
+            return False
+        return self.user_manager.add_user_account(user_account)
+
+    async def handle_login(self, session, request):
+        """Checks the password in the bcrypt thread pool, then logs the session in (same checks as UserManager.authenticate_user).
+           Rate limited logins get retry_after_seconds instead, without the password being checked.
+        """
+        username, password = request["username"].strip().lower(), request["password"]
+        login_limiter = self.user_manager.login_limiter
+        try:
+            user_account = await self.run_storage(self.user_manager.get_user_account, username)
+        except Exception:
+            return {"authenticated": False}
+        try:
+            await self.run_storage(login_limiter.start_attempt, username, session["source"])
+        except LoginRateLimitedError as err:
+            return {"authenticated": False, "retry_after_seconds": err.retry_after_seconds}
+        password_matches = False
+        try:
+            password_matches = await asyncio.wrap_future(user_account.verify_password_async(password))
+        finally:
+            await self.run_storage(login_limiter.record_result, username, password_matches, session["source"])
+        if not password_matches:
+            count("auth.failed_logins")
+            return {"authenticated": False}
+        if self.user_manager.needs_rehash(user_account.hashed_password):
+            await self.run_storage(self.user_manager.rehash_password, user_account, password)
+        session["username"] = username
+        return {"authenticated": True}
+
+    async def handle_resume_session(self, session, request):
+        """Logs the session in with a session token (see UserManager.resume_session), no password check needed."""
+        username = request["username"].strip().lower()
+        user_account = await self.run_storage(self.user_manager.resume_session, username, str(request["session_token"]))
+        if user_account:
+            session["username"] = username
+        return {"authenticated": user_account is not None}
+
+    async def handle_create_session(self, session, request):
+        user_account = await self.run_storage(self.user_manager.get_user_account, session["username"])
+        return {"session_token": self.user_manager.create_session_token(user_account)}
+
+    async def handle_logout(self, session, request):
+        session["username"] = None
+        return {}
+
+
+    # JOURNAL COMMANDS (logged in sessions only, for the session's user)
+    async def handle_count_entries(self, session, request):
+        return {"count": await self.run_journal(session, "count_user_entries")}
+
+    async def handle_list_entries(self, session, request):
+        entries = await self.run_storage(lambda: [
+            entry.to_dict() for entry in self.get_journal_manager(session["username"]).iter_user_entries(
+                bool(request.get("newest_first", True)), int(request.get("offset", 0)), request.get("limit"))
+        ])
+        return {"entries": entries}
+
+    async def handle_save_entries(self, session, request):
+        journal_entries = [JournalEntry.from_dict(entry_dict) for entry_dict in request["entries"]]
+        return {"saved": await self.run_journal(session, "save_journal_entries", journal_entries)}
+
+    async def handle_search(self, session, request):
+        entries = await self.run_journal(session, "search", str(request["query"]))
+        return {"entries": [entry.to_dict() for entry in entries]}
+
+    async def handle_entries_between(self, session, request):
+        start, end = datetime.fromisoformat(request["start"]), datetime.fromisoformat(request["end"])
+        entries = await self.run_journal(session, "get_entries_between", start, end)
+        return {"entries": [entry.to_dict() for entry in entries]}
+
+    async def handle_mood_summary(self, session, request):
+        return {"summary": await self.run_journal(session, "get_mood_summary")}
@@ -0,0 +1,655 @@
+# journal_storage.py
+# STORAGE BACKENDS USED BY JournalManager TO READ AND WRITE USER'S JOURNAL ENTRIES
+
+# IMPORT BUILT IN LIBRARIES:
+import atexit
+import hashlib
+import itertools
+import json
+import os
+import shutil
+import threading
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from urllib.parse import quote, unquote
+
+# IMPORT CUSTOM CORE MODULES:
+from core.user_auth_models import BaseDataManager
+from core.safe_file_io import locked_file, get_file_stamp, write_file_atomically
+from core.json_scan import iter_json_values
+from core.metrics import timed, count
+from ui.emojis import EMOJI_WARNING
+
+# IMPORT CONSTANT FILE PATHS AND STORAGE CONFIG
+from core.file_paths import (
+    JOURNAL_ENTRIES_JSON_FILE,
+    SQLITE_DATABASE_FILE,
+    JOURNAL_STORAGE_BACKEND,
+    JOURNAL_LOG_COMPACT_THRESHOLD,
+    JOURNAL_WRITE_BEHIND,
+    JOURNAL_WRITE_BEHIND_INTERVAL,
+    JOURNAL_WRITE_BEHIND_MAX_PENDING
+    )
+
+# IMPORT CUSTOM EXCEPTION CLASSES:
+from core.exception_classes import FileLoadingError, FileSavingError, JournalStorageError, DataFileCorruptedError
+
+
+# JSON LINES FILE HELPERS
+def read_json_lines(file_path):
+    """Reads a JSON Lines file and returns list of records (empty list if file doesn't exist yet).
+       A torn last line (crash during append) is truncated so later appends start on a clean line.
+       Caller must hold locked_file(file_path) so a record being appended by another process isn't truncated.
+    """
+    records = []
+    try:
+        with open(file_path, 'rb+') as file:
+            valid_end = 0
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break       # Partially written last record, discarded below
+                valid_end += len(line)
+                if line.strip():
+                    records.append(json.loads(line))
+            file.truncate(valid_end)
+    except FileNotFoundError:
+        return []
+    except json.JSONDecodeError as err:
+        raise FileLoadingError(f"[red]{EMOJI_WARNING} Error loading data: {Path(file_path).name} is corrupted or invalid.[/red]\n") from err
+    except Exception as err:
+        raise FileLoadingError(f"[red]{EMOJI_WARNING} Unexpected Error while loading {Path(file_path).name}:[/red]\n") from err
+    return records
+
+
+def append_json_lines(file_path, records, lock=True):
+    """Appends records to a JSON Lines file (one record per line) and flushes them to disk.
+       The file is locked while appending so records from concurrent processes never interleave
+       (lock=False if the caller already holds locked_file(file_path)).
+    """
+    lines = "".join(json.dumps(record) + "\n" for record in records)
+    try:
+        Path(file_path).parent.mkdir(parents=True, exist_ok=True)
+        with locked_file(file_path) if lock else nullcontext(), open(file_path, 'a', encoding='utf-8') as file:
+            file.write(lines)
+            file.flush()
+            os.fsync(file.fileno())
+    except Exception as err:
+        raise FileSavingError(f"[red]{EMOJI_WARNING} Error saving data to {Path(file_path).name}:[/red]\n") from err
+    return True
+
+
+# BASE JOURNAL STORAGE CLASS
+class JournalStorage:
+    """BASE CLASS JournalStorage: Interface for storing journal entry dicts per username."""
+    HAS_TIMESTAMP_INDEX = False     # True if load_user_entries_between() is supported (otherwise JournalManager uses its own index)
+    MIGRATION_BATCH_USERS = 1       # Users rewritten per rewrite_users_entries() call when migrating (None = every user at once)
+
+    def load_user_entries(self, username):
+        """Returns list of journal entry dicts stored for username (oldest first)."""
+        raise NotImplementedError
+
+    def append_entry(self, username, entry_dict):
+        """Stores a new journal entry dict for username. Returns True if successful, otherwise raises error."""
+        return self.append_entries(username, [entry_dict])
+
+    def append_entries(self, username, entry_dicts):
+        """Stores many new journal entry dicts for username in one write. Returns True if successful, otherwise raises error."""
+        raise NotImplementedError
+
+    def usernames(self):
+        """Returns list of usernames that have stored journal entries."""
+        raise NotImplementedError
+
+    def count_user_entries(self, username):
+        """Returns number of entries stored for username."""
+        return len(self.load_user_entries(username))
+
+    def load_user_entries_at(self, username, positions):
+        """Returns username's entry dicts at the given positions (oldest entry = 0)."""
+        user_entries = self.load_user_entries(username)
+        return [user_entries[position] for position in positions]
+
+    def stream_user_entries(self, username):
+        """Returns an iterator over username's entry dicts (oldest first) for one pass over every entry, e.g. exports.
+           Backends that can read entries a few at a time don't keep them in memory.
+        """
+        return iter(self.load_user_entries(username))
+
+    def stream_users_entries(self, usernames):
+        """Returns an iterator over (username, entry dict) for each of usernames in turn (each user's entries oldest first),
+           e.g. exporting every user's entries. Streams each user with stream_user_entries() unless the backend can do better.
+        """
+        return ((username, entry_dict) for username in usernames for entry_dict in self.stream_user_entries(username))
+
+    def iter_user_entries(self, username, newest_first=True, offset=0, limit=None):
+        """Returns an iterator over username's entry dicts, skipping offset entries and stopping after limit entries."""
+        user_entries = self.load_user_entries(username)
+        ordered_entries = reversed(user_entries) if newest_first else iter(user_entries)
+        stop = None if limit is None else offset + limit
+        return itertools.islice(ordered_entries, offset, stop)
+
+    def rewrite_user_entries(self, username, rewrite_entry):
+        """Replaces each of username's stored entry dicts with rewrite_entry(entry dict), e.g. to upgrade old records
+           (see schema_migrations.py). rewrite_entry returns the same dict if unchanged, and nothing is saved if no entry changed.
+           Returns number of entries changed.
+        """
+        raise NotImplementedError
+
+    def rewrite_users_entries(self, usernames, rewrite_entry):
+        """rewrite_user_entries() for each of usernames. Backends that save every user in one file override this to save once.
+           Returns number of entries changed.
+        """
+        return sum(self.rewrite_user_entries(username, rewrite_entry) for username in usernames)
+
+    def refresh_user_entries(self, username):
+        """Forgets username's entries cached this session, so the next read includes entries saved by other processes.
+           Backends that don't cache entries have nothing to forget.
+        """
+
+    def flush(self):
+        """Writes any saved entries still waiting to be written. Returns number of entries written.
+           Backends that write on every save have nothing waiting (see WriteBehindJournalStorage).
+        """
+        return 0
+
+    def close(self):
+        """Writes any waiting entries and stops background work (on logout). Returns number of entries written."""
+        return self.flush()
+
+
+# WHOLE FILE JSON STORAGE
+class JsonJournalStorage(BaseDataManager, JournalStorage):
+    """Stores every user's entries in one JSON file, the whole file is rewritten on every save.
+       Users' entries are loaded one user at a time (load_json_key), so reading one user's entries doesn't parse everyone's.
+       Saving merges in the whole file, after which every user's entries are in memory.
+    """
+    MIGRATION_BATCH_USERS = None    # Every user migrated in one rewrite of the file
+    def __init__(self, json_file_path=JOURNAL_ENTRIES_JSON_FILE):
+        super().__init__(json_file_path)
+        self.journal_data = {}          # Loaded users' entries (username: list of entry dicts)
+        self.all_users_loaded = False   # True once journal_data holds every user in the file
+
+    def load_user_entries(self, username):
+        if username not in self.journal_data and not self.all_users_loaded:
+            self.journal_data[username] = self.load_json_key(username, [])
+        return self.journal_data.get(username, [])
+
+    def usernames(self):
+        if self.all_users_loaded:
+            return [username for username, user_entries in self.journal_data.items() if user_entries]
+        usernames = {username for username, is_empty in self.load_json_keys() if not is_empty}
+        usernames.update(username for username, user_entries in self.journal_data.items() if user_entries)
+        return list(usernames)
+
+    def stream_user_entries(self, username):
+        """Reads the user's entries from the file without keeping them in journal_data."""
+        return (entry_dict for _, entry_dict in self.stream_users_entries([username]))
+
+    def stream_users_entries(self, usernames):
+        """Scans the file once for where each user's entries are, then parses one user's entries at a time as they are
+           streamed, without keeping them in journal_data (so exporting every user never holds the whole journal in memory).
+        """
+        try:
+            for username, user_entries in iter_json_values(self.json_file_path, usernames):
+                for entry_dict in user_entries:
+                    yield username, entry_dict
+        except FileNotFoundError:
+            return
+        except ValueError as err:       # Includes json.JSONDecodeError, and truncated/unclosed JSON found while scanning
+            raise DataFileCorruptedError(f"[red]{EMOJI_WARNING} Error loading data: Data file is corrupted or invalid.[/red]\n") from err
+
+    def append_entries(self, username, entry_dicts):
+        if username not in self.journal_data:
+            self.load_user_entries(username)
+        self.journal_data.setdefault(username, []).extend(entry_dicts)
+        saved = self.save_json_file(self.journal_data)  # Merges every other user's entries from the file
+        self.all_users_loaded = True
+        return saved
+
+    def rewrite_user_entries(self, username, rewrite_entry):
+        return self.rewrite_users_entries([username], rewrite_entry)
+
+    def rewrite_users_entries(self, usernames, rewrite_entry):
+        """Rewrites the users' entries in memory, then saves the whole file once if any entry changed
+           (entries saved by other processes are merged in, as when appending).
+        """
+        if len(usernames) > 1 and not self.all_users_loaded:
+            self.journal_data = self.load_json_file() or {}     # One parse of the file, not one scan per user
+            self.all_users_loaded = True
+        changed_count = 0
+        for username in usernames:
+            user_entries = self.load_user_entries(username)
+            rewritten_entries = [rewrite_entry(entry_dict) for entry_dict in user_entries]
+            user_changed_count = sum(rewritten is not entry_dict for rewritten, entry_dict in zip(rewritten_entries, user_entries))
+            if user_changed_count:
+                self.journal_data[username] = rewritten_entries
+                changed_count += user_changed_count
+        if changed_count:
+            self.save_json_file(self.journal_data)
+            self.all_users_loaded = True
+        return changed_count
+
+    def refresh_user_entries(self, username):
+        self.journal_data.pop(username, None)
+        self.all_users_loaded = False
+
+    def merge_json_data(self, stored_data, updated_data):
+        """Adds entries saved by other processes since this file was loaded (matched by timestamp), so none are lost."""
+        for username, stored_entries in stored_data.items():
+            user_entries = updated_data.setdefault(username, [])
+            known_timestamps = {entry.get("timestamp") for entry in user_entries}
+            missing_entries = [entry for entry in stored_entries if entry.get("timestamp") not in known_timestamps]
+            if missing_entries:
+                user_entries.extend(missing_entries)
+                user_entries.sort(key=lambda entry: entry.get("timestamp", ""))
+
+
+# APPEND-ONLY LOG STORAGE
+class AppendLogJournalStorage(JsonJournalStorage):
+    """Keeps the JSON file as a snapshot and appends each new entry as one line to a log file (JSON Lines).
+       Saving only writes the new entry, the log is compacted into the snapshot once it reaches compact_threshold records.
+    """
+    def __init__(self, json_file_path=JOURNAL_ENTRIES_JSON_FILE, log_file_path=None, compact_threshold=JOURNAL_LOG_COMPACT_THRESHOLD):
+        super().__init__(json_file_path)
+        self.journal_data = self.load_json_file() or {}     # Whole snapshot loaded, as log records are replayed on top of it
+        self.all_users_loaded = True
+        self.log_file_path = Path(log_file_path) if log_file_path else Path(json_file_path).with_suffix('.jsonl')
+        self.compact_threshold = compact_threshold
+        with locked_file(self.log_file_path):
+            self.log_record_count = self.replay_log()
+        if self.log_record_count >= self.compact_threshold:
+            self.compact()
+
+    def replay_log(self):
+        """Applies logged entries on top of the snapshot. Returns number of log records. Caller must hold the log lock."""
+        snapshot_timestamps = {}
+        log_records = read_json_lines(self.log_file_path)
+        try:
+            for record in log_records:
+                self.apply_log_record(record["username"], record["entry"], snapshot_timestamps)
+        except KeyError as err:
+            raise FileLoadingError(f"[red]{EMOJI_WARNING} Error loading data: Journal log file is corrupted or invalid.[/red]\n") from err
+        return len(log_records)
+
+    def apply_log_record(self, username, entry_dict, snapshot_timestamps):
+        """Adds a logged entry to memory, skipping it if already in the snapshot (crash between compact and log truncate)."""
+        user_entries = self.journal_data.setdefault(username, [])
+        if username not in snapshot_timestamps:
+            snapshot_timestamps[username] = {entry.get("timestamp") for entry in user_entries}
+        if entry_dict.get("timestamp") in snapshot_timestamps[username]:
+            return
+        user_entries.append(entry_dict)
+
+    def stream_user_entries(self, username):
+        """Every user's entries are already in memory (snapshot + log), and logged entries aren't in the file."""
+        return iter(self.journal_data.get(username, []))
+
+    def stream_users_entries(self, usernames):
+        return JournalStorage.stream_users_entries(self, usernames)
+
+    def append_entries(self, username, entry_dicts):
+        append_json_lines(self.log_file_path, [{"username": username, "entry": entry_dict} for entry_dict in entry_dicts])
+        self.journal_data.setdefault(username, []).extend(entry_dicts)
+        self.log_record_count += len(entry_dicts)
+        if self.log_record_count >= self.compact_threshold:
+            self.compact()
+        return True
+
+    def refresh_user_entries(self, username):
+        """Reloads the snapshot and replays the log (other processes may have compacted the log into the snapshot)."""
+        self.journal_data = self.load_json_file() or {}
+        with locked_file(self.log_file_path):
+            self.log_record_count = self.replay_log()
+
+    def compact(self):
+        """Folds the log into the JSON snapshot file, then truncates the log.
+           Log is locked and replayed again first, so entries appended by other processes are kept in the snapshot.
+        """
+        with locked_file(self.log_file_path):
+            self.replay_log()
+            self.save_json_file(self.journal_data)
+            try:
+                with open(self.log_file_path, 'w'):
+                    pass
+            except Exception as err:
+                raise FileSavingError(f"[red]{EMOJI_WARNING} Error truncating journal log after compaction:[/red]\n") from err
+        self.log_record_count = 0
+        return True
+
+
+# PER-USER SHARDED STORAGE
+class ShardedJournalStorage(JournalStorage):
+    """Stores each user's entries in their own JSON Lines shard file, bucketed by a hash of the username
+       (e.g. journal_entries_shards/3f/username.jsonl). Shards are only read when that user's entries are requested,
+       so logging in only parses the current user's data.
+    """
+    def __init__(self, json_file_path=JOURNAL_ENTRIES_JSON_FILE, shard_dir=None):
+        self.json_file_path = Path(json_file_path)
+        self.shard_dir = Path(shard_dir) if shard_dir else self.json_file_path.with_name(f"{self.json_file_path.stem}_shards")
+        self.loaded_entries = {}    # Cache of shards read this session (username: list of entry dicts)
+        if not self.shard_dir.exists():
+            self.migrate_legacy_store()
+
+    def shard_path(self, username, shard_dir=None):
+        """Returns shard file path for username. Username is quoted so it is always a safe file name."""
+        bucket = hashlib.sha1(username.encode('utf-8')).hexdigest()[:2]
+        return (shard_dir or self.shard_dir) / bucket / f"{quote(username, safe='')}.jsonl"
+
+    def load_user_entries(self, username):
+        if username not in self.loaded_entries:
+            shard_path = self.shard_path(username)
+            with locked_file(shard_path):
+                self.loaded_entries[username] = read_json_lines(shard_path)
+        return self.loaded_entries[username]
+
+    def stream_user_entries(self, username):
+        """Reads the user's shard one line at a time (without caching it) unless it is already loaded.
+           No lock is held so saving isn't blocked during a long export: a record still being appended is skipped.
+        """
+        if username in self.loaded_entries:
+            yield from self.loaded_entries[username]
+            return
+        try:
+            with open(self.shard_path(username), 'rb') as shard_file:
+                for line in shard_file:
+                    if not line.endswith(b"\n"):
+                        break
+                    if line.strip():
+                        yield json.loads(line)
+        except FileNotFoundError:
+            return
+        except json.JSONDecodeError as err:
+            raise FileLoadingError(f"[red]{EMOJI_WARNING} Error loading data: journal shard for {username} is corrupted or invalid.[/red]\n") from err
+
+    def usernames(self):
+        return [unquote(shard_file.stem) for shard_file in self.shard_dir.glob("*/*.jsonl")]
+
+    def append_entries(self, username, entry_dicts):
+        user_entries = self.load_user_entries(username)
+        append_json_lines(self.shard_path(username), entry_dicts)
+        user_entries.extend(entry_dicts)
+        return True
+
+    def rewrite_user_entries(self, username, rewrite_entry):
+        """Rewrites the user's shard (temp file + rename) while holding its lock, so no save is lost meanwhile."""
+        shard_path = self.shard_path(username)
+        with locked_file(shard_path):
+            user_entries = read_json_lines(shard_path)
+            rewritten_entries = [rewrite_entry(entry_dict) for entry_dict in user_entries]
+            changed_count = sum(rewritten is not entry_dict for rewritten, entry_dict in zip(rewritten_entries, user_entries))
+            if changed_count:
+                write_file_atomically(shard_path, lambda shard_file: shard_file.writelines(
+                    json.dumps(entry_dict) + "\n" for entry_dict in rewritten_entries))
+                if username in self.loaded_entries:
+                    self.loaded_entries[username] = rewritten_entries
+        return changed_count
+
+    def refresh_user_entries(self, username):
+        self.loaded_entries.pop(username, None)
+
+    def migrate_legacy_store(self):
+        """One-off split of the single file store (JSON snapshot + append log) into per-user shards.
+           Shards are written to a temporary folder first and renamed into place once complete.
+        """
+        migrating_dir = self.shard_dir.with_name(f"{self.shard_dir.name}.migrating")
+        try:
+            if migrating_dir.exists():
+                shutil.rmtree(migrating_dir)    # Left over from an interrupted migration
+            migrating_dir.mkdir(parents=True)
+            if self.json_file_path.exists():
+                legacy_store = AppendLogJournalStorage(self.json_file_path, compact_threshold=float('inf'))
+                for username, user_entries in legacy_store.journal_data.items():
+                    if user_entries:
+                        append_json_lines(self.shard_path(username, migrating_dir), user_entries)
+            migrating_dir.rename(self.shard_dir)
+        except (FileLoadingError, DataFileCorruptedError):
+            raise
+        except Exception as err:
+            raise FileSavingError(f"[red]{EMOJI_WARNING} Error migrating journal entries into per-user shards:[/red]\n") from err
+
+
+# WRITE-BEHIND WRAPPER (for any storage backend)
+class WriteBehindJournalStorage(JournalStorage):
+    """Wraps another storage backend so a save only appends the new entries to a small write-ahead log (WAL) file,
+       flushed to disk, and returns. A background thread moves logged entries into the wrapped storage (one write per user)
+       every flush_interval seconds, or sooner once max_pending entries are waiting, so many quick saves cost one write.
+       Reads include entries still waiting in the WAL. A WAL left behind by a crash is moved into the storage on startup.
+       The WAL is shared by every process using the same journal file: another process's startup or flush may move this
+       process's entries into the storage, so those are dropped from pending_entries before reading (see drop_moved_entries).
+    """
+
+    def __init__(self, storage, wal_file_path, flush_interval=JOURNAL_WRITE_BEHIND_INTERVAL, max_pending=JOURNAL_WRITE_BEHIND_MAX_PENDING):
+        self.storage = storage
+        self.HAS_TIMESTAMP_INDEX = storage.HAS_TIMESTAMP_INDEX
+        self.MIGRATION_BATCH_USERS = storage.MIGRATION_BATCH_USERS
+        self.wal_file_path = Path(wal_file_path)
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.pending_entries = {}           # Entries saved by this process still in the WAL (username: list of entry dicts)
+        self.wal_file_stamp = None          # WAL file stamp when pending_entries was last checked against it
+        self.lock = threading.RLock()       # Held while using the wrapped storage, so the flusher never moves entries mid-read
+        self.flush_requested = threading.Event()
+        self.closed = False
+        self.recover()
+        self.flusher = threading.Thread(target=self.run_flusher, name="journal-write-behind", daemon=True)
+        self.flusher.start()
+        atexit.register(self.close)
+
+    def recover(self):
+        """Moves entries left in the WAL (e.g. app closed or crashed before a flush) into the wrapped storage.
+           Entries already at the end of a user's stored entries are skipped, in case of a crash after moving but before emptying the WAL.
+        """
+        with self.lock, locked_file(self.wal_file_path):
+            moved_count = self.move_wal_entries(skip_stored=True)
+            self.wal_file_stamp = get_file_stamp(self.wal_file_path)
+        return moved_count
+
+    @timed("storage.write_behind_flush")
+    def flush(self):
+        """Moves every entry in the WAL into the wrapped storage now, then empties the WAL. Returns number of entries moved."""
+        with self.lock, locked_file(self.wal_file_path):
+            moved_count = self.move_wal_entries()
+            self.pending_entries.clear()
+            self.wal_file_stamp = get_file_stamp(self.wal_file_path)
+        return moved_count
+
+    def move_wal_entries(self, skip_stored=False):
+        """Appends WAL entries to the wrapped storage (one append per user) and empties the WAL. Caller must hold the WAL lock."""
+        wal_entries = {}
+        try:
+            for record in read_json_lines(self.wal_file_path):
+                wal_entries.setdefault(record["username"], []).append(record["entry"])
+        except KeyError as err:
+            raise FileLoadingError(f"[red]{EMOJI_WARNING} Error loading data: Journal write-ahead log is corrupted or invalid.[/red]\n") from err
+        moved_count = 0
+        for username, entry_dicts in wal_entries.items():
+            if skip_stored:
+                entry_dicts = self.remove_stored_entries(username, entry_dicts)
+            if entry_dicts:
+                self.storage.append_entries(username, entry_dicts)
+                moved_count += len(entry_dicts)
+        if wal_entries:
+            try:
+                with open(self.wal_file_path, 'w'):
+                    pass
+            except Exception as err:
+                raise FileSavingError(f"[red]{EMOJI_WARNING} Error emptying journal write-ahead log after flush:[/red]\n") from err
+        count("journal.write_behind_entries_flushed", moved_count)
+        return moved_count
+
+    def remove_stored_entries(self, username, entry_dicts):
+        """Returns entry_dicts without those already at the end of username's stored entries."""
+        stored_count = self.storage.count_user_entries(username)
+        stored_tail = self.storage.load_user_entries_at(username, range(max(0, stored_count - len(entry_dicts)), stored_count))
+        for overlap in range(len(stored_tail), 0, -1):
+            if stored_tail[-overlap:] == entry_dicts[:overlap]:
+                return entry_dicts[overlap:]
+        return entry_dicts
+
+    def drop_moved_entries(self):
+        """Drops pending entries no longer in the WAL, as another process has moved them into the wrapped storage
+           (which then holds them, so reads would otherwise return them twice). Skipped if the WAL is unchanged since
+           last checked. Caller must hold self.lock and the WAL lock.
+        """
+        wal_file_stamp = get_file_stamp(self.wal_file_path)
+        if wal_file_stamp == self.wal_file_stamp:
+            return
+        self.wal_file_stamp = wal_file_stamp
+        if not self.pending_entries:
+            return
+        wal_records = Counter(json.dumps(record, sort_keys=True) for record in read_json_lines(self.wal_file_path))
+        for username, entry_dicts in list(self.pending_entries.items()):
+            still_pending = []
+            for entry_dict in entry_dicts:
+                wal_record = json.dumps({"username": username, "entry": entry_dict}, sort_keys=True)
+                if wal_records[wal_record]:
+                    wal_records[wal_record] -= 1
+                    still_pending.append(entry_dict)
+            if len(still_pending) < len(entry_dicts):
+                self.storage.refresh_user_entries(username)     # Cached entries may not include the moved entries yet
+                if still_pending:
+                    self.pending_entries[username] = still_pending
+                else:
+                    del self.pending_entries[username]
+
+    def check_pending_entries(self):
+        """Drops pending entries other processes have moved into the wrapped storage (see drop_moved_entries)."""
+        with self.lock:
+            if self.pending_entries:
+                with locked_file(self.wal_file_path):
+                    self.drop_moved_entries()
+
+    @contextmanager
+    def pending_entries_checked(self):
+        """Holds self.lock, and while this process has pending entries also the WAL lock (after dropping moved entries),
+           so other processes can't move them part way through a read.
+        """
+        with self.lock:
+            if not self.pending_entries:
+                yield
+                return
+            with locked_file(self.wal_file_path):
+                self.drop_moved_entries()
+                yield
+
+    def run_flusher(self):
+        """Background thread: flushes every flush_interval seconds, or as soon as max_pending entries are waiting."""
+        while not self.closed:
+            self.flush_requested.wait(self.flush_interval)
+            self.flush_requested.clear()
+            if self.pending_entries and not self.closed:
+                try:
+                    self.flush()
+                except Exception:
+                    pass    # Entries stay in the WAL and are tried again next time (flush on logout reports errors)
+
+    def close(self):
+        """Stops the background flusher and flushes any waiting entries (on logout and when the app exits)."""
+        if not self.closed:
+            self.closed = True
+            self.flush_requested.set()
+            if self.flusher is not threading.current_thread():
+                self.flusher.join()
+            atexit.unregister(self.close)
+        return self.flush()
+
+    def append_entries(self, username, entry_dicts):
+        with self.lock, locked_file(self.wal_file_path):
+            self.drop_moved_entries()
+            append_json_lines(self.wal_file_path, [{"username": username, "entry": entry_dict} for entry_dict in entry_dicts], lock=False)
+            self.pending_entries.setdefault(username, []).extend(entry_dicts)
+            self.wal_file_stamp = get_file_stamp(self.wal_file_path)
+            pending_count = sum(len(user_entries) for user_entries in self.pending_entries.values())
+        if pending_count >= self.max_pending:
+            self.flush_requested.set()
+        return True
+
+    def rewrite_user_entries(self, username, rewrite_entry):
+        """Flushes the WAL first, so every entry is in the wrapped storage when it is rewritten."""
+        with self.lock:
+            self.flush()
+            return self.storage.rewrite_user_entries(username, rewrite_entry)
+
+    def rewrite_users_entries(self, usernames, rewrite_entry):
+        with self.lock:
+            self.flush()
+            return self.storage.rewrite_users_entries(usernames, rewrite_entry)
+
+    def load_user_entries(self, username):
+        with self.pending_entries_checked():
+            return self.storage.load_user_entries(username) + self.pending_entries.get(username, [])
+
+    def usernames(self):
+        with self.pending_entries_checked():
+            return list(dict.fromkeys([*self.storage.usernames(), *self.pending_entries]))
+
+    def count_user_entries(self, username):
+        with self.pending_entries_checked():
+            return self.storage.count_user_entries(username) + len(self.pending_entries.get(username, []))
+
+    def load_user_entries_at(self, username, positions):
+        with self.pending_entries_checked():
+            pending_entries = self.pending_entries.get(username, [])
+            if not pending_entries:
+                return self.storage.load_user_entries_at(username, positions)
+            stored_count = self.storage.count_user_entries(username)
+            stored_entries = iter(self.storage.load_user_entries_at(username, [position for position in positions if position < stored_count]))
+            return [next(stored_entries) if position < stored_count else pending_entries[position - stored_count] for position in positions]
+
+    def load_user_entries_between(self, username, start_timestamp, end_timestamp):
+        """Wrapped storage's indexed date range query (only if it has one) plus matching entries still in the WAL."""
+        with self.pending_entries_checked():
+            pending_matches = [entry_dict for entry_dict in self.pending_entries.get(username, [])
+                               if start_timestamp <= entry_dict.get("timestamp", "") <= end_timestamp]
+            stored_matches = self.storage.load_user_entries_between(username, start_timestamp, end_timestamp)
+        return sorted(stored_matches + pending_matches, key=lambda entry_dict: entry_dict.get("timestamp", ""))
+
+    def stream_user_entries(self, username):
+        """Streams the wrapped storage's entries then the WAL's. The lock is only held while the WAL's entries are copied
+           (and, if there are any, the stored entries counted), not while the stream is read, so a slow or abandoned export
+           never blocks the flusher or saves. Entries the flusher moves part way through come after the counted stored
+           entries, so they are streamed once from the copy rather than twice.
+        """
+        with self.lock:
+            self.check_pending_entries()
+            pending_entries = list(self.pending_entries.get(username, []))
+            stored_entries = self.storage.stream_user_entries(username)
+            if pending_entries:
+                stored_entries = itertools.islice(stored_entries, self.storage.count_user_entries(username))
+        return itertools.chain(stored_entries, pending_entries)
+
+    def iter_user_entries(self, username, newest_first=True, offset=0, limit=None):
+        """Reads the requested entries under the lock and returns an iterator over them, so the lock isn't held while it is used."""
+        with self.lock:
+            self.check_pending_entries()
+            if not self.pending_entries.get(username):
+                return iter(list(self.storage.iter_user_entries(username, newest_first, offset, limit)))
+            return iter(list(super().iter_user_entries(username, newest_first, offset, limit)))
+
+
+# STORAGE BACKEND FACTORY
+JOURNAL_STORAGE_BACKENDS = {
+    "json": JsonJournalStorage,
+    "log": AppendLogJournalStorage,
+    "sharded": ShardedJournalStorage,
+}
+
+def create_journal_storage(json_file_path=JOURNAL_ENTRIES_JSON_FILE, backend=JOURNAL_STORAGE_BACKEND, write_behind=JOURNAL_WRITE_BEHIND):
+    """Creates the journal storage backend chosen in file_paths.py config (wrapped for write-behind saves if enabled).
+       The SQLite database is kept in the same folder as json_file_path, like every other backend's files.
+    """
+    if backend == "sqlite":
+        from core.sqlite_storage import SQLiteJournalStorage     # Imported here as sqlite_storage builds on this module
+        database_path = Path(json_file_path).with_name(SQLITE_DATABASE_FILE.name)
+        storage = SQLiteJournalStorage(database_path, legacy_json_file_path=json_file_path)
+    else:
+        try:
+            storage_class = JOURNAL_STORAGE_BACKENDS[backend]
+        except KeyError:
+            raise JournalStorageError(f"[red]{EMOJI_WARNING} Unknown journal storage backend: {backend}[/red]\n")
+        storage = storage_class(json_file_path)
+    if write_behind:
+        json_file_path = Path(json_file_path)
+        return WriteBehindJournalStorage(storage, json_file_path.with_name(f"{json_file_path.stem}.wal.jsonl"))
+    return storage
@@ -0,0 +1,153 @@
+# json_scan.py
+# MEMORY-MAPPED SCANNING OF A JSON FILE'S TOP LEVEL OBJECT
+# Finds where each top level value starts/ends without parsing it, so one key (e.g. one user's entries)
+# can be loaded from a large JSON file without reading the whole file into memory or parsing everyone's data.
+
+# IMPORT BUILT IN LIBRARIES:
+import json
+import mmap
+import re
+from contextlib import contextmanager
+
+
+# BYTE PATTERNS (JSON strings can't contain raw newlines or unescaped quotes, so these never match inside a string)
+STRING_PATTERN = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+# Next bracket or string start (strings are then skipped whole with STRING_PATTERN, so brackets inside them don't count)
+BRACKET_OR_QUOTE_PATTERN = re.compile(rb'["\[\]{}]')
+SCALAR_PATTERN = re.compile(rb'[^,}\]\s]+')                                           # Number, true, false or null
+WHITESPACE_PATTERN = re.compile(rb'[ \t\n\r]*')
+
+# Files saved by write_json_atomically use indent=4, so top level keys are the only lines starting with exactly 4 spaces + quote
+INDENTED_KEY_PREFIX = b'\n    '
+
+
+@contextmanager
+def mapped_json_file(file_path):
+    """Memory-maps file_path read only (pages are read from disk as they are scanned). Gives None if file is empty."""
+    with open(file_path, 'rb') as file:
+        if file.seek(0, 2) == 0:
+            yield None
+            return
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            yield buffer
+
+
+def skip_whitespace(buffer, position):
+    return WHITESPACE_PATTERN.match(buffer, position).end()
+
+
+def find_value_end(buffer, position):
+    """Returns position just after the JSON value starting at position, by matching brackets (strings are skipped whole)."""
+    first_byte = buffer[position:position + 1]
+    if first_byte == b'"':
+        return STRING_PATTERN.match(buffer, position).end()
+    if first_byte not in (b'[', b'{'):
+        scalar_match = SCALAR_PATTERN.match(buffer, position)
+        if not scalar_match:
+            raise ValueError(f"Expected JSON value at byte {position}")
+        return scalar_match.end()
+    depth = 0
+    while bracket_match := BRACKET_OR_QUOTE_PATTERN.search(buffer, position):
+        next_byte = buffer[bracket_match.start()]
+        if next_byte == ord('"'):
+            string_match = STRING_PATTERN.match(buffer, bracket_match.start())
+            if not string_match:
+                break       # String never closed (truncated file)
+            position = string_match.end()
+            continue
+        position = bracket_match.end()
+        if next_byte in b'[{':
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return position
+    raise ValueError("Unexpected end of JSON data")
+
+
+def iter_top_level_spans(buffer):
+    """Yields (key, value start, value end) for each key of the top level JSON object in buffer, without parsing values."""
+    position = skip_whitespace(buffer, 0)
+    if buffer[position:position + 1] != b'{':
+        raise ValueError("JSON data is not an object")
+    position = skip_whitespace(buffer, position + 1)
+    if buffer[position:position + 1] == b'}':
+        return
+    while True:
+        key_match = STRING_PATTERN.match(buffer, position)
+        if not key_match:
+            raise ValueError(f"Expected key at byte {position}")
+        position = skip_whitespace(buffer, key_match.end())
+        if buffer[position:position + 1] != b':':
+            raise ValueError(f"Expected ':' at byte {position}")
+        value_start = skip_whitespace(buffer, position + 1)
+        value_end = find_value_end(buffer, value_start)
+        yield json.loads(key_match.group()), value_start, value_end
+        position = skip_whitespace(buffer, value_end)
+        separator = buffer[position:position + 1]
+        if separator == b'}':
+            return
+        if separator != b',':
+            raise ValueError(f"Expected ',' or '}}' at byte {position}")
+        position = skip_whitespace(buffer, position + 1)
+
+
+def find_indented_value(buffer, key):
+    """Fast path for files saved with indent=4: finds the key line with a byte search (no scanning of other values)
+       and returns the parsed value, or raises LookupError if the key line isn't found.
+    """
+    if not buffer[:len(INDENTED_KEY_PREFIX) + 2] == b'{' + INDENTED_KEY_PREFIX + b'"':
+        raise LookupError(key)      # First key isn't indented by 4 spaces, so file wasn't saved with indent=4
+    key_line = INDENTED_KEY_PREFIX + json.dumps(key).encode() + b': '
+    key_position = buffer.find(key_line)
+    if key_position == -1:
+        raise LookupError(key)
+    value_start = key_position + len(key_line)
+    next_key_position = buffer.find(INDENTED_KEY_PREFIX + b'"', value_start)
+    value_end = next_key_position if next_key_position != -1 else buffer.rfind(b'}')
+    value_bytes = buffer[value_start:value_end].rstrip()
+    return json.loads(value_bytes[:-1] if value_bytes.endswith(b',') else value_bytes)
+
+
+def load_json_value(file_path, key, default=None):
+    """Returns the parsed value of one top level key in a JSON object file (default if key or file content missing).
+       Other keys' values are skipped without being parsed.
+    """
+    with mapped_json_file(file_path) as buffer:
+        if buffer is None:
+            return default
+        try:
+            return find_indented_value(buffer, key)
+        except (LookupError, ValueError):
+            pass        # Not saved with indent=4 (or key missing), so scan the top level object instead
+        for span_key, value_start, value_end in iter_top_level_spans(buffer):
+            if span_key == key:
+                return json.loads(buffer[value_start:value_end])
+        return default
+
+
+def load_json_keys(file_path):
+    """Returns list of (key, value is empty) for the top level JSON object in file_path, without parsing values."""
+    with mapped_json_file(file_path) as buffer:
+        if buffer is None:
+            return []
+        return [
+            (key, value_end - value_start <= 4 and buffer[value_start:value_end] in (b'[]', b'{}', b'""', b'null'))
+            for key, value_start, value_end in iter_top_level_spans(buffer)
+        ]
+
+
+def iter_json_values(file_path, keys):
+    """Yields (key, parsed value) for each of keys found in a JSON object file, in the order of keys.
+       The file is scanned once for where every value is, then values are parsed one at a time as they are yielded,
+       so only one value is in memory at a time (e.g. exporting every user's entries).
+    """
+    with mapped_json_file(file_path) as buffer:
+        if buffer is None:
+            return
+        wanted_keys = set(keys)
+        value_spans = {key: (value_start, value_end) for key, value_start, value_end in iter_top_level_spans(buffer) if key in wanted_keys}
+        for key in keys:
+            if key in value_spans:
+                value_start, value_end = value_spans[key]
+                yield key, json.loads(buffer[value_start:value_end])
@@ -0,0 +1,142 @@
+# login_limiter.py
+# LOGIN RATE LIMITING - per-username and per-source token buckets with exponential lockouts after repeated failures
+# Checked before a password is verified, so scripted guessing is turned away without spending any bcrypt time on it.
+# State is kept in memory and saved to a small JSON file next to the accounts file, so limits survive restarts and
+# are shared by every app process (the file is reloaded when another process changes it).
+
+# IMPORT BUILT IN LIBRARIES:
+import json
+import math
+import time
+from pathlib import Path
+
+# IMPORT CUSTOM MODULES:
+from core.safe_file_io import locked_file, get_file_stamp, write_json_atomically
+from ui.emojis import EMOJI_WARNING
+
+# IMPORT CUSTOM EXCEPTION CLASSES:
+from core.exception_classes import LoginRateLimitedError
+
+
+# LOGIN ATTEMPT LIMITS (applied separately to each username and each source, e.g. this computer or a server client)
+LOGIN_ATTEMPT_BURST = 5             # Failed attempts allowed straight away (token bucket size)
+LOGIN_ATTEMPT_REFILL_SECONDS = 30   # One more attempt allowed every 30 seconds after that
+LOCKOUT_AFTER_FAILURES = 5          # Consecutive failed logins before lockouts start
+LOCKOUT_BASE_SECONDS = 30           # First lockout, doubled for each further failed login
+LOCKOUT_MAX_SECONDS = 60 * 60
+FAILURES_FORGOTTEN_SECONDS = 60 * 60    # Failed logins in a row start counting again after an hour without one
+LOCAL_SOURCE = "local"              # Source used for logins typed into this computer (main.py, cli.py), only limited per username
+
+
+def format_wait_time(seconds):
+    """Returns seconds as user friendly text, e.g. "45 seconds" or "3 minutes"."""
+    if seconds < 60:
+        return f"{math.ceil(seconds)} seconds"
+    return f"{math.ceil(seconds / 60)} minutes"
+
+
+def make_rate_limited_error(retry_after_seconds):
+    """Returns the LoginRateLimitedError raised for an attempt turned away for retry_after_seconds."""
+    return LoginRateLimitedError(
+        f"[red]{EMOJI_WARNING} Too many login attempts. Please try again in {format_wait_time(retry_after_seconds)}.[/red]\n",
+        retry_after_seconds,
+    )
+
+
+class LoginRateLimiter:
+    """Limits password attempts per username and per source.
+       start_attempt() takes a token from both buckets (or raises LoginRateLimitedError if either is empty or locked),
+       record_result() gives the token back after a successful login, or counts a failure and locks out the username
+       and source for exponentially longer after LOCKOUT_AFTER_FAILURES failures in a row.
+       Successful logins therefore never use up attempts, only failed ones do.
+    """
+    def __init__(self, attempts_file_path, clock=time.time):
+        self.attempts_file_path = Path(attempts_file_path)
+        self.clock = clock      # Wall clock, so saved lockout times still apply after a restart
+        self.buckets = {}       # "user:<username>" / "source:<source>": {"tokens", "updated", "failures", "last_failed", "locked_until"}
+        self.loaded_file_stamp = None
+
+    def start_attempt(self, username, source=LOCAL_SOURCE):
+        """Takes an attempt for username from source, raises LoginRateLimitedError (with retry_after_seconds) if not allowed."""
+        with locked_file(self.attempts_file_path):
+            self.refresh()
+            now = self.clock()
+            bucket_keys = self.get_bucket_keys(username, source)
+            buckets = [self.get_bucket(bucket_key, now) for bucket_key in bucket_keys]
+            retry_after_seconds = max(self.get_wait_seconds(bucket, now) for bucket in buckets)
+            if retry_after_seconds > 0:
+                raise make_rate_limited_error(retry_after_seconds)
+            for bucket_key, bucket in zip(bucket_keys, buckets):
+                bucket["tokens"] -= 1
+                self.buckets[bucket_key] = bucket
+            self.save()
+
+    def record_result(self, username, succeeded, source=LOCAL_SOURCE):
+        """Records the result of an attempt started with start_attempt()."""
+        with locked_file(self.attempts_file_path):
+            self.refresh()
+            now = self.clock()
+            for bucket_key in self.get_bucket_keys(username, source):
+                bucket = self.get_bucket(bucket_key, now)
+                if succeeded:
+                    bucket["tokens"] = min(bucket["tokens"] + 1, LOGIN_ATTEMPT_BURST)
+                    if bucket_key.startswith("user:"):      # A source keeps its failures, or one known account could reset them
+                        bucket["failures"] = 0
+                        bucket["locked_until"] = 0
+                else:
+                    bucket["failures"] += 1
+                    bucket["last_failed"] = now
+                    if bucket["failures"] >= LOCKOUT_AFTER_FAILURES:
+                        lockout_seconds = LOCKOUT_BASE_SECONDS * 2 ** (bucket["failures"] - LOCKOUT_AFTER_FAILURES)
+                        bucket["locked_until"] = now + min(lockout_seconds, LOCKOUT_MAX_SECONDS)
+                self.buckets[bucket_key] = bucket
+            self.remove_idle_buckets(now)
+            self.save()
+
+    @staticmethod
+    def get_bucket_keys(username, source):
+        """Returns the buckets an attempt uses. Logins typed on this computer (LOCAL_SOURCE) only use the username's bucket:
+           every local user shares that source, so one person's failed logins would otherwise lock out everyone on it.
+        """
+        if source == LOCAL_SOURCE:
+            return [f"user:{username}"]
+        return [f"user:{username}", f"source:{source}"]
+
+    def get_bucket(self, bucket_key, now):
+        """Returns a copy of bucket_key's bucket with tokens refilled up to now (a full bucket if it has no attempts yet)."""
+        bucket = dict(self.buckets.get(bucket_key) or
+                      {"tokens": LOGIN_ATTEMPT_BURST, "updated": now, "failures": 0, "last_failed": 0, "locked_until": 0})
+        elapsed_seconds = max(now - bucket["updated"], 0)
+        bucket["tokens"] = min(bucket["tokens"] + elapsed_seconds / LOGIN_ATTEMPT_REFILL_SECONDS, LOGIN_ATTEMPT_BURST)
+        bucket["updated"] = now
+        if now - bucket["last_failed"] > FAILURES_FORGOTTEN_SECONDS:
+            bucket["failures"] = 0
+        return bucket
+
+    @staticmethod
+    def get_wait_seconds(bucket, now):
+        """Returns seconds until bucket allows another attempt (0 if allowed now)."""
+        refill_wait_seconds = (1 - bucket["tokens"]) * LOGIN_ATTEMPT_REFILL_SECONDS if bucket["tokens"] < 1 else 0
+        return max(bucket["locked_until"] - now, refill_wait_seconds, 0)
+
+    def remove_idle_buckets(self, now):
+        """Drops buckets back to their starting state (full, no failures, not locked), so the file only holds recent attempts."""
+        for bucket_key in list(self.buckets):
+            bucket = self.get_bucket(bucket_key, now)
+            if bucket["tokens"] >= LOGIN_ATTEMPT_BURST and not bucket["failures"] and bucket["locked_until"] <= now:
+                del self.buckets[bucket_key]
+
+    def refresh(self):
+        """Reloads buckets if the attempts file was changed by another process (called while holding the file lock)."""
+        file_stamp = get_file_stamp(self.attempts_file_path)
+        if file_stamp != self.loaded_file_stamp:
+            try:
+                self.buckets = json.loads(self.attempts_file_path.read_text()) if file_stamp else {}
+            except (OSError, ValueError):
+                self.buckets = {}       # Damaged file: start again rather than block every login
+            self.loaded_file_stamp = file_stamp
+
+    def save(self):
+        """Saves buckets (not flushed to disk: after a power cut, limits may start again from an older file)."""
+        write_json_atomically(self.attempts_file_path, self.buckets, durable=False)
+        self.loaded_file_stamp = get_file_stamp(self.attempts_file_path)
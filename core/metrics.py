@@ -0,0 +1,179 @@
+# metrics.py
+# OPT-IN TIMERS AND COUNTERS FOR HOT PATHS (file loading/saving, password checks, journal saves, rendering)
+# Enable by setting environment variable MINDFUL_MOMENTS_METRICS=1 before starting the app (or cli.py).
+# When disabled, @timed returns the original function unchanged and timer()/count() return straight away,
+# so instrumented code runs at full speed.
+
+# IMPORT BUILT IN LIBRARIES:
+import atexit
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+# IMPORT CUSTOM CORE MODULES:
+from core.safe_file_io import locked_file, write_json_atomically, write_file_atomically
+
+# IMPORT CONSTANT FILE PATHS
+from core.file_paths import METRICS_FILE, METRICS_PROMETHEUS_FILE
+
+
+METRICS_ENV_VAR = "MINDFUL_MOMENTS_METRICS"
+METRICS_ENABLED = os.environ.get(METRICS_ENV_VAR, "").strip().lower() in ("1", "true", "yes", "on")
+PROMETHEUS_PREFIX = "mindful_moments_"
+
+_metrics_lock = threading.Lock()
+_timers = {}        # metric name: [count, total seconds, max seconds]
+_counters = {}      # metric name: count
+_no_timer = nullcontext()
+
+
+def record_time(metric_name, seconds):
+    """Adds one timing (seconds) to metric_name."""
+    with _metrics_lock:
+        timer_totals = _timers.setdefault(metric_name, [0, 0.0, 0.0])
+        timer_totals[0] += 1
+        timer_totals[1] += seconds
+        timer_totals[2] = max(timer_totals[2], seconds)
+
+
+def count(metric_name, amount=1):
+    """Adds amount to counter metric_name (if metrics are enabled)."""
+    if not METRICS_ENABLED:
+        return
+    with _metrics_lock:
+        _counters[metric_name] = _counters.get(metric_name, 0) + amount
+
+
+class Timer:
+    """Context manager timing its with block as metric_name."""
+    __slots__ = ("metric_name", "started")
+
+    def __init__(self, metric_name):
+        self.metric_name = metric_name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        record_time(self.metric_name, time.perf_counter() - self.started)
+
+
+def timer(metric_name):
+    """Returns a context manager timing its with block as metric_name, e.g. with timer("journal.render_page"): ..."""
+    return Timer(metric_name) if METRICS_ENABLED else _no_timer
+
+
+def timed(metric_name):
+    """Decorator timing each call of a function/method as metric_name. Returns the function unchanged if metrics are disabled."""
+    def decorator(function):
+        if not METRICS_ENABLED:
+            return function
+
+        @functools.wraps(function)
+        def timed_function(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record_time(metric_name, time.perf_counter() - started)
+        return timed_function
+    return decorator
+
+
+def get_metrics():
+    """Returns this process's metrics: {"timers": {name: {count, total_seconds, max_seconds}}, "counters": {name: count}}."""
+    with _metrics_lock:
+        return {
+            "timers": {
+                metric_name: {"count": timer_count, "total_seconds": total_seconds, "max_seconds": max_seconds}
+                for metric_name, (timer_count, total_seconds, max_seconds) in _timers.items()
+            },
+            "counters": dict(_counters),
+        }
+
+
+def reset_metrics():
+    with _metrics_lock:
+        _timers.clear()
+        _counters.clear()
+
+
+def merge_metrics(stored_metrics, new_metrics):
+    """Adds new_metrics to stored_metrics (e.g. totals from earlier runs saved in the metrics file)."""
+    for metric_name, new_timer in new_metrics.get("timers", {}).items():
+        stored_timer = stored_metrics.setdefault("timers", {}).setdefault(
+            metric_name, {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+        stored_timer["count"] += new_timer["count"]
+        stored_timer["total_seconds"] += new_timer["total_seconds"]
+        stored_timer["max_seconds"] = max(stored_timer["max_seconds"], new_timer["max_seconds"])
+    for metric_name, new_count in new_metrics.get("counters", {}).items():
+        stored_counters = stored_metrics.setdefault("counters", {})
+        stored_counters[metric_name] = stored_counters.get(metric_name, 0) + new_count
+    return stored_metrics
+
+
+def format_prometheus(metrics):
+    """Returns metrics in Prometheus text exposition format (timers as summaries plus a max gauge, counters as counters)."""
+    lines = []
+    for metric_name, timer_totals in sorted(metrics.get("timers", {}).items()):
+        prometheus_name = get_prometheus_name(metric_name) + "_seconds"
+        lines += [
+            f"# TYPE {prometheus_name} summary",
+            f"{prometheus_name}_count {timer_totals['count']}",
+            f"{prometheus_name}_sum {timer_totals['total_seconds']:.6f}",
+            f"# TYPE {prometheus_name}_max gauge",
+            f"{prometheus_name}_max {timer_totals['max_seconds']:.6f}",
+        ]
+    for metric_name, counter_total in sorted(metrics.get("counters", {}).items()):
+        prometheus_name = get_prometheus_name(metric_name) + "_total"
+        lines += [f"# TYPE {prometheus_name} counter", f"{prometheus_name} {counter_total}"]
+    return "\n".join(lines) + "\n"
+
+
+def get_prometheus_name(metric_name):
+    """Converts metric name to a Prometheus metric name, e.g. "journal.save_entries" -> "mindful_moments_journal_save_entries"."""
+    return PROMETHEUS_PREFIX + "".join(character if character.isalnum() else "_" for character in metric_name)
+
+
+def load_metrics_file(metrics_file=METRICS_FILE):
+    """Returns metrics saved in metrics_file (empty metrics if file doesn't exist yet)."""
+    try:
+        with open(metrics_file, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {"timers": {}, "counters": {}}
+
+
+def write_metrics(metrics_file=METRICS_FILE, prometheus_file=METRICS_PROMETHEUS_FILE):
+    """Adds this process's metrics to metrics_file (locked, so several processes can add to it) and rewrites
+       prometheus_file from the totals. This process's metrics are then reset. Returns the saved totals.
+    """
+    new_metrics = get_metrics()
+    with locked_file(metrics_file):
+        try:
+            stored_metrics = load_metrics_file(metrics_file)
+        except (json.JSONDecodeError, OSError):
+            stored_metrics = {}     # Unreadable metrics file is started again rather than stopping the app
+        total_metrics = merge_metrics(stored_metrics, new_metrics)
+        write_json_atomically(metrics_file, total_metrics)
+        if prometheus_file:
+            write_file_atomically(prometheus_file, lambda file: file.write(format_prometheus(total_metrics)))
+    reset_metrics()
+    return total_metrics
+
+
+def write_metrics_at_exit():
+    """Saves metrics when the app exits, if any were recorded. Errors are ignored so exiting is never stopped."""
+    if _timers or _counters:
+        try:
+            write_metrics()
+        except Exception:
+            pass
+
+
+if METRICS_ENABLED:
+    atexit.register(write_metrics_at_exit)
@@ -0,0 +1,203 @@
+# mood_analytics.py
+# MOOD SUMMARY (DISTRIBUTION, WEEKLY/MONTHLY AVERAGES, STREAKS, TREND) KEPT AS RUNNING TOTALS PER USER
+
+# IMPORT BUILT IN LIBRARIES:
+from collections import deque
+from datetime import date, datetime, timedelta
+
+# OPTIONAL THIRD-PARTY LIBRARY: NumPy is only used (if installed) to speed up full rebuilds of long histories.
+# Imported on first use by load_numpy(), as importing it is slow and most rebuilds are short.
+np = None
+
+# IMPORT CUSTOM CORE MODULES:
+from core.user_index import UserIndex
+
+
+# MOOD LABEL SCORES (matches MOOD_RATINGS menu in journal.py: 1 = Awful ... 5 = Great)
+MOOD_SCORES = {"Awful": 1, "Sad": 2, "Okay": 3, "Good": 4, "Great": 5}
+
+TREND_WINDOW = 7                # Trend compares average of the last 7 rated entries with the 7 before
+TREND_THRESHOLD = 0.5           # Difference in average score needed to count as improving/declining
+NUMPY_MIN_ENTRIES = 1000        # Rebuilds with at least this many entries use NumPy (if installed)
+
+
+def get_week_key(entry_date):
+    """Returns ISO week key for a date, e.g. '2025-W24'."""
+    iso_year, iso_week, _ = entry_date.isocalendar()
+    return f"{iso_year}-W{iso_week:02d}"
+
+
+def get_month_key(entry_date):
+    """Returns month key for a date, e.g. '2025-06'."""
+    return f"{entry_date.year}-{entry_date.month:02d}"
+
+
+def load_numpy():
+    """Imports NumPy on first use. Returns the numpy module, or None if it isn't installed."""
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            return None
+        np = numpy
+    return np
+
+
+# MOOD SUMMARY CLASS
+class MoodSummary(UserIndex):
+    """Running mood totals for one user, updated with each saved entry instead of re-scanning every entry.
+       Streaks count consecutive days with at least one entry (entries are expected to be saved in date order).
+    """
+    FILE_SUFFIX = ".mood.json"
+
+    def reset(self):
+        self.mood_counts = {}           # mood label: number of entries
+        self.weekly_totals = {}         # week key: [score total, rated entry count]
+        self.monthly_totals = {}        # month key: [score total, rated entry count]
+        self.last_entry_day = None      # Date ordinal of latest entry
+        self.current_streak = 0
+        self.longest_streak = 0
+        self.recent_scores = deque(maxlen=TREND_WINDOW * 2)
+
+    def get_index_data(self):
+        return {
+            "mood_counts": self.mood_counts,
+            "weekly_totals": self.weekly_totals,
+            "monthly_totals": self.monthly_totals,
+            "last_entry_day": self.last_entry_day,
+            "current_streak": self.current_streak,
+            "longest_streak": self.longest_streak,
+            "recent_scores": list(self.recent_scores),
+        }
+
+    def set_index_data(self, index_data):
+        self.mood_counts = index_data.get("mood_counts", {})
+        self.weekly_totals = index_data.get("weekly_totals", {})
+        self.monthly_totals = index_data.get("monthly_totals", {})
+        self.last_entry_day = index_data.get("last_entry_day")
+        self.current_streak = index_data.get("current_streak", 0)
+        self.longest_streak = index_data.get("longest_streak", 0)
+        self.recent_scores = deque(index_data.get("recent_scores", []), maxlen=TREND_WINDOW * 2)
+
+    def add_entry(self, entry_dict):
+        """Updates running totals with one new entry."""
+        mood_label = entry_dict.get("mood")
+        entry_date = datetime.fromisoformat(entry_dict["timestamp"]).date()
+        self.mood_counts[mood_label] = self.mood_counts.get(mood_label, 0) + 1
+        mood_score = MOOD_SCORES.get(mood_label)
+        if mood_score is not None:      # Free text moods are counted in distribution but not averaged
+            for totals, key in ((self.weekly_totals, get_week_key(entry_date)), (self.monthly_totals, get_month_key(entry_date))):
+                score_total = totals.setdefault(key, [0, 0])
+                score_total[0] += mood_score
+                score_total[1] += 1
+            self.recent_scores.append(mood_score)
+        self.update_streak(entry_date.toordinal())
+        self.entry_count += 1
+
+    def update_streak(self, entry_day):
+        """Extends streak if entry is the day after the last entry day, starts a new streak after a gap."""
+        if self.last_entry_day is None or entry_day > self.last_entry_day + 1:
+            self.current_streak = 1
+        elif entry_day == self.last_entry_day + 1:
+            self.current_streak += 1
+        else:
+            return      # Same day (or an older entry) - streak unchanged
+        self.last_entry_day = entry_day
+        self.longest_streak = max(self.longest_streak, self.current_streak)
+
+    def rebuild(self, entry_dicts):
+        """Rebuilds totals from all entries, using NumPy for long histories when it is installed."""
+        entry_dicts = list(entry_dicts)
+        if len(entry_dicts) >= NUMPY_MIN_ENTRIES and load_numpy() is not None:
+            self.rebuild_with_numpy(entry_dicts)
+        else:
+            super().rebuild(entry_dicts)
+
+    def rebuild_with_numpy(self, entry_dicts):
+        """Vectorised full rebuild: entries are packed into a columnar JournalEntryBatch, then dates and week/month totals
+           are computed on its integer timestamp and mood code arrays instead of one entry at a time.
+        """
+        from core.journal_models import JournalEntryBatch     # Imported here as journal_models imports this module
+        load_numpy()
+        self.reset()
+        entry_batch = JournalEntryBatch.from_dicts(entry_dicts)
+        self.entry_count = len(entry_batch)
+        if not entry_batch:
+            return
+        scores = np.frombuffer(entry_batch.mood_codes, dtype=np.int8).astype(np.int64)     # Mood code = mood score
+        days = (np.frombuffer(entry_batch.timestamps_us, dtype=np.int64) // 86_400_000_000).astype("datetime64[D]")
+        for mood_label, mood_score in MOOD_SCORES.items():
+            mood_count = int(np.count_nonzero(scores == mood_score))
+            if mood_count:
+                self.mood_counts[mood_label] = mood_count
+        for mood_label in entry_batch.custom_moods.values():
+            self.mood_counts[mood_label] = self.mood_counts.get(mood_label, 0) + 1
+
+        # Weekly/monthly totals for rated entries only
+        is_rated = scores > 0
+        rated_days = days[is_rated]
+        rated_scores = scores[is_rated]
+        day_numbers = rated_days.astype(np.int64)                         # Days since 1970-01-01 (a Thursday)
+        thursdays = day_numbers - (day_numbers + 3) % 7 + 3               # ISO week belongs to the year of its Thursday
+        iso_years = thursdays.astype("datetime64[D]").astype("datetime64[Y]").astype(np.int64) + 1970
+        year_starts = (iso_years - 1970).astype("datetime64[Y]").astype("datetime64[D]").astype(np.int64)
+        iso_weeks = (thursdays - year_starts) // 7 + 1
+        months = rated_days.astype("datetime64[M]").astype(np.int64)
+        self.weekly_totals = self.group_totals(iso_years * 100 + iso_weeks, rated_scores, lambda code: f"{code // 100}-W{code % 100:02d}")
+        self.monthly_totals = self.group_totals(months, rated_scores, lambda month: f"{1970 + month // 12}-{month % 12 + 1:02d}")
+        self.recent_scores.extend(rated_scores[-TREND_WINDOW * 2:].tolist())
+
+        # Streaks from sorted unique entry days
+        unique_days = np.unique(days.astype(np.int64))
+        run_breaks = np.flatnonzero(np.diff(unique_days) != 1) + 1
+        run_lengths = np.diff(np.concatenate(([0], run_breaks, [len(unique_days)])))
+        self.longest_streak = int(run_lengths.max())
+        self.current_streak = int(run_lengths[-1])
+        self.last_entry_day = date(1970, 1, 1).toordinal() + int(unique_days[-1])
+
+    @staticmethod
+    def group_totals(group_codes, scores, format_key):
+        """Sums scores per group code with np.bincount. Returns {format_key(code): [score total, count]}."""
+        unique_codes, group_numbers = np.unique(group_codes, return_inverse=True)
+        score_totals = np.bincount(group_numbers, weights=scores).astype(np.int64)
+        group_counts = np.bincount(group_numbers)
+        return {format_key(int(code)): [int(total), int(count)] for code, total, count in zip(unique_codes, score_totals, group_counts)}
+
+    def get_summary(self, today=None, recent_weeks=4, recent_months=6):
+        """Returns summary dict for display: distribution, overall/weekly/monthly averages, streaks and trend."""
+        today = today or date.today()
+        rated_total = sum(count for total, count in self.monthly_totals.values())
+        score_total = sum(total for total, count in self.monthly_totals.values())
+        # Current streak only counts if it is still going (latest entry today or yesterday)
+        streak_active = self.last_entry_day is not None and today.toordinal() - self.last_entry_day <= 1
+        return {
+            "entry_count": self.entry_count,
+            "mood_counts": dict(self.mood_counts),
+            "average_score": score_total / rated_total if rated_total else None,
+            "weekly_averages": self.get_recent_averages(self.weekly_totals, recent_weeks),
+            "monthly_averages": self.get_recent_averages(self.monthly_totals, recent_months),
+            "current_streak": self.current_streak if streak_active else 0,
+            "longest_streak": self.longest_streak,
+            "trend": self.get_trend(),
+        }
+
+    @staticmethod
+    def get_recent_averages(totals, limit):
+        """Returns list of (period key, average score) for the most recent periods, oldest first."""
+        recent_keys = sorted(totals)[-limit:]
+        return [(key, totals[key][0] / totals[key][1]) for key in recent_keys]
+
+    def get_trend(self):
+        """Compares recent average score with the window before. Returns 'improving', 'declining', 'steady' or None."""
+        scores = list(self.recent_scores)
+        if len(scores) < 4:
+            return None     # Not enough rated entries yet
+        half = len(scores) // 2
+        previous_scores, recent_scores = scores[-2 * half:-half], scores[-half:]
+        difference = sum(recent_scores) / half - sum(previous_scores) / half
+        if difference >= TREND_THRESHOLD:
+            return "improving"
+        if difference <= -TREND_THRESHOLD:
+            return "declining"
+        return "steady"
@@ -0,0 +1,133 @@
+# quote_engine.py
+# ENCOURAGEMENT QUOTE SELECTION - quote packs loaded from files on demand, and a shuffle bag per user so quotes don't repeat
+# Quote packs are UTF-8 text files in QUOTE_PACK_DIR/<mood key>/ (e.g. quote_packs/4/good_days.txt), one quote per line
+# (blank lines and lines starting with "#" are skipped), added to the built-in quotes in quotes.py.
+# A mood's pack files are only opened the first time that mood is chosen, and only the line positions are kept in memory
+# (each quote is read from its file when shown), so packs can hold thousands of quotes per mood.
+
+# IMPORT BUILT IN LIBRARIES:
+import json
+import random
+from array import array
+from pathlib import Path
+from urllib.parse import quote
+
+# IMPORT CUSTOM CORE MODULES:
+from core.quotes import encouragement_quotes
+from core.safe_file_io import write_json_atomically
+
+# IMPORT CONSTANT FILE PATHS
+from core.file_paths import QUOTE_PACK_DIR, QUOTE_BAG_DIR
+
+
+# ALL QUOTES FOR ONE MOOD (built-in quotes first, then each pack file's lines)
+class MoodQuotes:
+    """Quotes for one mood, numbered 0 to len() - 1. Pack files are scanned once for line positions, not kept in memory."""
+    def __init__(self, builtin_quotes, pack_paths):
+        self.builtin_quotes = list(builtin_quotes)
+        self.pack_lines = []        # (pack file path, array of byte offsets of each quote line)
+        for pack_path in pack_paths:
+            line_offsets = self.scan_pack_file(pack_path)
+            if line_offsets:
+                self.pack_lines.append((pack_path, line_offsets))
+
+    @staticmethod
+    def scan_pack_file(pack_path):
+        """Returns byte offsets of the quote lines in pack_path (skipping blank and "#" comment lines)."""
+        line_offsets = array('q')
+        offset = 0
+        with open(pack_path, 'rb') as pack_file:
+            for line in pack_file:
+                stripped_line = line.strip()
+                if stripped_line and not stripped_line.startswith(b"#"):
+                    line_offsets.append(offset)
+                offset += len(line)
+        return line_offsets
+
+    def __len__(self):
+        return len(self.builtin_quotes) + sum(len(line_offsets) for _, line_offsets in self.pack_lines)
+
+    def get_quote(self, quote_number):
+        """Returns quote number quote_number (reads just that line from its pack file)."""
+        if quote_number < len(self.builtin_quotes):
+            return self.builtin_quotes[quote_number]
+        quote_number -= len(self.builtin_quotes)
+        for pack_path, line_offsets in self.pack_lines:
+            if quote_number < len(line_offsets):
+                with open(pack_path, 'rb') as pack_file:
+                    pack_file.seek(line_offsets[quote_number])
+                    return pack_file.readline().decode('utf-8').strip()
+            quote_number -= len(line_offsets)
+        raise IndexError(quote_number)
+
+
+# QUOTE PACKS FOR EVERY MOOD
+class QuoteLibrary:
+    """Built-in quotes plus pack files in pack_dir, loaded one mood at a time the first time get_mood_quotes() asks for it."""
+    def __init__(self, pack_dir=QUOTE_PACK_DIR, builtin_quotes=None):
+        self.pack_dir = Path(pack_dir)
+        self.builtin_quotes = encouragement_quotes if builtin_quotes is None else builtin_quotes
+        self.loaded_moods = {}      # Mood key: MoodQuotes
+
+    def get_mood_quotes(self, mood_key):
+        """Returns MoodQuotes for mood_key, loading its pack files on first use."""
+        if mood_key not in self.loaded_moods:
+            mood_pack_dir = self.pack_dir / mood_key
+            pack_paths = sorted(mood_pack_dir.glob("*.txt")) if mood_pack_dir.is_dir() else []
+            self.loaded_moods[mood_key] = MoodQuotes(self.builtin_quotes.get(mood_key, []), pack_paths)
+        return self.loaded_moods[mood_key]
+
+
+# PER-USER SHUFFLE BAG
+class QuoteShuffleBag:
+    """Picks quotes for one user in a shuffled order, so every quote for a mood is shown once before any is repeated.
+       Only a random seed and position are saved per mood (bag_dir/<username>.json), not the shuffled order itself,
+       which is rebuilt from the seed. A new bag starts when the bag runs out or the number of quotes changes.
+    """
+    def __init__(self, quote_library, username, bag_dir=QUOTE_BAG_DIR):
+        self.quote_library = quote_library
+        self.bag_path = Path(bag_dir) / f"{quote(username, safe='')}.json"
+        self.bags = self.load()         # Mood key: {"seed", "position", "quote_count", "last_quote"}
+        self.shuffled_orders = {}       # (seed, quote_count): shuffled quote numbers, built once per session
+
+    def load(self):
+        try:
+            with open(self.bag_path, 'r', encoding='utf-8') as bag_file:
+                return json.load(bag_file)
+        except (OSError, ValueError):
+            return {}       # No quotes shown yet, or damaged file: start new bags
+
+    def save(self):
+        """Saves bag positions (not flushed to disk: after a power cut a bag may start again)."""
+        self.bag_path.parent.mkdir(parents=True, exist_ok=True)
+        write_json_atomically(self.bag_path, self.bags, durable=False)
+
+    def get_shuffled_order(self, seed, quote_count):
+        if (seed, quote_count) not in self.shuffled_orders:
+            shuffled_order = array('l', range(quote_count))
+            random.Random(seed).shuffle(shuffled_order)
+            self.shuffled_orders[(seed, quote_count)] = shuffled_order
+        return self.shuffled_orders[(seed, quote_count)]
+
+    def start_new_bag(self, quote_count, last_quote):
+        """Returns a new bag, not starting with last_quote (so the end of one bag and start of the next don't repeat)."""
+        while True:
+            seed = random.getrandbits(32)
+            if quote_count == 1 or self.get_shuffled_order(seed, quote_count)[0] != last_quote:
+                return {"seed": seed, "position": 0, "quote_count": quote_count, "last_quote": last_quote}
+
+    def next_quote(self, mood_key):
+        """Returns the next quote from the user's bag for mood_key (None if there are no quotes for it)."""
+        mood_quotes = self.quote_library.get_mood_quotes(mood_key)
+        quote_count = len(mood_quotes)
+        if not quote_count:
+            return None
+        bag = self.bags.get(mood_key)
+        if not bag or bag["quote_count"] != quote_count or bag["position"] >= quote_count:
+            bag = self.start_new_bag(quote_count, last_quote=bag["last_quote"] if bag else None)
+        quote_number = self.get_shuffled_order(bag["seed"], quote_count)[bag["position"]]
+        bag["position"] += 1
+        bag["last_quote"] = quote_number
+        self.bags[mood_key] = bag
+        self.save()
+        return mood_quotes.get_quote(quote_number)
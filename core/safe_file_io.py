@@ -0,0 +1,99 @@
+# safe_file_io.py
+# FILE LOCKING AND ATOMIC WRITE HELPERS - So several app processes can safely share the same data files
+
+# IMPORT BUILT IN LIBRARIES:
+import json
+import os
+import stat
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+
+# Advisory file locks: fcntl on Linux/macOS, msvcrt on Windows
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+
+def lock_file_path(file_path):
+    """Returns path of the lock file used for file_path (e.g. user_accounts.json.lock)."""
+    file_path = Path(file_path)
+    return file_path.with_name(f"{file_path.name}.lock")
+
+
+@contextmanager
+def locked_file(file_path):
+    """Holds an exclusive advisory lock for file_path until the with block ends (blocks while another process holds it).
+       A separate .lock file is locked so the data file itself can be replaced while locked.
+    """
+    lock_path = lock_file_path(file_path)
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, 'a+') as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def get_file_stamp(file_path):
+    """Returns (modified time, size, inode) of file_path, used to detect changes by other processes. None if file missing."""
+    try:
+        file_stat = os.stat(file_path)
+    except FileNotFoundError:
+        return None
+    return (file_stat.st_mtime_ns, file_stat.st_size, file_stat.st_ino)
+
+
+def write_json_atomically(file_path, data, durable=True):
+    """Writes data as JSON to file_path atomically (see write_file_atomically)."""
+    write_file_atomically(file_path, lambda temp_file: json.dump(data, temp_file, indent=4), durable)
+
+
+def write_file_atomically(file_path, write_content, durable=True):
+    """Calls write_content(temp file) to write a temp file in the same folder, flushes it to disk, then renames it over file_path.
+       Readers (and a crash part way through) only ever see the old or the new complete file.
+       durable=False skips flushing to disk (much faster) for files that can be rebuilt, e.g. per-user indexes:
+       after a power cut the file may be old, empty or missing.
+    """
+    file_path = Path(file_path)
+    temp_fd, temp_path = tempfile.mkstemp(dir=file_path.parent, prefix=f".{file_path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(temp_fd, 'w') as temp_file:
+            write_content(temp_file)
+            if durable:
+                temp_file.flush()
+                os.fsync(temp_file.fileno())
+        if file_path.exists():
+            os.chmod(temp_path, stat.S_IMODE(os.stat(file_path).st_mode))  # Keep original file permissions
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+    if durable:
+        fsync_directory(file_path.parent)
+
+
+def fsync_directory(directory_path):
+    """Flushes a directory entry (e.g. after a rename) to disk. Not supported on Windows, so skipped there."""
+    try:
+        directory_fd = os.open(directory_path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(directory_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(directory_fd)
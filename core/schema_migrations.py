@@ -0,0 +1,128 @@
+# schema_migrations.py
+# VERSIONED RECORD SCHEMAS - stored journal entry and user account dicts have a "schema_version" field.
+# Older records are upgraded one version at a time by the migrations registered below when they are read (from_dict),
+# so changing a record format never needs the whole store rewritten before the app starts or a user logs in.
+# migrate_journal_entries() (python cli.py migrate) also rewrites stored entries in the background, one user at a time
+# (every user in one rewrite for backends storing all users in one file), saving its progress so an interrupted pass
+# carries on where it stopped.
+
+# IMPORT BUILT IN LIBRARIES:
+import json
+from bisect import bisect_right
+from pathlib import Path
+
+# IMPORT CUSTOM MODULES:
+from core.safe_file_io import write_json_atomically
+from ui.emojis import EMOJI_WARNING
+
+# IMPORT CUSTOM EXCEPTION CLASSES:
+from core.exception_classes import SchemaMigrationError
+
+
+SCHEMA_VERSION_FIELD = "schema_version"     # Records without it were saved before versioning (version 0)
+JOURNAL_ENTRY_SCHEMA_VERSION = 1
+USER_ACCOUNT_SCHEMA_VERSION = 1
+
+
+# RECORD SCHEMA CLASS
+class RecordSchema:
+    """Current schema version of one kind of stored record, and the migrations upgrading older records to it.
+       Each migration takes a record dict in one version and returns it in the next version.
+    """
+    def __init__(self, record_name, current_version):
+        self.record_name = record_name
+        self.current_version = current_version
+        self.migrations = {}        # From version: migration function
+
+    def migration(self, from_version):
+        """Decorator registering a function that upgrades a record from from_version to from_version + 1."""
+        def register_migration(migrate_record):
+            self.migrations[from_version] = migrate_record
+            return migrate_record
+        return register_migration
+
+    def needs_upgrade(self, record):
+        """Returns True if record was saved in an older schema version."""
+        return record.get(SCHEMA_VERSION_FIELD, 0) < self.current_version
+
+    def upgrade(self, record):
+        """Returns a copy of record upgraded to the current version, or record itself if it doesn't need upgrading
+           (records saved by a newer version of the app are also returned unchanged).
+        """
+        if not self.needs_upgrade(record):
+            return record
+        version = record.get(SCHEMA_VERSION_FIELD, 0)
+        record = dict(record)
+        while version < self.current_version:
+            if version not in self.migrations:
+                raise SchemaMigrationError(
+                    f"[red]{EMOJI_WARNING} No migration for {self.record_name} records from schema version {version}.[/red]\n"
+                )
+            record = self.migrations[version](record)
+            version += 1
+        record[SCHEMA_VERSION_FIELD] = version
+        return record
+
+
+JOURNAL_ENTRY_SCHEMA = RecordSchema("journal entry", JOURNAL_ENTRY_SCHEMA_VERSION)
+USER_ACCOUNT_SCHEMA = RecordSchema("user account", USER_ACCOUNT_SCHEMA_VERSION)
+
+
+# MIGRATIONS (add one for each new schema version, and increase the version number above)
+@JOURNAL_ENTRY_SCHEMA.migration(0)
+def add_journal_entry_schema_version(entry_dict):
+    """Version 1: same fields as version 0, with schema_version added."""
+    return entry_dict
+
+@USER_ACCOUNT_SCHEMA.migration(0)
+def add_account_session_version(account_data):
+    """Version 1: session_version (increased to revoke session tokens) saved for every account, 0 if never revoked."""
+    account_data.setdefault("session_version", 0)
+    return account_data
+
+
+def upgrade_entry_dict(entry_dict):
+    """Returns a stored journal entry dict in the current schema version."""
+    return JOURNAL_ENTRY_SCHEMA.upgrade(entry_dict)
+
+def upgrade_account_data(account_data):
+    """Returns a stored user account dict in the current schema version."""
+    return USER_ACCOUNT_SCHEMA.upgrade(account_data)
+
+
+# BACKGROUND MIGRATION OF STORED JOURNAL ENTRIES
+def load_migration_progress(progress_file_path):
+    """Returns saved progress of an unfinished migration, or None if there isn't one (or it was for an older version)."""
+    try:
+        progress = json.loads(Path(progress_file_path).read_text())
+    except (OSError, ValueError):
+        return None
+    return progress if progress.get(SCHEMA_VERSION_FIELD) == JOURNAL_ENTRY_SCHEMA_VERSION else None
+
+def migrate_journal_entries(storage, progress_file_path, report_progress=None):
+    """Rewrites every user's stored journal entries in the current schema version, in batches of
+       storage.MIGRATION_BATCH_USERS users (in username order): one user at a time, or every user in one rewrite for
+       backends that save the whole file anyway (json/log), so the file isn't rewritten once per user.
+       The last finished username is saved to progress_file_path after each batch, so a stopped pass carries on from the
+       next user when run again. The app can be used meanwhile: entries are rewritten under the storage's locks,
+       and entries not rewritten yet are still upgraded when read.
+       report_progress(users done, total users) is called as batches are finished. Returns number of entries upgraded.
+    """
+    progress = load_migration_progress(progress_file_path) or {
+        SCHEMA_VERSION_FIELD: JOURNAL_ENTRY_SCHEMA_VERSION, "last_username": None, "entries_upgraded": 0
+    }
+    usernames = sorted(storage.usernames())
+    users_done = bisect_right(usernames, progress["last_username"]) if progress["last_username"] is not None else 0
+    if report_progress:
+        report_progress(users_done, len(usernames))
+    batch_size = storage.MIGRATION_BATCH_USERS or max(len(usernames), 1)
+    while users_done < len(usernames):
+        batch_usernames = usernames[users_done:users_done + batch_size]
+        progress["entries_upgraded"] += storage.rewrite_users_entries(batch_usernames, upgrade_entry_dict)
+        progress["last_username"] = batch_usernames[-1]
+        write_json_atomically(progress_file_path, progress, durable=False)
+        users_done += len(batch_usernames)
+        if report_progress:
+            report_progress(users_done, len(usernames))
+    Path(progress_file_path).unlink(missing_ok=True)     # Finished: next run starts from the first user again
+    return progress["entries_upgraded"]
@@ -0,0 +1,60 @@
+# search_index.py
+# PER-USER INVERTED INDEX USED TO SEARCH JOURNAL ENTRIES BY WORD
+
+# IMPORT BUILT IN LIBRARIES:
+import re
+
+# IMPORT CUSTOM CORE MODULES:
+from core.user_index import UserIndex
+
+
+# JOURNAL ENTRY FIELDS THAT ARE SEARCHABLE
+SEARCHABLE_FIELDS = ("wins", "challenges", "gratitude", "goals")
+
+# Words are runs of letters/numbers (apostrophes kept inside words, e.g. "didn't")
+WORD_PATTERN = re.compile(r"[\w]+(?:'[\w]+)*")
+
+
+def tokenize(text):
+    """Returns set of lowercase words in text."""
+    return set(WORD_PATTERN.findall(text.lower()))
+
+
+# SEARCH INDEX CLASS
+class SearchIndex(UserIndex):
+    """Inverted index for one user's journal: maps each word to the positions (oldest entry = 0) of entries containing it.
+       Updated as each new entry is saved, so searches never scan entries.
+    """
+    FILE_SUFFIX = ".search.json"
+
+    def reset(self):
+        self.postings = {}      # word: list of entry positions
+
+    def get_index_data(self):
+        return {"postings": self.postings}
+
+    def set_index_data(self, index_data):
+        self.postings = index_data.get("postings", {})
+
+    def add_entry(self, entry_dict):
+        """Indexes words of a new entry (at the next position)."""
+        entry_words = set()
+        for field_name in SEARCHABLE_FIELDS:
+            entry_words |= tokenize(entry_dict.get(field_name) or "")
+        for word in entry_words:
+            self.postings.setdefault(word, []).append(self.entry_count)
+        self.entry_count += 1
+
+    def search(self, query):
+        """Returns positions of entries containing every word in query, newest first."""
+        query_words = tokenize(query)
+        if not query_words:
+            return []
+        # Start from the rarest word so the intersection stays small
+        word_positions = sorted((self.postings.get(word, []) for word in query_words), key=len)
+        matching_positions = set(word_positions[0])
+        for positions in word_positions[1:]:
+            matching_positions.intersection_update(positions)
+            if not matching_positions:
+                break
+        return sorted(matching_positions, reverse=True)
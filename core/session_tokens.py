@@ -0,0 +1,95 @@
+# session_tokens.py
+# SIGNED SESSION TOKENS - let a user who chose "stay logged in" resume on later launches without a bcrypt password check.
+# A token is "<username>.<expiry time>.<random id>.<HMAC-SHA256 signature>", signed with a secret key kept next to the
+# accounts file. The signature also covers the account's session_version, so increasing it (UserManager.revoke_sessions)
+# revokes every token issued for that account.
+
+# IMPORT BUILT IN LIBRARIES:
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import time
+from pathlib import Path
+
+# IMPORT CUSTOM MODULES:
+from core.safe_file_io import write_file_atomically
+
+# IMPORT CONSTANT FILE PATHS
+from core.file_paths import SESSION_TOKEN_DIR
+
+
+SESSION_TOKEN_DAYS = 14             # How long "stay logged in" lasts
+SESSION_SECRET_BYTES = 32
+
+
+class SessionTokenSigner:
+    """Creates and checks session tokens with the secret key in secret_path (created on first use, readable by owner only).
+       Deleting the secret key file revokes every token for every account.
+    """
+    def __init__(self, secret_path, clock=time.time):
+        self.secret_path = Path(secret_path)
+        self.clock = clock
+        self.secret = None      # Loaded on first use
+
+    def get_secret(self):
+        """Returns the secret key, creating the key file if it doesn't exist yet."""
+        if self.secret is None:
+            try:
+                self.secret_path.parent.mkdir(parents=True, exist_ok=True)
+                secret_fd = os.open(self.secret_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+                with os.fdopen(secret_fd, 'wb') as secret_file:
+                    secret_file.write(secrets.token_bytes(SESSION_SECRET_BYTES))
+            except FileExistsError:
+                pass        # Already created (e.g. by another app process)
+            self.secret = self.secret_path.read_bytes()
+        return self.secret
+
+    def sign(self, username, expires, token_id, session_version):
+        token_data = f"{username}.{expires}.{token_id}.{session_version}".encode('utf-8')
+        signature = hmac.new(self.get_secret(), token_data, hashlib.sha256).digest()
+        return base64.urlsafe_b64encode(signature).decode('ascii').rstrip("=")
+
+    def create_token(self, username, session_version, lifetime_days=SESSION_TOKEN_DAYS):
+        """Returns a new signed token for username, valid for lifetime_days unless the account's session_version changes."""
+        expires = int(self.clock() + lifetime_days * 24 * 60 * 60)
+        token_id = secrets.token_urlsafe(12)
+        return f"{username}.{expires}.{token_id}.{self.sign(username, expires, token_id, session_version)}"
+
+    def validate_token(self, session_token, username, session_version):
+        """Returns True if session_token was issued for username with this session_version and hasn't expired.
+           Signatures are compared in constant time (hmac.compare_digest).
+        """
+        try:
+            token_username, expires, token_id, signature = session_token.rsplit(".", 3)
+            expires = int(expires)
+        except (AttributeError, ValueError):
+            return False
+        expected_signature = self.sign(username, expires, token_id, session_version)
+        signature_matches = hmac.compare_digest(expected_signature.encode('ascii'), signature.encode('ascii', 'replace'))
+        return signature_matches and token_username == username and expires > self.clock()
+
+
+# SAVED TOKENS ON THIS DEVICE (one file per user in SESSION_TOKEN_DIR, readable by owner only)
+def session_token_path(username, token_dir=SESSION_TOKEN_DIR):
+    """Returns token file path for username. The file is named by a hash of the username, so any username
+       (e.g. containing "/" or "..") is a safe file name inside token_dir.
+    """
+    return Path(token_dir) / f"{hashlib.sha256(username.encode('utf-8')).hexdigest()}.token"
+
+def save_session_token(username, session_token, token_dir=SESSION_TOKEN_DIR):
+    """Saves username's session token so the next launch can resume without a password."""
+    Path(token_dir).mkdir(parents=True, exist_ok=True)
+    write_file_atomically(session_token_path(username, token_dir), lambda token_file: token_file.write(session_token), durable=False)
+
+def load_session_token(username, token_dir=SESSION_TOKEN_DIR):
+    """Returns username's saved session token, or None if there isn't one."""
+    try:
+        return session_token_path(username, token_dir).read_text().strip() or None
+    except OSError:
+        return None
+
+def delete_session_token(username, token_dir=SESSION_TOKEN_DIR):
+    """Removes username's saved session token (e.g. expired or revoked)."""
+    session_token_path(username, token_dir).unlink(missing_ok=True)
@@ -0,0 +1,254 @@
+# sqlite_storage.py
+# SQLITE STORAGE ENGINE FOR USER ACCOUNTS AND JOURNAL ENTRIES (selected in file_paths.py config)
+
+# IMPORT BUILT IN LIBRARIES:
+import json
+import sqlite3
+import threading
+from collections.abc import MutableMapping
+from pathlib import Path
+
+# IMPORT CUSTOM CORE MODULES:
+from core.user_auth_models import BaseDataManager
+from core.journal_storage import JournalStorage, AppendLogJournalStorage, ShardedJournalStorage
+from ui.emojis import EMOJI_WARNING
+
+# IMPORT CONSTANT FILE PATHS
+from core.file_paths import SQLITE_DATABASE_FILE, JOURNAL_ENTRIES_JSON_FILE
+
+# IMPORT CUSTOM EXCEPTION CLASSES:
+from core.exception_classes import FileLoadingError, FileSavingError
+
+
+# DATABASE SCHEMA (username is the user_accounts primary key, journal entries indexed by username + timestamp for date
+# ranges, by username + id for saved order, and by username + position: each entry's number in the order the user's
+# entries were saved (0 = oldest, like the other backends), used by the search index to fetch entries)
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_accounts (
+    username TEXT PRIMARY KEY,
+    account_data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS journal_entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL,
+    position INTEGER,
+    timestamp TEXT NOT NULL,
+    entry_data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_journal_entries_username_timestamp ON journal_entries (username, timestamp);
+CREATE INDEX IF NOT EXISTS idx_journal_entries_username_id ON journal_entries (username, id);
+"""
+
+# Databases created before entries had a position column get it added and filled in once, when opened
+ADD_POSITION_COLUMN = """
+ALTER TABLE journal_entries ADD COLUMN position INTEGER;
+UPDATE journal_entries SET position = numbered_entries.position
+    FROM (SELECT id, ROW_NUMBER() OVER (PARTITION BY username ORDER BY id) - 1 AS position FROM journal_entries) AS numbered_entries
+    WHERE journal_entries.id = numbered_entries.id;
+"""
+POSITION_INDEX = "CREATE UNIQUE INDEX IF NOT EXISTS idx_journal_entries_username_position ON journal_entries (username, position)"
+
+
+# DATABASE CONNECTION CLASS
+class SQLiteDatabase:
+    """Opens the SQLite database in WAL mode (readers don't block the writer) and creates tables/indexes."""
+    def __init__(self, database_path=SQLITE_DATABASE_FILE):
+        self.database_path = Path(database_path)
+        self.lock = threading.Lock()    # One connection shared by managers, so writes are serialised
+        try:
+            self.database_path.parent.mkdir(parents=True, exist_ok=True)
+            self.connection = sqlite3.connect(self.database_path, check_same_thread=False)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.executescript(SCHEMA)
+            self.add_position_column()
+        except sqlite3.Error as err:
+            raise FileLoadingError(f"[red]{EMOJI_WARNING} Error opening database {self.database_path}:[/red]\n") from err
+
+    def add_position_column(self):
+        """Adds and fills in journal_entries.position if the database was created without it, then its index."""
+        with self.lock, self.connection:
+            column_names = [row[1] for row in self.connection.execute("PRAGMA table_info(journal_entries)")]
+            if "position" not in column_names:
+                for statement in ADD_POSITION_COLUMN.split(";"):
+                    if statement.strip():
+                        self.connection.execute(statement)
+            self.connection.execute(POSITION_INDEX)
+
+    def query(self, sql, parameters=()):
+        """Runs a read query and returns all rows."""
+        try:
+            return self.connection.execute(sql, parameters).fetchall()
+        except sqlite3.Error as err:
+            raise FileLoadingError(f"[red]{EMOJI_WARNING} Error reading from database:[/red]\n") from err
+
+    def iter_query(self, sql, parameters=(), batch_size=500):
+        """Runs a read query and yields rows, fetching batch_size rows at a time so large results aren't held in memory."""
+        try:
+            cursor = self.connection.execute(sql, parameters)
+            while rows := cursor.fetchmany(batch_size):
+                yield from rows
+        except sqlite3.Error as err:
+            raise FileLoadingError(f"[red]{EMOJI_WARNING} Error reading from database:[/red]\n") from err
+
+    def write(self, sql, parameter_rows):
+        """Runs a write statement for each row of parameters in a single transaction."""
+        try:
+            with self.lock, self.connection:
+                self.connection.executemany(sql, parameter_rows)
+            return True
+        except sqlite3.Error as err:
+            raise FileSavingError(f"[red]{EMOJI_WARNING} Error saving data to database:[/red]\n") from err
+
+
+# Databases already opened this session, shared by UserManager and JournalManager
+_open_databases = {}
+
+def get_database(database_path=SQLITE_DATABASE_FILE):
+    """Returns the shared SQLiteDatabase for database_path, opening it on first use."""
+    database_key = Path(database_path).resolve()
+    if database_key not in _open_databases:
+        _open_databases[database_key] = SQLiteDatabase(database_path)
+    return _open_databases[database_key]
+
+
+# USER ACCOUNTS TABLE (dict-like, so UserManager can use it in place of the loaded JSON dict)
+class SQLiteUserAccounts(MutableMapping):
+    """Dict-like view of the user_accounts table: lookups use the username primary key, assignments are saved immediately."""
+    def __init__(self, database, legacy_json_file_path=None):
+        self.database = database
+        if legacy_json_file_path and len(self) == 0:
+            self.import_legacy_accounts(legacy_json_file_path)
+
+    def import_legacy_accounts(self, legacy_json_file_path):
+        """First use only: copies accounts from the JSON accounts file into the empty table."""
+        if Path(legacy_json_file_path).exists():
+            self.update_many(BaseDataManager(legacy_json_file_path).load_json_file())
+
+    def update_many(self, accounts):
+        """Saves many accounts (username: account dict) in one transaction.
+           A larger session_version already stored is kept, so an older copy of an account can't undo a revoke.
+        """
+        return self.database.write(
+            """INSERT INTO user_accounts (username, account_data) VALUES (?, ?)
+               ON CONFLICT (username) DO UPDATE SET account_data = CASE
+                   WHEN json_extract(account_data, '$.session_version') > COALESCE(json_extract(excluded.account_data, '$.session_version'), 0)
+                   THEN json_set(excluded.account_data, '$.session_version', json_extract(account_data, '$.session_version'))
+                   ELSE excluded.account_data END""",
+            [(username, json.dumps(account_data)) for username, account_data in accounts.items()]
+        )
+
+    def __contains__(self, username):
+        return bool(self.database.query("SELECT 1 FROM user_accounts WHERE username = ?", (username,)))
+
+    def __getitem__(self, username):
+        rows = self.database.query("SELECT account_data FROM user_accounts WHERE username = ?", (username,))
+        if not rows:
+            raise KeyError(username)
+        return json.loads(rows[0][0])
+
+    def __setitem__(self, username, account_data):
+        self.update_many({username: account_data})
+
+    def __delitem__(self, username):
+        if username not in self:
+            raise KeyError(username)
+        self.database.write("DELETE FROM user_accounts WHERE username = ?", [(username,)])
+
+    def __iter__(self):
+        return iter([row[0] for row in self.database.query("SELECT username FROM user_accounts")])
+
+    def __len__(self):
+        return self.database.query("SELECT COUNT(*) FROM user_accounts")[0][0]
+
+
+# JOURNAL ENTRIES TABLE
+class SQLiteJournalStorage(JournalStorage):
+    """Journal storage backed by the journal_entries table: inserts are single rows and reads use the (username, timestamp) index."""
+    HAS_TIMESTAMP_INDEX = True
+
+    def __init__(self, database_path=SQLITE_DATABASE_FILE, legacy_json_file_path=JOURNAL_ENTRIES_JSON_FILE):
+        self.database = get_database(database_path)
+        if legacy_json_file_path and not self.database.query("SELECT 1 FROM journal_entries LIMIT 1"):
+            self.import_legacy_store(Path(legacy_json_file_path))
+
+    def import_legacy_store(self, legacy_json_file_path):
+        """First use only: copies entries from the sharded or single file store into the empty table."""
+        shard_dir = legacy_json_file_path.with_name(f"{legacy_json_file_path.stem}_shards")
+        if shard_dir.exists():
+            legacy_store = ShardedJournalStorage(legacy_json_file_path, shard_dir)
+        elif legacy_json_file_path.exists():
+            legacy_store = AppendLogJournalStorage(legacy_json_file_path, compact_threshold=float('inf'))
+        else:
+            return
+        for username in legacy_store.usernames():
+            self.append_entries(username, legacy_store.load_user_entries(username))
+
+    def load_user_entries(self, username):
+        rows = self.database.query(
+            "SELECT entry_data FROM journal_entries WHERE username = ? ORDER BY id", (username,)
+        )
+        return [json.loads(row[0]) for row in rows]
+
+    def load_user_entries_between(self, username, start_timestamp, end_timestamp):
+        """Returns entry dicts with start_timestamp <= timestamp <= end_timestamp (ISO format strings), using the index."""
+        rows = self.database.query(
+            "SELECT entry_data FROM journal_entries WHERE username = ? AND timestamp BETWEEN ? AND ? ORDER BY timestamp, id",
+            (username, start_timestamp, end_timestamp)
+        )
+        return [json.loads(row[0]) for row in rows]
+
+    def stream_user_entries(self, username):
+        rows = self.database.iter_query(
+            "SELECT entry_data FROM journal_entries WHERE username = ? ORDER BY id", (username,)
+        )
+        return (json.loads(row[0]) for row in rows)
+
+    def usernames(self):
+        return [row[0] for row in self.database.query("SELECT DISTINCT username FROM journal_entries")]
+
+    def count_user_entries(self, username):
+        return self.database.query("SELECT COUNT(*) FROM journal_entries WHERE username = ?", (username,))[0][0]
+
+    def load_user_entries_at(self, username, positions):
+        """Fetches only the rows at the given positions (oldest saved entry = 0, as used by the search index) in one query,
+           looked up in the username + position index.
+        """
+        positions = list(positions)
+        if not positions:
+            return []
+        rows = self.database.query(
+            "SELECT position, entry_data FROM journal_entries WHERE username = ? AND position IN (SELECT value FROM json_each(?))",
+            (username, json.dumps(positions))
+        )
+        entries_by_position = {position: json.loads(entry_data) for position, entry_data in rows}
+        return [entries_by_position[position] for position in positions]
+
+    def iter_user_entries(self, username, newest_first=True, offset=0, limit=None):
+        """Only fetches the requested rows (LIMIT/OFFSET on the username + id index)."""
+        order = "DESC" if newest_first else "ASC"
+        rows = self.database.query(
+            f"SELECT entry_data FROM journal_entries WHERE username = ? ORDER BY id {order} LIMIT ? OFFSET ?",
+            (username, -1 if limit is None else limit, offset)
+        )
+        return (json.loads(row[0]) for row in rows)
+
+    def append_entries(self, username, entry_dicts):
+        """Inserts many entries for username in one transaction, each numbered after the user's last position (index lookup)."""
+        return self.database.write(
+            "INSERT INTO journal_entries (username, position, timestamp, entry_data) VALUES "
+            "(?, COALESCE((SELECT MAX(position) + 1 FROM journal_entries WHERE username = ?), 0), ?, ?)",
+            [(username, username, entry_dict["timestamp"], json.dumps(entry_dict)) for entry_dict in entry_dicts]
+        )
+
+    def rewrite_user_entries(self, username, rewrite_entry):
+        """Updates only the changed rows, in one transaction."""
+        changed_rows = []
+        for entry_id, entry_data in self.database.iter_query("SELECT id, entry_data FROM journal_entries WHERE username = ?", (username,)):
+            entry_dict = json.loads(entry_data)
+            rewritten_entry = rewrite_entry(entry_dict)
+            if rewritten_entry is not entry_dict:
+                changed_rows.append((json.dumps(rewritten_entry), entry_id))
+        if changed_rows:
+            self.database.write("UPDATE journal_entries SET entry_data = ? WHERE id = ?", changed_rows)
+        return len(changed_rows)
@@ -0,0 +1,59 @@
+# timestamp_index.py
+# PER-USER SORTED TIMESTAMP INDEX USED TO FIND JOURNAL ENTRIES IN A DATE RANGE
+
+# IMPORT BUILT IN LIBRARIES:
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta, timezone
+
+# IMPORT CUSTOM CORE MODULES:
+from core.user_index import UserIndex
+
+
+# TIMESTAMPS AS INTEGER MICROSECONDS since 1970-01-01 (timestamps are local time with no timezone,
+# so no timezone conversion is done - timestamps that do include a timezone are converted to UTC)
+EPOCH = datetime(1970, 1, 1)
+
+def timestamp_to_epoch_us(timestamp):
+    """Converts ISO format timestamp string (or datetime) to integer microseconds since EPOCH."""
+    entry_datetime = datetime.fromisoformat(timestamp) if isinstance(timestamp, str) else timestamp
+    if entry_datetime.tzinfo is not None:
+        entry_datetime = entry_datetime.astimezone(timezone.utc).replace(tzinfo=None)
+    return (entry_datetime - EPOCH) // timedelta(microseconds=1)
+
+def epoch_us_to_datetime(timestamp_us):
+    """Converts integer microseconds since EPOCH back to a datetime."""
+    return EPOCH + timedelta(microseconds=timestamp_us)
+
+
+# TIMESTAMP INDEX CLASS
+class TimestampIndex(UserIndex):
+    """Sorted entry timestamps for one user, with the stored position (oldest entry = 0) of the entry for each timestamp.
+       Range queries use binary search (bisect), so only the k matching entries are loaded: O(log n + k).
+    """
+    FILE_SUFFIX = ".timestamps.json"
+
+    def reset(self):
+        self.timestamps = array('q')    # Entry timestamps (microseconds since EPOCH), sorted
+        self.positions = array('q')     # Stored position of the entry with timestamps[i]
+
+    def get_index_data(self):
+        return {"timestamps": self.timestamps.tolist(), "positions": self.positions.tolist()}
+
+    def set_index_data(self, index_data):
+        self.timestamps = array('q', index_data.get("timestamps", []))
+        self.positions = array('q', index_data.get("positions", []))
+
+    def add_entry(self, entry_dict):
+        """Inserts timestamp of a new entry (at the next position) in sorted order - usually at the end."""
+        timestamp_us = timestamp_to_epoch_us(entry_dict["timestamp"])
+        insert_at = bisect_right(self.timestamps, timestamp_us)
+        self.timestamps.insert(insert_at, timestamp_us)
+        self.positions.insert(insert_at, self.entry_count)
+        self.entry_count += 1
+
+    def find_positions_between(self, start, end):
+        """Returns positions of entries with start <= timestamp <= end (datetimes), oldest first."""
+        first = bisect_left(self.timestamps, timestamp_to_epoch_us(start))
+        last = bisect_right(self.timestamps, timestamp_to_epoch_us(end))
+        return self.positions[first:last].tolist()
@@ -2,17 +2,32 @@
 
 # IMPORT BUILT IN LIBRARIES:
 import json
-import bcrypt
+import os
+import time
+import threading
+from pathlib import Path
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 # IMPORT THIRD-PARTY LIBRARIES:
 from rich import print
 
 # IMPORT CUSTOM MODULES:
 from ui.emojis import EMOJI_WARNING, EMOJI_INVALID
+from core.safe_file_io import locked_file, get_file_stamp, write_json_atomically
+from core.json_scan import load_json_value, load_json_keys
+from core.metrics import timed, count
+from core.login_limiter import LoginRateLimiter, LOCAL_SOURCE
+from core.session_tokens import SessionTokenSigner
+from core.schema_migrations import USER_ACCOUNT_SCHEMA, upgrade_account_data, SCHEMA_VERSION_FIELD, USER_ACCOUNT_SCHEMA_VERSION
+
+# IMPORT STORAGE CONFIG
+from core.file_paths import USER_STORAGE_ENGINE, SQLITE_DATABASE_FILE, LOGIN_ATTEMPTS_FILE_NAME, SESSION_SECRET_FILE_NAME
 
 # IMPORT CUSTOM EXCEPTION CLASSES:
 from core.exception_classes import (
     DataFileCorruptedError,
+    UserManagerError,
     FileLoadingError,
     FileSavingError,
     UserNotFoundError,
@@ -23,28 +38,110 @@ from core.exception_classes import (
     )
 
 
+# BCRYPT SETTINGS
+BCRYPT_WORK_FACTOR = 12         # bcrypt cost (log2 rounds): each +1 doubles hashing/verify time. Stored hashes are upgraded on login
+BCRYPT_MAX_WORKERS = os.cpu_count() or 1
+KDF_TIMINGS_KEPT = 100          # Number of recent timings kept per operation (see get_kdf_timings)
+
+# USERNAME/PASSWORD RULES (same rules used by create new account prompts in main.py)
+USERNAME_MIN_LENGTH = 5
+USERNAME_MAX_LENGTH = 20
+PASSWORD_MIN_LENGTH = 8
+PASSWORD_MAX_LENGTH = 16
+
+
+# BCRYPT HASHING HELPERS (run in a thread pool - bcrypt releases the GIL, so hashes run in parallel on all cores)
+_bcrypt_executor = None
+_bcrypt_executor_lock = threading.Lock()
+_kdf_timings = {"hash": deque(maxlen=KDF_TIMINGS_KEPT), "verify": deque(maxlen=KDF_TIMINGS_KEPT)}
+
+def get_bcrypt_executor():
+    """Returns the shared bcrypt thread pool, created on first use."""
+    global _bcrypt_executor
+    with _bcrypt_executor_lock:
+        if _bcrypt_executor is None:
+            _bcrypt_executor = ThreadPoolExecutor(max_workers=BCRYPT_MAX_WORKERS, thread_name_prefix="bcrypt")
+    return _bcrypt_executor
+
+@timed("auth.bcrypt_hash")
+def bcrypt_hash(password, work_factor=BCRYPT_WORK_FACTOR):
+    """Hashes password with a new salt of the given cost. Returns hash as a string (so it can be stored in JSON)."""
+    import bcrypt       # Imported on first use (in the bcrypt thread pool), so app startup doesn't load it
+    started = time.perf_counter()
+    hashed_password_bytes = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=work_factor))
+    _kdf_timings["hash"].append(time.perf_counter() - started)
+    return hashed_password_bytes.decode('utf-8')
+
+@timed("auth.bcrypt_verify")
+def bcrypt_verify(password, hashed_password):
+    """Returns True if plain text password matches the stored bcrypt hash."""
+    import bcrypt
+    started = time.perf_counter()
+    password_matches = bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
+    _kdf_timings["verify"].append(time.perf_counter() - started)
+    return password_matches
+
+def get_bcrypt_cost(hashed_password):
+    """Returns the cost stored in a bcrypt hash (e.g. 12 for "$2b$12$..."), or None if hash isn't in bcrypt format."""
+    try:
+        return int(hashed_password.split("$")[2])
+    except (AttributeError, IndexError, ValueError):
+        return None
+
+def get_kdf_timings():
+    """Returns count, average, and last duration (seconds) of recent bcrypt hash and verify calls."""
+    timing_summary = {}
+    for operation, durations in _kdf_timings.items():
+        recent_durations = list(durations)
+        timing_summary[operation] = {
+            "count": len(recent_durations),
+            "average_seconds": sum(recent_durations) / len(recent_durations) if recent_durations else None,
+            "last_seconds": recent_durations[-1] if recent_durations else None,
+        }
+    return timing_summary
+
+def measure_kdf_timings(samples, work_factor=BCRYPT_WORK_FACTOR):
+    """Hashes and verifies a sample password samples times with work_factor in the bcrypt thread pool (one at a time,
+       so timings are for one login on an idle machine), e.g. to check the configured cost (python cli.py metrics --kdf-samples 5).
+       Returns get_kdf_timings() plus the work factor timed.
+    """
+    bcrypt_executor = get_bcrypt_executor()
+    for _ in range(samples):
+        hashed_password = bcrypt_executor.submit(bcrypt_hash, "kdf-timing-sample", work_factor).result()
+        bcrypt_executor.submit(bcrypt_verify, "kdf-timing-sample", hashed_password).result()
+    return {"work_factor": work_factor, **get_kdf_timings()}
+
+
 # CLASS FOR USER ACCOUNT DATA REPRESENTATION (data class to create user account instances to format for storage)
 class UserAccount:
-    def __init__(self, username, hashed_password):
+    def __init__(self, username, hashed_password, session_version=0):
         self.username = username
         self.hashed_password = hashed_password
+        self.session_version = session_version      # Increased to revoke every session token issued for this account
 
     def to_dict(self):
-        """Converts UserAccount instance to a dict."""
+        """Converts UserAccount instance to a dict (in the current schema version)."""
         return {
-            "hashed_password": self.hashed_password
+            SCHEMA_VERSION_FIELD: USER_ACCOUNT_SCHEMA_VERSION,
+            "hashed_password": self.hashed_password,
+            "session_version": self.session_version,
         }
 
     @classmethod
     def from_dict(cls, username, account_data):
-        """Reconstructs a UserAccount instance from dict data."""
-        return cls(username, account_data.get("hashed_password"))
+        """Reconstructs a UserAccount instance from dict data (upgraded first if saved in an older schema version).
+           The upgraded account is only saved the next time the account changes, or by python cli.py migrate.
+        """
+        account_data = upgrade_account_data(account_data)
+        return cls(username, account_data.get("hashed_password"), account_data["session_version"])
 
     def verify_password(self, password_input):
         """Verifies password by comparing plain text password input against stored hashed password - using bcrypt."""
-        password_input_bytes = password_input.encode('utf-8')
-        stored_password_bytes = self.hashed_password.encode('utf-8')
-        return bcrypt.checkpw(password_input_bytes, stored_password_bytes)
+        return bcrypt_verify(password_input, self.hashed_password)
+
+    def verify_password_async(self, password_input):
+        """Starts verify_password in the bcrypt thread pool. Returns a Future (result is True/False)."""
+        return get_bcrypt_executor().submit(self.verify_password, password_input)
 
     def __str__(self):
         """For printing username string in app e.g. welcome back current user."""
@@ -53,30 +150,81 @@ class UserAccount:
 
 # BASE DATA MANAGER CLASS
 class BaseDataManager:
-    """BASE CLASS BaseDataManager: Handles JSON file loading and saving data."""
+    """BASE CLASS BaseDataManager: Handles JSON file loading and saving data.
+       Saves are atomic (temp file + rename) and locked, so several app processes can share the same JSON file.
+    """
     def __init__(self, json_file_path):
         self.json_file_path = json_file_path
+        self.loaded_file_stamp = None   # File (modified time, size, inode) when last loaded/saved by this process
 
+    @timed("storage.load_json_file")
     def load_json_file(self):
         """Loads data from the JSON file."""
         try:
+            self.loaded_file_stamp = get_file_stamp(self.json_file_path)
             with open(self.json_file_path, 'r') as file:
-                content = file.read().strip()
-                if not content:     # If file exists but is an empty file (usually for first time users),
-                    return {}       # Then return and create new dict in file
+                content = file.read()
+                if not content or content.isspace():    # If file exists but is an empty file (usually for first time users),
+                    return {}                           # Then return and create new dict in file
                 else:
-                    return json.loads(content)
+                    return json.loads(content)          # (not stripped first, which would copy the whole file content)
         except json.JSONDecodeError:
             raise DataFileCorruptedError(f"[red]{EMOJI_WARNING} Error loading data: Data file is corrupted or invalid.[/red]\n")
         except Exception as err:
             raise FileLoadingError(f"[red]{EMOJI_WARNING} Unexpected Error while loading file:[/red]\n") from err
 
+    @timed("storage.load_json_key")
+    def load_json_key(self, key, default=None):
+        """Loads only the value of one top level key (e.g. one user's data) from the JSON file.
+           The file is memory-mapped and other keys' values are skipped without being parsed (see json_scan.py).
+           Doesn't count as loading the file: loaded_file_stamp is unchanged, so a later save still merges the whole file.
+        """
+        try:
+            return load_json_value(self.json_file_path, key, default)
+        except FileNotFoundError:
+            return default
+        except ValueError as err:       # Includes json.JSONDecodeError, and truncated/unclosed JSON found while scanning
+            raise DataFileCorruptedError(f"[red]{EMOJI_WARNING} Error loading data: Data file is corrupted or invalid.[/red]\n") from err
+        except Exception as err:
+            raise FileLoadingError(f"[red]{EMOJI_WARNING} Unexpected Error while loading file:[/red]\n") from err
+
+    def load_json_keys(self):
+        """Returns list of (top level key, value is empty) in the JSON file, without parsing the values."""
+        try:
+            return load_json_keys(self.json_file_path)
+        except FileNotFoundError:
+            return []
+        except ValueError as err:
+            raise DataFileCorruptedError(f"[red]{EMOJI_WARNING} Error loading data: Data file is corrupted or invalid.[/red]\n") from err
+
+
+    def has_file_changed(self):
+        """Returns True if the JSON file was changed (e.g. by another app process) since this process last loaded/saved it."""
+        return get_file_stamp(self.json_file_path) != self.loaded_file_stamp
 
+
+    def merge_json_data(self, stored_data, updated_data):
+        """Merges data saved by another process (stored_data) into updated_data before saving.
+           Default keeps top level keys only found on disk, and keys in updated_data win (e.g. new user accounts).
+        """
+        for key, value in stored_data.items():
+            if key not in updated_data:
+                updated_data[key] = value
+
+
+    @timed("storage.save_json_file")
     def save_json_file(self, updated_data):
-        """Saves data to the JSON file. Returns True if save successful, otherwise raises error."""
+        """Saves data to the JSON file. Returns True if save successful, otherwise raises error.
+           If another process saved the file since it was loaded, its changes are re-read and merged into updated_data first.
+        """
         try:
-            with open(self.json_file_path, 'w') as file:
-                json.dump(updated_data, file, indent=4)
+            with locked_file(self.json_file_path):
+                current_file_stamp = get_file_stamp(self.json_file_path)
+                if current_file_stamp is not None and current_file_stamp != self.loaded_file_stamp:
+                    count("storage.save_merges")
+                    self.merge_json_data(self.load_json_file(), updated_data)
+                write_json_atomically(self.json_file_path, updated_data)
+                self.loaded_file_stamp = get_file_stamp(self.json_file_path)
             return True
         except (IOError, TypeError) as err:
             raise FileSavingError(f"[red]{EMOJI_WARNING} Error saving data:[/red]\n") from err
@@ -86,13 +234,42 @@ class BaseDataManager:
 
 # USER MANAGER CLASS
 class UserManager(BaseDataManager):
-    """Manages user account authentication, registration and user account storage."""
-    def __init__(self, json_file_path):
+    """Manages user account authentication, registration and user account storage.
+       storage_engine "json" keeps accounts in the JSON file, "sqlite" uses the indexed user_accounts table instead.
+    """
+    def __init__(self, json_file_path, storage_engine=USER_STORAGE_ENGINE, database_path=SQLITE_DATABASE_FILE, work_factor=BCRYPT_WORK_FACTOR):
         super().__init__(json_file_path)
-        self.user_accounts = self.load_json_file()
+        self.storage_engine = storage_engine
+        self.work_factor = work_factor
+        # Failed login limits, saved next to the accounts file (e.g. data_storage/login_attempts.json)
+        self.login_limiter = LoginRateLimiter(Path(json_file_path).with_name(LOGIN_ATTEMPTS_FILE_NAME))
+        self.session_signer = SessionTokenSigner(Path(json_file_path).with_name(SESSION_SECRET_FILE_NAME))
+        if storage_engine == "sqlite":
+            from core.sqlite_storage import get_database, SQLiteUserAccounts     # Imported here to avoid circular import
+            self.user_accounts = SQLiteUserAccounts(get_database(database_path), legacy_json_file_path=json_file_path)
+        else:
+            self.user_accounts = self.load_json_file()
+
+    def refresh_user_accounts(self):
+        """Reloads accounts from the JSON file only if another process has changed it since it was loaded/saved.
+           In-memory accounts are otherwise kept as the up to date copy (sqlite engine always reads the database).
+        """
+        if self.storage_engine == "json" and self.has_file_changed():
+            self.user_accounts = self.load_json_file()
+
+    def merge_json_data(self, stored_data, updated_data):
+        """Keeps accounts only found on disk (e.g. registered by another process), and for accounts in both the larger
+           session_version, so an older copy saved later (e.g. a password rehash on login) can't undo revoke_sessions().
+        """
+        super().merge_json_data(stored_data, updated_data)
+        for username, stored_account in stored_data.items():
+            stored_session_version = stored_account.get("session_version", 0)
+            if stored_session_version > updated_data[username].get("session_version", 0):
+                updated_data[username]["session_version"] = stored_session_version
 
     def is_existing_user(self, username):
         """Check if a user exists in stored accounts: Returns True if existing, otherwise False."""
+        self.refresh_user_accounts()
         return username in self.user_accounts
 
     def get_user_account(self, username):
@@ -105,17 +282,68 @@ class UserManager(BaseDataManager):
         except Exception as err:
             raise ErrorGettingUserAccount(f"[red]{EMOJI_WARNING} Unexpected Error occurred while attempting to retrieve user account.[/red]\n") from err
 
-    def authenticate_user(self, user_account, password):
-        """Authenticate a user's login credentials, returns UserAccont instance if successfully authenticated, otherwise None/error"""
+    @timed("auth.authenticate_user")
+    def authenticate_user(self, user_account, password, source=LOCAL_SOURCE):
+        """Authenticate a user's login credentials, returns UserAccont instance if successfully authenticated, otherwise None/error
+           Raises LoginRateLimitedError without checking the password if the username or source (e.g. a journal server client)
+           has had too many failed attempts (see login_limiter.py).
+           Password is verified in the bcrypt thread pool. If the stored hash uses a different cost than work_factor,
+           it is rehashed with the current cost after a successful login.
+        """
+        self.login_limiter.start_attempt(user_account.username, source)
         try:
-            if user_account.verify_password(password):
-                return user_account
-            else:
-                return None
+            password_matches = user_account.verify_password_async(password).result()
         except Exception as err:
+            self.login_limiter.record_result(user_account.username, False, source)
             raise AuthenticationError(f"[red]{EMOJI_WARNING} Error occurred while authenticating user.[/red]\n") from err
+        self.login_limiter.record_result(user_account.username, password_matches, source)
+        if not password_matches:
+            count("auth.failed_logins")
+            return None
+        if self.needs_rehash(user_account.hashed_password):
+            self.rehash_password(user_account, password)
+        return user_account
+
+    def create_session_token(self, user_account):
+        """Returns a signed session token letting user_account resume without a password (see session_tokens.py)."""
+        return self.session_signer.create_token(user_account.username, user_account.session_version)
+
+    def resume_session(self, username, session_token):
+        """Returns UserAccount if session_token is a valid, unexpired and unrevoked token for username, otherwise None.
+           Only an HMAC is checked, so resuming costs no bcrypt time.
+        """
+        try:
+            user_account = self.get_user_account(username)
+        except UserManagerError:
+            return None
+        if not self.session_signer.validate_token(session_token, username, user_account.session_version):
+            return None
+        count("auth.resumed_sessions")
+        return user_account
+
+    def revoke_sessions(self, user_account):
+        """Revokes every session token issued for user_account (on every device). Returns True if saved."""
+        user_account.session_version += 1
+        return self.add_user_account(user_account)
+
+    def needs_rehash(self, hashed_password):
+        """Returns True if stored hash was created with a different bcrypt cost than the configured work factor."""
+        return get_bcrypt_cost(hashed_password) != self.work_factor
+
+    def rehash_password(self, user_account, password):
+        """Rehashes the password with the configured work factor and saves the account. Returns True if saved.
+           A failed save doesn't stop the login, the rehash is just tried again on the next login.
+        """
+        try:
+            count("auth.rehashes")
+            user_account.hashed_password = self.hash_password(password)
+            return self.add_user_account(user_account)
+        except Exception as err:
+            print(f"[red]{EMOJI_WARNING} Could not update password hash for {user_account}: {err}[/red]\n")
+            return False
 
 
+    @timed("auth.register_user")
     def register_user(self, username, password):
         """Register a new user account with a username and hashed password, returns True if successful, otherwise False."""
         try:
@@ -127,21 +355,103 @@ class UserManager(BaseDataManager):
         except Exception as err:
             raise UserRegistrationError(f"[red]{EMOJI_WARNING} Error occurred during registration of new user account.[/red]\n") from err
 
+    def bulk_register_users(self, credentials):
+        """Registers many accounts from (username, password) pairs, e.g. for onboarding a cohort from a file.
+           Passwords are hashed in parallel and all new accounts are saved in a single write.
+           Returns report dict: number imported, list of skipped (username, reason), seconds taken and accounts per second.
+        """
+        started = time.perf_counter()
+        skipped = []
+        new_credentials = {}
+        self.refresh_user_accounts()
+        for username, password in credentials:
+            username = (username or "").strip().lower()
+            invalid_reason = get_invalid_credentials_reason(username, password or "")
+            if invalid_reason:
+                skipped.append((username, invalid_reason))
+            elif username in new_credentials or username in self.user_accounts:
+                skipped.append((username, "username already taken"))
+            else:
+                new_credentials[username] = password
+        try:
+            hashed_passwords = self.hash_passwords(list(new_credentials.values()))
+            new_accounts = [UserAccount(username, hashed_password) for username, hashed_password in zip(new_credentials, hashed_passwords)]
+            if new_accounts:
+                self.add_user_accounts(new_accounts)
+        except Exception as err:
+            raise UserRegistrationError(f"[red]{EMOJI_WARNING} Error occurred during bulk registration of user accounts.[/red]\n") from err
+        seconds_taken = time.perf_counter() - started
+        return {
+            "imported": len(new_accounts),
+            "skipped": skipped,
+            "seconds": seconds_taken,
+            "accounts_per_second": len(new_accounts) / seconds_taken if seconds_taken else 0.0,
+        }
+
     def hash_password(self, password):
-        """Hashes password using bcrypt, then returned the bcrypt hashed password as a string (so it can be stored in JSON)."""
-        password_bytes = password.encode('utf-8')
-        generated_salt = bcrypt.gensalt()
-        hashed_password_bytes = bcrypt.hashpw(password_bytes, generated_salt)
-        hashed_password = hashed_password_bytes.decode('utf-8')
-        return hashed_password
+        """Hashes password using bcrypt, then returned the bcrypt hashed password as a string (so it can be stored in JSON).
+           Hashing runs in the bcrypt thread pool with the configured work factor.
+        """
+        return self.hash_password_async(password).result()
+
+    def hash_password_async(self, password):
+        """Starts hashing password in the bcrypt thread pool. Returns a Future (result is the hashed password string)."""
+        return get_bcrypt_executor().submit(bcrypt_hash, password, self.work_factor)
+
+    def hash_passwords(self, passwords):
+        """Hashes many passwords in parallel across the bcrypt thread pool. Returns hashes in the same order."""
+        return list(get_bcrypt_executor().map(bcrypt_hash, passwords, [self.work_factor] * len(passwords)))
 
     def add_user_account(self, user_account):
-        """Adds a new user and saves accounts to the JSON file: Returns True if succesfful, otherwise raises error."""
+        """Adds a new user and saves accounts to the JSON file: Returns True if succesfful, otherwise raises error.
+           A larger session_version saved by another process is kept (see merge_json_data) and copied to user_account.
+        """
         try:
-            self.user_accounts[user_account.username] = user_account.to_dict()
-            self.save_json_file(self.user_accounts)
-            # Reload user accounts from JSON file to sync memory, so new user can login after creating acc
-            self.user_accounts = self.load_json_file()
+            self.user_accounts[user_account.username] = user_account.to_dict()   # Saved straight away by sqlite engine
+            if self.storage_engine == "json":
+                # Memory already holds the new account (plus any accounts merged in from other processes during save)
+                self.save_json_file(self.user_accounts)
+            user_account.session_version = self.user_accounts[user_account.username].get("session_version", 0)
             return True
         except Exception as err:
             raise ErrorAddingUser(f"[red]{EMOJI_WARNING} Error occurred while adding user account.[/red]\n") from err
+
+    def add_user_accounts(self, user_accounts):
+        """Adds many new users and saves them in one write (one transaction for sqlite engine): Returns True if successful."""
+        try:
+            new_accounts = {user_account.username: user_account.to_dict() for user_account in user_accounts}
+            if self.storage_engine == "sqlite":
+                self.user_accounts.update_many(new_accounts)
+            else:
+                self.user_accounts.update(new_accounts)
+                self.save_json_file(self.user_accounts)
+            return True
+        except Exception as err:
+            raise ErrorAddingUser(f"[red]{EMOJI_WARNING} Error occurred while adding user accounts.[/red]\n") from err
+
+    def upgrade_user_accounts(self):
+        """Saves every account stored in an older schema version in the current version (in one write).
+           Returns number of accounts upgraded.
+        """
+        self.refresh_user_accounts()
+        outdated_accounts = [
+            UserAccount.from_dict(username, account_data) for username, account_data in self.user_accounts.items()
+            if USER_ACCOUNT_SCHEMA.needs_upgrade(account_data)
+        ]
+        if outdated_accounts:
+            self.add_user_accounts(outdated_accounts)
+        return len(outdated_accounts)
+
+
+# CREDENTIAL VALIDATION HELPER
+def get_invalid_credentials_reason(username, password):
+    """Checks username/password against the account rules. Returns reason string if invalid, otherwise None."""
+    if not USERNAME_MIN_LENGTH <= len(username) <= USERNAME_MAX_LENGTH:
+        return f"username must be between {USERNAME_MIN_LENGTH}-{USERNAME_MAX_LENGTH} characters"
+    if " " in username:
+        return "username cannot contain spaces"
+    if not PASSWORD_MIN_LENGTH <= len(password) <= PASSWORD_MAX_LENGTH:
+        return f"password must be between {PASSWORD_MIN_LENGTH}-{PASSWORD_MAX_LENGTH} characters"
+    if " " in password:
+        return "password cannot contain spaces"
+    return None
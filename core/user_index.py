@@ -0,0 +1,73 @@
+# user_index.py
+# BASE CLASS FOR PER-USER INDEXES/AGGREGATES SAVED NEXT TO THE JOURNAL (e.g. search index, mood summary)
+
+# IMPORT BUILT IN LIBRARIES:
+import json
+from pathlib import Path
+from urllib.parse import quote
+
+# IMPORT CUSTOM CORE MODULES:
+from core.safe_file_io import write_json_atomically
+from ui.emojis import EMOJI_WARNING
+
+# IMPORT CUSTOM EXCEPTION CLASSES:
+from core.exception_classes import FileLoadingError, FileSavingError
+
+
+# BASE USER INDEX CLASS
+class UserIndex:
+    """BASE CLASS UserIndex: Data built from one user's journal entries, updated one entry at a time and saved as JSON.
+       entry_count is compared with the number of stored entries to tell if the index is out of date and needs a rebuild.
+       Subclasses set FILE_SUFFIX and implement reset(), add_entry(), get_index_data() and set_index_data().
+    """
+    FILE_SUFFIX = ".index.json"
+
+    def __init__(self, username, index_dir):
+        self.index_path = Path(index_dir) / f"{quote(username, safe='')}{self.FILE_SUFFIX}"
+        self.entry_count = 0    # Number of entries included (position of next entry)
+        self.reset()
+
+    def reset(self):
+        """Clears index data (before a rebuild)."""
+        raise NotImplementedError
+
+    def add_entry(self, entry_dict):
+        """Updates index with the user's next entry dict."""
+        raise NotImplementedError
+
+    def get_index_data(self):
+        """Returns index data as a dict for saving to JSON."""
+        raise NotImplementedError
+
+    def set_index_data(self, index_data):
+        """Restores index data from a dict loaded from JSON."""
+        raise NotImplementedError
+
+    def load(self):
+        """Loads saved index from file, returns True if found, otherwise False (index needs building)."""
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as file:
+                index_data = json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return False        # Missing or damaged (saved without flushing to disk, see save), so rebuilt from entries
+        except OSError as err:
+            raise FileLoadingError(f"[red]{EMOJI_WARNING} Error loading {self.index_path.name}:[/red]\n") from err
+        self.entry_count = index_data.pop("entry_count", 0)
+        self.set_index_data(index_data)
+        return True
+
+    def save(self):
+        """Saves index to file. Not flushed to disk (an index lost in a power cut is rebuilt from the user's entries)."""
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            write_json_atomically(self.index_path, {"entry_count": self.entry_count, **self.get_index_data()}, durable=False)
+        except Exception as err:
+            raise FileSavingError(f"[red]{EMOJI_WARNING} Error saving {self.index_path.name}:[/red]\n") from err
+        return True
+
+    def rebuild(self, entry_dicts):
+        """Rebuilds index from all of the user's entry dicts (oldest first)."""
+        self.reset()
+        self.entry_count = 0
+        for entry_dict in entry_dicts:
+            self.add_entry(entry_dict)
@@ -2,16 +2,18 @@
 # FOR CREATING & VIEWING JOURNAL ENTRIES LOGIC AND FLOW
 
 # IMPORT BUILT IN LIBRARIES:
-import random
+import math
+from datetime import date, datetime, time, timedelta
 
 # IMPORT THIRD-PARTY LIBRARIES:
 from rich.console import Console
+from rich.table import Table
 
 # IMPORT CUSTOM CORE MODULES:
-from core.journal_models import JournalManager, JournalEntry
+from core.journal_models import JournalManager, JournalEntry, display_entries
 from core.user_auth_models import UserManager
 from core.helpers import display_menu, get_menu_choice, get_valid_input
-from core.quotes import encouragement_quotes
+from core.quote_engine import QuoteLibrary, QuoteShuffleBag
 from ui.styling import display_journal_banner
 from ui.emojis import (
     EMOJI_CREATE_ENTRY,
@@ -28,7 +30,13 @@ from ui.emojis import (
     EMOJI_SUCCESSFUL,
     EMOJI_WARNING,
     EMOJI_ENCOURAGEMENT,
-    EMOJI_SAVE
+    EMOJI_SAVE,
+    EMOJI_NEXT_PAGE,
+    EMOJI_PREVIOUS_PAGE,
+    EMOJI_SEARCH,
+    EMOJI_DATE_RANGE,
+    EMOJI_MOOD_SUMMARY,
+    EMOJI_ROCKET
     )
 
 
@@ -42,12 +50,30 @@ from core.exception_classes import JournalCreationError
 # For rich console printing
 console = Console()
 
+# Encouragement quotes (quote packs for a mood are loaded the first time that mood is chosen)
+quote_library = QuoteLibrary()
+
 # JOURNAL MENU OPTIONS (Dict based menu)
 JOURNAL_MENU = {
     "1": f"{EMOJI_CREATE_ENTRY} Create a Journal Entry",
     "2": f"{EMOJI_VIEW_ENTRIES} View Past Journal Entries",
-    "3": f"{EMOJI_LOGOUT} Logout"
+    "3": f"{EMOJI_SEARCH} Search Journal Entries",
+    "4": f"{EMOJI_DATE_RANGE} View Journal Entries by Date Range",
+    "5": f"{EMOJI_MOOD_SUMMARY} View Mood Summary",
+    "6": f"{EMOJI_LOGOUT} Logout"
+}
+
+# NUMBER OF JOURNAL ENTRIES SHOWN PER PAGE WHEN VIEWING PAST ENTRIES
+JOURNAL_PAGE_SIZE = 5
+
+# DATE RANGE MENU OPTIONS (ranges worked out from today's date in get_date_range)
+DATE_RANGE_MENU = {
+    "1": "Last 7 Days",
+    "2": "This Month",
+    "3": "Last Month",
+    "4": "Custom Date Range",
 }
+DATE_INPUT_FORMAT = "%d-%m-%Y"      # Same day-month-year order as entry display
 
 # MOOD RATINGS
 """For simple input prompt, dict key holds tuple of emoji + label."""
@@ -61,9 +87,10 @@ MOOD_RATINGS = {
 
 
 # MAIN FUNCTION TO START JOURNAL
-def run_journal(current_user):
+def run_journal(current_user, journal_manager=None):
+    """Runs the journal menu for the logged in user. journal_manager is e.g. a RemoteJournalManager when using the journal server."""
     display_journal_banner()
-    journal_manager = JournalManager(JOURNAL_ENTRIES_JSON_FILE, current_user)
+    journal_manager = journal_manager or JournalManager(JOURNAL_ENTRIES_JSON_FILE, current_user)
     console.print(f"Welcome back {current_user} to your Journal {EMOJI_WRITE}\n")
     while True:
         display_menu(JOURNAL_MENU)
@@ -75,6 +102,16 @@ def run_journal(current_user):
             console.print(f"{EMOJI_VIEW_ENTRIES} You have chosen to View Past Journal Entries.\n")
             view_journal_entries(journal_manager)
         elif menu_choice == "3":
+            console.print(f"{EMOJI_SEARCH} You have chosen to Search Journal Entries.\n")
+            search_journal_entries(journal_manager)
+        elif menu_choice == "4":
+            console.print(f"{EMOJI_DATE_RANGE} You have chosen to View Journal Entries by Date Range.\n")
+            view_entries_by_date_range(journal_manager)
+        elif menu_choice == "5":
+            console.print(f"{EMOJI_MOOD_SUMMARY} You have chosen to View Mood Summary.\n")
+            view_mood_summary(journal_manager)
+        elif menu_choice == "6":
+            journal_manager.close()     # Writes any entries still waiting in write-behind storage before logging out
             console.print(f"{EMOJI_WAVE} Thanks for using Mindful Moments. Goodbye and see you next time {current_user}!\n")
             break
 
@@ -85,7 +122,8 @@ def create_journal_entry(journal_manager: JournalManager):
     console.print(f"{EMOJI_HOURGLASS} Take a moment to reflect on your day...(Daily Mood, Wins, Challenges, Gratitude and Goal for tomorrow)\n")
     try:
         console.print("How are you feeling today? Choose your Mood Rating: [1, 2, 3, 4 or 5]\n")
-        mood_label = get_user_mood_selection(MOOD_RATINGS, encouragement_quotes)
+        quote_bag = QuoteShuffleBag(quote_library, journal_manager.current_user.username)
+        mood_label = get_user_mood_selection(MOOD_RATINGS, quote_bag)
         print()
         wins_input = get_valid_input("\nWhat went well today? \n")
         challenges_input = get_valid_input("\nWhat were the challenges you faced today? \n")
@@ -103,26 +141,144 @@ def create_journal_entry(journal_manager: JournalManager):
     except Exception as err:
         console.print(f"[red]{EMOJI_WARNING} Unexpected error during creating your journal entry[/red]\n")
 
-def get_user_mood_selection(mood_ratings, encouragement_quotes):
-    """Handles mood selection, menu display and random selection to display respective mood encouragement quote."""
+def get_user_mood_selection(mood_ratings, quote_bag):
+    """Handles mood selection, menu display and shows the next encouragement quote for the mood from the user's quote bag."""
     display_menu(MOOD_RATINGS)
     mood_key = get_menu_choice(MOOD_RATINGS)
     emoji, mood_label = MOOD_RATINGS[mood_key]
     console.print(f"\n[bold bright_cyan]You have rated your daily mood as: {emoji} {mood_label}[bold bright_cyan]")
-    mood_encouragement = random.choice(encouragement_quotes[mood_key])
-    console.print(f"\n[magenta italic]{EMOJI_ENCOURAGEMENT} {mood_encouragement}[/magenta italic]\n")
+    mood_encouragement = quote_bag.next_quote(mood_key)
+    if mood_encouragement:
+        console.print(f"\n[magenta italic]{EMOJI_ENCOURAGEMENT} {mood_encouragement}[/magenta italic]\n")
     return mood_label
 
 # VIEW PAST JOURNAL ENTRIES FLOW:
 def view_journal_entries(journal_manager):
-    all_user_entries = journal_manager.get_user_entries()
-    if not all_user_entries:
+    """Displays past entries one page at a time (newest first), only loading and rendering entries on the current page."""
+    total_entries = journal_manager.count_user_entries()
+    if not total_entries:
         console.print(f"[red]{EMOJI_WARNING} Sorry! No journal entries found.[/red]\n")
         return
-    for entry in all_user_entries:
-        entry.display_entry()
-        console.print("=" * 60)
-        print()     # returns back to main after
+    display_entry_pages(total_entries, lambda offset, limit: journal_manager.iter_user_entries(offset=offset, limit=limit))
+
+# SEARCH JOURNAL ENTRIES FLOW:
+def search_journal_entries(journal_manager):
+    """Prompts for search words and displays matching entries (entries containing every word), newest first."""
+    search_query = get_valid_input("Enter word(s) to search for: ", field_name="Search", min_length=1, max_length=100)
+    matching_entries = journal_manager.search(search_query)
+    if not matching_entries:
+        console.print(f"[red]{EMOJI_WARNING} Sorry! No journal entries found containing '{search_query}'.[/red]\n")
+        return
+    console.print(f"[green]{EMOJI_SUCCESSFUL} Found {len(matching_entries)} journal entries containing '{search_query}'.[/green]\n")
+    display_entry_pages(len(matching_entries), lambda offset, limit: matching_entries[offset:offset + limit])
+
+# VIEW JOURNAL ENTRIES BY DATE RANGE FLOW:
+def view_entries_by_date_range(journal_manager):
+    """Prompts for a date range (preset or custom) and displays entries created in it, newest first."""
+    display_menu(DATE_RANGE_MENU)
+    range_choice = get_menu_choice(DATE_RANGE_MENU)
+    if range_choice == "4":
+        start_date = get_valid_date("Enter start date (DD-MM-YYYY): ")
+        end_date = get_valid_date("Enter end date (DD-MM-YYYY): ")
+        if end_date < start_date:
+            start_date, end_date = end_date, start_date
+    else:
+        start_date, end_date = get_date_range(range_choice, date.today())
+    range_text = f"{start_date.strftime(DATE_INPUT_FORMAT)} to {end_date.strftime(DATE_INPUT_FORMAT)}"
+    # Whole days: from the start of start_date to the end of end_date
+    matching_entries = journal_manager.get_entries_between(datetime.combine(start_date, time.min), datetime.combine(end_date, time.max))
+    if not matching_entries:
+        console.print(f"[red]{EMOJI_WARNING} Sorry! No journal entries found from {range_text}.[/red]\n")
+        return
+    console.print(f"[green]{EMOJI_SUCCESSFUL} Found {len(matching_entries)} journal entries from {range_text}.[/green]\n")
+    matching_entries.reverse()      # Newest first, as when viewing past entries
+    display_entry_pages(len(matching_entries), lambda offset, limit: matching_entries[offset:offset + limit])
+
+def get_date_range(range_choice, today):
+    """Returns (start date, end date) for a preset DATE_RANGE_MENU choice, relative to today."""
+    if range_choice == "1":
+        return today - timedelta(days=6), today
+    first_of_month = today.replace(day=1)
+    if range_choice == "2":
+        return first_of_month, today
+    last_of_previous_month = first_of_month - timedelta(days=1)
+    return last_of_previous_month.replace(day=1), last_of_previous_month
+
+def get_valid_date(prompt):
+    """Prompts until a valid DD-MM-YYYY date is entered, returns it as a date."""
+    while True:
+        date_input = get_valid_input(prompt, field_name="Date", allow_spaces=False, min_length=8, max_length=10)
+        try:
+            return datetime.strptime(date_input, DATE_INPUT_FORMAT).date()
+        except ValueError:
+            console.print(f"[red]{EMOJI_WARNING} Invalid date. Please enter a date as DD-MM-YYYY, e.g. 25-06-2025.[/red]\n")
+
+def display_entry_pages(total_entries, get_page_entries):
+    """Displays entries JOURNAL_PAGE_SIZE at a time with Next/Previous navigation.
+       get_page_entries(offset, limit) returns the entries for a page, so only the current page is loaded and rendered.
+       Each page is printed in one write, and pages viewed before come from the entry render cache.
+    """
+    total_pages = math.ceil(total_entries / JOURNAL_PAGE_SIZE)
+    page_number = 0
+    while True:
+        display_entries(get_page_entries(page_number * JOURNAL_PAGE_SIZE, JOURNAL_PAGE_SIZE), separator="=" * 60)
+        console.print(f"[bold cyan]Page {page_number + 1} of {total_pages} ({total_entries} entries)[/bold cyan]\n")
+        page_menu = get_page_menu(page_number, total_pages)
+        display_menu(page_menu)
+        page_choice = get_menu_choice(page_menu, prompt=f"Choose a page option. Enter {', '.join(page_menu)}: ")
+        if page_choice == "n":
+            page_number += 1
+        elif page_choice == "p":
+            page_number -= 1
+        else:
+            return      # returns back to journal menu
+
+def get_page_menu(page_number, total_pages):
+    """Builds page navigation menu, only including Next/Previous options when there is a page to move to."""
+    page_menu = {}
+    if page_number < total_pages - 1:
+        page_menu["n"] = f"{EMOJI_NEXT_PAGE} Next Page (Older Entries)"
+    if page_number > 0:
+        page_menu["p"] = f"{EMOJI_PREVIOUS_PAGE} Previous Page (Newer Entries)"
+    page_menu["b"] = f"{EMOJI_LOGOUT} Back to Journal Menu"
+    return page_menu
+
+# VIEW MOOD SUMMARY FLOW:
+def view_mood_summary(journal_manager):
+    """Displays mood distribution, average mood per week/month, journaling streaks and recent mood trend."""
+    mood_summary = journal_manager.get_mood_summary()
+    if not mood_summary["entry_count"]:
+        console.print(f"[red]{EMOJI_WARNING} Sorry! No journal entries found to summarise yet.[/red]\n")
+        return
+    mood_emojis = {label: emoji for emoji, label in MOOD_RATINGS.values()}
+
+    distribution_table = Table(title=f"{EMOJI_MOOD_SUMMARY} Mood Summary ({mood_summary['entry_count']} entries)\n", show_lines=True)
+    distribution_table.add_column("Mood Rating", style="cyan")
+    distribution_table.add_column("Entries", style="magenta", justify="right")
+    distribution_table.add_column("", style="magenta")
+    for mood_label, mood_count in mood_summary["mood_counts"].items():
+        bar = "█" * round(20 * mood_count / mood_summary["entry_count"])
+        distribution_table.add_row(f"{mood_emojis.get(mood_label, '')} {mood_label}", str(mood_count), bar)
+    console.print(distribution_table)
+
+    averages_table = Table(title="Average Mood (1-5)\n", show_lines=True)
+    averages_table.add_column("Period", style="cyan")
+    averages_table.add_column("Average", style="magenta", justify="right")
+    if mood_summary["average_score"] is not None:
+        averages_table.add_row("All entries", f"{mood_summary['average_score']:.1f}")
+    for period_key, average_score in mood_summary["weekly_averages"] + mood_summary["monthly_averages"]:
+        averages_table.add_row(period_key, f"{average_score:.1f}")
+    console.print(averages_table)
+
+    trend_messages = {
+        "improving": "Your mood has been improving lately - keep it up!",
+        "declining": "Your mood has dipped lately - be kind to yourself.",
+        "steady": "Your mood has been steady lately.",
+        None: "Keep journaling to see your mood trend.",
+    }
+    console.print(f"\n[bold cyan]{EMOJI_ROCKET} Current streak: {mood_summary['current_streak']} day(s) | Longest streak: {mood_summary['longest_streak']} day(s)[/bold cyan]")
+    console.print(f"[magenta italic]{EMOJI_ENCOURAGEMENT} {trend_messages[mood_summary['trend']]}[/magenta italic]\n")
+
 
 
 # RUN THE JOURNAL - This is launched from the main after authenticated user login - links data to store to current user.
@@ -2,6 +2,7 @@
 # To activate VENV note (to remove later) source .venv/bin/activate
 
 # IMPORT BUILT IN LIBRARIES:
+import argparse
 import sys
 import getpass
 
@@ -10,9 +11,9 @@ from rich import print
 from rich.console import Console
 
 # IMPORT CUSTOM MODULES:
-from core.user_auth_models import UserManager
+from core.user_auth_models import UserManager, USERNAME_MIN_LENGTH, USERNAME_MAX_LENGTH, PASSWORD_MIN_LENGTH, PASSWORD_MAX_LENGTH
 from core.helpers import display_menu, get_menu_choice, retry_prompt, get_valid_input
-from ui.styling import display_welcome_banner
+from ui.styling import display_welcome_banner, set_banner_mode
 from ui.emojis import (
     EMOJI_LOGIN,
     EMOJI_CREATE_USER,
@@ -25,7 +26,7 @@ from ui.emojis import (
     EMOJI_WAVE
 )
 
-from journal import run_journal
+from core.session_tokens import SESSION_TOKEN_DAYS, save_session_token, load_session_token, delete_session_token
 
 # IMPORT CONSTANT FILE PATHS
 from core.file_paths import USER_ACCOUNTS_JSON_FILE
@@ -36,6 +37,7 @@ from core.exception_classes import (
     ErrorGettingUserAccount,
     AccountRegistrationError,
     AuthenticationError,
+    LoginRateLimitedError,
     )
 
 # For rich console printing
@@ -49,7 +51,37 @@ WELCOME_MENU = {
 }
 
 # INSTANCE OF UserManager: Used to handle user login authentication and registration of new user accounts
-user_manager = UserManager(USER_ACCOUNTS_JSON_FILE)
+# Created on first use (get_user_manager), so the accounts file isn't loaded until the user logs in or registers
+user_manager = None
+
+# CONNECTION TO THE JOURNAL SERVER (python main.py --server), None when the app loads the data files itself
+journal_client = None
+
+def get_user_manager():
+    """Returns the shared UserManager instance, creating it on first use (sends calls to the journal server if connected)."""
+    global user_manager
+    if user_manager is None:
+        if journal_client:
+            from core.journal_client import RemoteUserManager
+            user_manager = RemoteUserManager(journal_client)
+        else:
+            user_manager = UserManager(USER_ACCOUNTS_JSON_FILE)
+    return user_manager
+
+def get_journal_manager(current_user):
+    """Returns a RemoteJournalManager for the logged in user if connected to the journal server, otherwise None
+       (run_journal then creates a JournalManager that loads the journal file).
+    """
+    if journal_client:
+        from core.journal_client import RemoteJournalManager
+        return RemoteJournalManager(journal_client, current_user)
+    return None
+
+def connect_to_server():
+    """Connects to the journal server (python cli.py serve), so this app runs as a thin client of it."""
+    global journal_client
+    from core.journal_client import JournalClient
+    journal_client = JournalClient()
 
 
 # APP ENTRY POINT & MAIN FUNCTION TO START APP
@@ -65,7 +97,8 @@ def main():
                 console.print(f"\n You have chosen to Login\n")
                 current_user = login()
                 if current_user:
-                    run_journal(current_user)   # Pass logged in current user to uesr's journal
+                    from journal import run_journal     # Imported on first login, as journal modules are slow to import
+                    run_journal(current_user, get_journal_manager(current_user))   # Pass logged in current user to uesr's journal
             elif menu_choice == "2":
                 console.print(f"\n You have chosen to Create a New User Account\n")
                 create_new_account()
@@ -84,7 +117,7 @@ def login():
     while True:
         username_input = get_valid_input("Enter your username: ").strip().lower()
         try:
-            user_account = user_manager.get_user_account(username_input)   # Gets and returns user account object, if exists
+            user_account = get_user_manager().get_user_account(username_input)   # Gets and returns user account object, if exists
         except UserNotFoundError as err:
             console.print(f"[red]{EMOJI_WARNING} User not found. Please try again.[/red]")
             if not retry_prompt():
@@ -99,15 +132,23 @@ def login():
             console.print(f"[red]{EMOJI_WARNING} Unexpected error: {err}[/red]")
             return None
 
+        resumed_user = resume_saved_session(username_input)
+        if resumed_user:
+            return resumed_user
 
         while True:
             password_input = getpass.getpass("Enter your password: ").strip()
             try:
-                authenticated_user = user_manager.authenticate_user(user_account, password_input)
+                with console.status("Verifying password..."):     # bcrypt runs in background thread pool while spinner shows
+                    authenticated_user = get_user_manager().authenticate_user(user_account, password_input)
                 if authenticated_user:
                     console.print(f"[green]{EMOJI_SUCCESSFUL} Login Successful.[/green]\n")
                     console.print(f"\n{EMOJI_AUTHENTICATED} Welcome back {authenticated_user}!\n")
+                    offer_to_stay_logged_in(authenticated_user)
                     return authenticated_user    # Returns to parse through to run journal for current user
+            except LoginRateLimitedError as err:
+                console.print(str(err))     # Too many failed attempts: password wasn't checked, back to main menu
+                return None
             except AuthenticationError:
                     console.print(f"[red]{EMOJI_INVALID} Login Unsuccessful. Incorrect password.[/red]\n")
                     if not retry_prompt():
@@ -115,6 +156,36 @@ def login():
                     continue
     
 
+def resume_saved_session(username):
+    """Returns the user's account if this device has a valid saved session token for them (skips the password), otherwise None.
+       Expired or revoked tokens are deleted.
+    """
+    session_token = load_session_token(username)
+    if not session_token:
+        return None
+    try:
+        resumed_user = get_user_manager().resume_session(username, session_token)
+    except Exception:
+        return None     # e.g. journal server unavailable, ask for the password instead
+    if not resumed_user:
+        delete_session_token(username)
+        console.print(f"[yellow]{EMOJI_WARNING} Your saved login has expired. Please enter your password.[/yellow]\n")
+        return None
+    console.print(f"[green]{EMOJI_SUCCESSFUL} Logged in with your saved login on this device.[/green]\n")
+    console.print(f"\n{EMOJI_AUTHENTICATED} Welcome back {resumed_user}!\n")
+    return resumed_user
+
+def offer_to_stay_logged_in(authenticated_user):
+    """Asks if the user wants to stay logged in on this device, and saves a session token if so."""
+    if not retry_prompt(f"{EMOJI_LOGIN} Stay logged in on this device for {SESSION_TOKEN_DAYS} days? [y/n]: "):
+        return
+    try:
+        save_session_token(authenticated_user.username, get_user_manager().create_session_token(authenticated_user))
+        console.print(f"[green]{EMOJI_SUCCESSFUL} You will stay logged in. To log out on every device use: python cli.py revoke-sessions[/green]\n")
+    except Exception as err:
+        console.print(f"[red]{EMOJI_WARNING} Could not save your login: {err}[/red]\n")
+
+
 def create_new_account():
     """Handles creating new account flow to get validated username and password.
        Registers a new account on completion, otherwise exits to main if user cancels or error.
@@ -128,7 +199,7 @@ def create_new_account():
         if password is None:
             return      # User chose to cancel during password, return back to main menu
         try:
-            if user_manager.register_user(username, password):
+            if get_user_manager().register_user(username, password):
                 console.print(f"[green]{EMOJI_SUCCESSFUL} Your user account is successfully created.\n{EMOJI_LOGIN} You can now Login from the main menu![/green]\n")
                 return None
             else:
@@ -149,10 +220,10 @@ def get_valid_username():
             prompt="Choose a Username: ",
             field_name="Username",
             allow_spaces=False,
-            min_length= 5,
-            max_length=20
+            min_length=USERNAME_MIN_LENGTH,
+            max_length=USERNAME_MAX_LENGTH
         ).lower()
-        if user_manager.is_existing_user(username):     # Checks if username exists using user manager methods
+        if get_user_manager().is_existing_user(username):     # Checks if username exists using user manager methods
             console.print(f"[red]{EMOJI_WARNING} Sorry! That Username is already taken. Please choose a different username.[/red]\n")
             if not retry_prompt():
                 return None
@@ -167,8 +238,8 @@ def get_valid_password():
             prompt="Choose a password: ",
             field_name="Password",
             allow_spaces=False,
-            min_length= 8,
-            max_length=16,
+            min_length=PASSWORD_MIN_LENGTH,
+            max_length=PASSWORD_MAX_LENGTH,
             hide_input=True
         )
         confirm_password = getpass.getpass("Confirm your password: ").strip()
@@ -181,6 +252,29 @@ def get_valid_password():
                 return None
             
             
+# COMMAND LINE OPTIONS
+def parse_args(args=None):
+    """Parses command line options, e.g. python main.py --no-banner"""
+    parser = argparse.ArgumentParser(description="Mindful Moments - Your Personal Reflection Journaling App")
+    banner_options = parser.add_mutually_exclusive_group()
+    banner_options.add_argument("--no-banner", dest="banner_mode", action="store_const", const="off",
+                                help="don't display welcome banners (fastest startup)")
+    banner_options.add_argument("--static-banner", dest="banner_mode", action="store_const", const="static",
+                                help="display welcome banners without animation")
+    parser.set_defaults(banner_mode="animated")
+    parser.add_argument("--server", action="store_true",
+                        help="use the running journal server (python cli.py serve) instead of loading the data files")
+    return parser.parse_args(args)
+
+
 # RUN THE PROGRAM
 if __name__ == "__main__":
+    command_line_options = parse_args()
+    set_banner_mode(command_line_options.banner_mode)
+    if command_line_options.server:
+        try:
+            connect_to_server()
+        except Exception as err:
+            console.print(str(err))
+            sys.exit(1)
     main()
\ No newline at end of file
@@ -0,0 +1,160 @@
+# benchmark_suite.py
+
+# BENCHMARK SUITE (not run by pytest)
+# Times storage, authentication and rendering hot paths on synthetic data (N users x M entries per user) and saves
+# the results as JSON, so results from different versions can be compared. Run from the project root:
+#   python testing/benchmark_suite.py --users 200 --entries 100 --output benchmark_results.json
+#   python testing/benchmark_suite.py --compare benchmark_results.json      (compare with an earlier run)
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+# Add the project root to the Python path so we can import from core
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from synthetic_data import (SYNTHETIC_PASSWORD, get_username, generate_entry_dicts, create_user_accounts,
+                            create_journal_storage, fill_journal_storage)
+from core.user_auth_models import UserManager
+from core.journal_models import JournalManager, JournalEntry, render_entry
+
+JOURNAL_BACKENDS = ["json", "log", "sharded", "sqlite"]
+
+
+def measure(function, repeat, setup=None):
+    """Calls function repeat times (calling setup() first each time, not timed). Returns timing summary in milliseconds (min/median/mean per call)."""
+    call_times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        function()
+        call_times.append((time.perf_counter() - start) * 1000)
+    return {
+        "min_ms": round(min(call_times), 4),
+        "median_ms": round(statistics.median(call_times), 4),
+        "mean_ms": round(statistics.fmean(call_times), 4),
+        "calls": repeat,
+    }
+
+
+def benchmark_user_manager(data_dir, user_count, work_factor, repeat):
+    """UserManager load (N accounts), register_user and authenticate_user."""
+    accounts_path = Path(data_dir) / "user_accounts.json"
+    create_user_accounts(accounts_path, user_count, work_factor)
+    user_manager = UserManager(accounts_path, work_factor=work_factor)
+    register_numbers = iter(range(user_count, user_count + repeat))
+    user_account = user_manager.get_user_account(get_username(0))
+    return {
+        "user_manager_load": measure(lambda: UserManager(accounts_path, work_factor=work_factor), repeat),
+        "register_user": measure(lambda: user_manager.register_user(get_username(next(register_numbers)), SYNTHETIC_PASSWORD), repeat),
+        "authenticate_user": measure(lambda: user_manager.authenticate_user(user_account, SYNTHETIC_PASSWORD), repeat),
+    }
+
+
+def benchmark_journal_backend(data_dir, backend, user_count, entries_per_user, repeat):
+    """save_journal_entry and get_user_entries (new storage instance each call, as after login) for one storage backend."""
+    backend_dir = Path(data_dir) / backend
+    backend_dir.mkdir()
+    fill_journal_storage(create_journal_storage(backend_dir, backend), user_count, entries_per_user)
+    current_user = UserManager(Path(data_dir) / "user_accounts.json").get_user_account(get_username(0))
+
+    def load_user_entries():
+        JournalManager(backend_dir / "journal_entries.json", current_user, storage=create_journal_storage(backend_dir, backend),
+                       index_dir=backend_dir / "user_indexes").get_user_entries()
+
+    journal_manager = JournalManager(backend_dir / "journal_entries.json", current_user,
+                                     storage=create_journal_storage(backend_dir, backend), index_dir=backend_dir / "user_indexes")
+    journal_manager.get_mood_summary()      # Builds user indexes first, so saves only time incremental index updates
+    new_entries = iter(JournalEntry.from_dict(entry_dict) for entry_dict in generate_entry_dicts(entries_per_user + repeat)[entries_per_user:])
+    return {
+        f"get_user_entries[{backend}]": measure(load_user_entries, repeat),
+        f"save_journal_entry[{backend}]": measure(lambda: journal_manager.save_journal_entry(next(new_entries)), repeat),
+    }
+
+
+def benchmark_display_entry(repeat):
+    """Displaying one journal entry table with rich (output discarded): cold renders the table each call (render cache
+       cleared first), cached only prints the table already rendered.
+    """
+    journal_entry = JournalEntry.from_dict(generate_entry_dicts(1)[0])
+    with contextlib.redirect_stdout(io.StringIO()):
+        return {
+            "display_entry_cold": measure(journal_entry.display_entry, repeat, setup=render_entry.cache_clear),
+            "display_entry_cached": measure(journal_entry.display_entry, repeat),
+        }
+
+
+def run_benchmarks(user_count, entries_per_user, work_factor, repeat, backends=JOURNAL_BACKENDS):
+    """Runs every benchmark on fresh synthetic data in a temporary folder. Returns results dict (saved as JSON)."""
+    results = {}
+    with tempfile.TemporaryDirectory() as data_dir:
+        results.update(benchmark_user_manager(data_dir, user_count, work_factor, repeat))
+        for backend in backends:
+            results.update(benchmark_journal_backend(data_dir, backend, user_count, entries_per_user, repeat))
+    results.update(benchmark_display_entry(repeat))
+    return {
+        "run": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "git_commit": get_git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "parameters": {"users": user_count, "entries_per_user": entries_per_user, "work_factor": work_factor, "repeat": repeat},
+        "results": results,
+    }
+
+
+def get_git_commit():
+    """Returns current git commit hash of the project, or None if not available."""
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=project_root,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(benchmark_run, previous_run=None):
+    """Prints median time per benchmark, with change from previous_run's median if given."""
+    previous_results = previous_run["results"] if previous_run else {}
+    print(f"\n{'Benchmark':<32} {'Median ms':>12} {'Change':>10}")
+    for benchmark_name, timing in benchmark_run["results"].items():
+        change = ""
+        if benchmark_name in previous_results and previous_results[benchmark_name]["median_ms"]:
+            change = f"{100 * (timing['median_ms'] / previous_results[benchmark_name]['median_ms'] - 1):+.1f}%"
+        print(f"{benchmark_name:<32} {timing['median_ms']:>12.3f} {change:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Mindful Moments storage, authentication and rendering")
+    parser.add_argument("--users", type=int, default=100, help="number of synthetic users (default: %(default)s)")
+    parser.add_argument("--entries", type=int, default=100, help="journal entries per user (default: %(default)s)")
+    parser.add_argument("--work-factor", type=int, default=4,
+                        help="bcrypt work factor for synthetic accounts (default: %(default)s, the app uses 12)")
+    parser.add_argument("--repeat", type=int, default=20, help="calls timed per benchmark (default: %(default)s)")
+    parser.add_argument("--backends", nargs="+", choices=JOURNAL_BACKENDS, default=JOURNAL_BACKENDS,
+                        help="journal storage backends to benchmark (default: all)")
+    parser.add_argument("--output", type=Path, default=Path("benchmark_results.json"),
+                        help="JSON file to save results to (default: %(default)s)")
+    parser.add_argument("--compare", type=Path, help="earlier results JSON file to compare with")
+    args = parser.parse_args()
+
+    previous_run = json.loads(args.compare.read_text()) if args.compare else None
+    benchmark_run = run_benchmarks(args.users, args.entries, args.work_factor, args.repeat, args.backends)
+    print_results(benchmark_run, previous_run)
+    args.output.write_text(json.dumps(benchmark_run, indent=4))
+    print(f"\nResults saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# startup_benchmark.py
+
+# STARTUP BENCHMARK (not run by pytest)
+# Measures import time of the app's entry point modules in fresh Python processes using "python -X importtime",
+# so slow imports at startup can be tracked. Run from the project root:
+#   python testing/startup_benchmark.py
+#   python testing/startup_benchmark.py --runs 10 --top 20 --json startup_results.json
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+
+# Modules imported when each command starts
+STARTUP_MODULES = ["main", "cli", "journal"]
+
+
+def measure_import_times(module_name):
+    """Imports module_name in a new Python process. Returns {imported module: cumulative import time in microseconds}."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module_name}"],
+        cwd=project_root, capture_output=True, text=True, check=True
+    )
+    import_times = {}
+    for line in result.stderr.splitlines():
+        # Lines look like: "import time:       215 |       6253 |   core.user_auth_models"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, imported_module = line[len("import time:"):].split("|")
+        import_times[imported_module.strip()] = int(cumulative_us)
+    return import_times
+
+
+def benchmark_module(module_name, runs):
+    """Returns the fastest cumulative import time (microseconds) per imported module over several runs."""
+    best_times = {}
+    for _ in range(runs):
+        for imported_module, cumulative_us in measure_import_times(module_name).items():
+            best_times[imported_module] = min(cumulative_us, best_times.get(imported_module, cumulative_us))
+    return best_times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure Mindful Moments startup import times")
+    parser.add_argument("modules", nargs="*", default=STARTUP_MODULES, help="modules to import (default: %(default)s)")
+    parser.add_argument("--runs", type=int, default=5, help="number of runs, fastest time is kept (default: %(default)s)")
+    parser.add_argument("--top", type=int, default=10, help="number of slowest imports shown per module (default: %(default)s)")
+    parser.add_argument("--json", dest="json_path", type=Path, help="also save all import times to this JSON file")
+    args = parser.parse_args()
+
+    results = {}
+    for module_name in args.modules:
+        import_times = benchmark_module(module_name, args.runs)
+        results[module_name] = import_times
+        print(f"\n{module_name}: {import_times[module_name] / 1000:.1f} ms (fastest of {args.runs} runs)")
+        slowest_imports = sorted(import_times.items(), key=lambda item: item[1], reverse=True)[1:args.top + 1]
+        for imported_module, cumulative_us in slowest_imports:
+            print(f"  {cumulative_us / 1000:8.1f} ms  {imported_module}")
+    if args.json_path:
+        args.json_path.write_text(json.dumps(results, indent=4))
+
+
+if __name__ == "__main__":
+    main()
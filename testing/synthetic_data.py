@@ -0,0 +1,76 @@
+# synthetic_data.py
+
+# SYNTHETIC DATA GENERATOR (used by benchmark_suite.py)
+# Creates N user accounts x M journal entries per user with a fixed random seed, so benchmark runs are reproducible.
+
+import random
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add the project root to the Python path so we can import from core
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from core.user_auth_models import UserManager, UserAccount, bcrypt_hash
+from core.journal_storage import JOURNAL_STORAGE_BACKENDS
+from core.sqlite_storage import SQLiteJournalStorage
+from core.mood_analytics import MOOD_SCORES
+
+SYNTHETIC_PASSWORD = "password123"
+SYNTHETIC_WORDS = ("walk", "friends", "coffee", "deadline", "sunshine", "meeting", "family", "exercise", "reading",
+                   "project", "rest", "garden", "music", "cooking", "travel", "learning", "patience", "focus")
+START_DATE = datetime(2024, 1, 1, 8, 0)
+
+
+def get_username(user_number):
+    """Returns synthetic username for a user number, e.g. benchuser00042."""
+    return f"benchuser{user_number:05d}"
+
+
+def make_sentence(random_generator, word_count=8):
+    return " ".join(random_generator.choice(SYNTHETIC_WORDS) for _ in range(word_count)).capitalize()
+
+
+def generate_entry_dicts(entry_count, seed=0):
+    """Returns entry_count journal entry dicts (oldest first, about one per day) with random moods and text."""
+    random_generator = random.Random(seed)
+    mood_labels = list(MOOD_SCORES)
+    entry_dicts = []
+    for entry_number in range(entry_count):
+        timestamp = START_DATE + timedelta(days=entry_number, minutes=random_generator.randrange(12 * 60))
+        entry_dicts.append({
+            "timestamp": timestamp.isoformat(),
+            "mood": random_generator.choice(mood_labels),
+            "wins": make_sentence(random_generator),
+            "challenges": make_sentence(random_generator),
+            "gratitude": make_sentence(random_generator),
+            "goals": make_sentence(random_generator),
+        })
+    return entry_dicts
+
+
+def create_user_accounts(accounts_path, user_count, work_factor):
+    """Saves user_count accounts to accounts_path in one write. All accounts share one password hash (hashing once)."""
+    hashed_password = bcrypt_hash(SYNTHETIC_PASSWORD, work_factor)
+    Path(accounts_path).write_text("{}")
+    user_manager = UserManager(accounts_path, work_factor=work_factor)
+    user_manager.add_user_accounts([UserAccount(get_username(user_number), hashed_password) for user_number in range(user_count)])
+    return user_manager
+
+
+def create_journal_storage(data_dir, backend):
+    """Creates an empty journal storage backend ("json", "log", "sharded" or "sqlite") in data_dir."""
+    json_file_path = Path(data_dir) / "journal_entries.json"
+    if backend == "sqlite":
+        return SQLiteJournalStorage(Path(data_dir) / "mindful_moments.db", legacy_json_file_path=None)
+    if not json_file_path.exists():
+        json_file_path.write_text("{}")     # As in data_storage/, the JSON file is expected to exist
+    return JOURNAL_STORAGE_BACKENDS[backend](json_file_path)
+
+
+def fill_journal_storage(storage, user_count, entries_per_user, seed=0):
+    """Adds entries_per_user synthetic entries for each of user_count users (one batch write per user)."""
+    for user_number in range(user_count):
+        storage.append_entries(get_username(user_number), generate_entry_dicts(entries_per_user, seed + user_number))
+    return storage
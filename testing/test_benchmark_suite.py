@@ -0,0 +1,35 @@
+# test_benchmark_suite.py
+
+# PYTEST UNIT TESTING
+# Smoke test for the benchmark suite (benchmark_suite.py) and synthetic data generator (synthetic_data.py), on tiny data
+
+import sys
+import json
+from pathlib import Path
+
+# Add the testing folder to the Python path so benchmark modules can be imported
+sys.path.insert(0, str(Path(__file__).parent))
+
+from benchmark_suite import run_benchmarks, JOURNAL_BACKENDS
+from synthetic_data import generate_entry_dicts
+
+
+def test_benchmark_suite_results():
+    """
+    This test checks the benchmark suite runs on tiny synthetic data and gives JSON serialisable results.
+    It verifies:
+    1. Synthetic entries are the same for the same seed (reproducible runs)
+    2. Every benchmark has timings, including each journal storage backend
+    """
+    # 1. Reproducible synthetic data
+    assert generate_entry_dicts(5, seed=1) == generate_entry_dicts(5, seed=1)
+    assert generate_entry_dicts(5, seed=1) != generate_entry_dicts(5, seed=2)
+
+    # 2. Results for every benchmark
+    benchmark_run = json.loads(json.dumps(run_benchmarks(user_count=2, entries_per_user=3, work_factor=4, repeat=1)))
+    assert benchmark_run["parameters"]["users"] == 2
+    expected_benchmarks = {"user_manager_load", "register_user", "authenticate_user", "display_entry_cold", "display_entry_cached"}
+    for backend in JOURNAL_BACKENDS:
+        expected_benchmarks |= {f"get_user_entries[{backend}]", f"save_journal_entry[{backend}]"}
+    assert set(benchmark_run["results"]) == expected_benchmarks
+    assert all(timing["calls"] == 1 and timing["min_ms"] >= 0 for timing in benchmark_run["results"].values())
@@ -0,0 +1,93 @@
+# test_cli.py
+
+# PYTEST UNIT TESTING
+# Testing command line commands in cli.py using Pytest and click's CliRunner (https://click.palletsprojects.com/en/stable/testing/)
+
+import sys
+import json
+from pathlib import Path
+from click.testing import CliRunner
+
+# Add the project root to the Python path so we can import from core
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+import cli
+from core.user_auth_models import UserManager
+
+
+def test_add_list_export_stats_commands(tmp_path: Path, monkeypatch):
+    """
+    This test checks the non-interactive journal commands.
+    It verifies:
+    1. A batch of JSONL entries from stdin is added in one command (login from environment variables)
+    2. Invalid batch entries are reported and nothing is added
+    3. Single entry can be added from options
+    4. list, export and stats return the added entries
+    5. Wrong password is rejected
+    """
+    test_accounts_path = tmp_path / "test_user_accounts.json"
+    test_accounts_path.write_text("{}")
+    monkeypatch.setattr(cli, "USER_ACCOUNTS_JSON_FILE", test_accounts_path)
+    monkeypatch.setattr(cli, "JOURNAL_ENTRIES_JSON_FILE", tmp_path / "test_journal_entries.json")
+    assert UserManager(test_accounts_path).register_user("pytestuser123", "password123")
+    runner = CliRunner(env={"MINDFUL_MOMENTS_USERNAME": "pytestuser123", "MINDFUL_MOMENTS_PASSWORD": "password123"})
+
+    # 1. Batch of entries from stdin
+    batch_input = "\n".join(json.dumps({"mood": "good", "wins": f"win {number}", "challenges": "c", "gratitude": "g",
+                                        "goals": "x", "timestamp": f"2025-06-0{number + 1}T09:00:00"}) for number in range(3))
+    result = runner.invoke(cli.cli, ["add", "--file", "-"], input=batch_input)
+    assert result.exit_code == 0, result.output
+    assert "Added 3 journal entries" in result.output
+
+    # 2. Invalid entries - nothing added
+    result = runner.invoke(cli.cli, ["add", "--file", "-"], input='{"mood": "Good", "wins": "w"}\nnot json\n')
+    assert result.exit_code != 0
+    assert "line 1: missing challenges, gratitude, goals" in result.output and "line 2:" in result.output
+
+    # 3. Single entry from options
+    result = runner.invoke(cli.cli, ["add", "--mood", "Great", "--wins", "win 3", "--challenges", "c",
+                                     "--gratitude", "g", "--goals", "x"])
+    assert result.exit_code == 0, result.output
+
+    # 4. list (newest first / date range), export and stats
+    result = runner.invoke(cli.cli, ["list", "--format", "jsonl", "--limit", "2"])
+    assert [json.loads(line)["wins"] for line in result.output.splitlines()] == ["win 3", "win 2"]
+    result = runner.invoke(cli.cli, ["list", "--format", "jsonl", "--since", "2025-06-02", "--until", "2025-06-02"])
+    assert [json.loads(line)["wins"] for line in result.output.splitlines()] == ["win 1"]
+    result = runner.invoke(cli.cli, ["export"])
+    assert [json.loads(line)["wins"] for line in result.output.splitlines()] == ["win 0", "win 1", "win 2", "win 3"]
+    result = runner.invoke(cli.cli, ["stats", "--json"])
+    assert json.loads(result.output)["mood_counts"] == {"Good": 3, "Great": 1}
+
+    # 5. Wrong password
+    result = runner.invoke(cli.cli, ["list", "--password", "wrongpass"])
+    assert result.exit_code != 0
+    assert "Login unsuccessful" in result.output
+
+
+def test_metrics_command_kdf_timings(tmp_path: Path, monkeypatch):
+    """
+    This test checks python cli.py metrics --kdf-samples, used to check the bcrypt work factor.
+    It verifies:
+    1. Hash and check timings for the work factor are measured and included in JSON output
+    2. Table and Prometheus output include them too (even before any metrics are saved)
+    """
+    monkeypatch.setattr(cli, "METRICS_FILE", tmp_path / "metrics.json")
+    runner = CliRunner()
+
+    # 1. JSON
+    result = runner.invoke(cli.cli, ["metrics", "--format", "json", "--kdf-samples", "2", "--work-factor", "4"])
+    assert result.exit_code == 0, result.output
+    kdf_timings = json.loads(result.output)["kdf"]
+    assert kdf_timings["work_factor"] == 4
+    assert kdf_timings["hash"]["count"] >= 2 and kdf_timings["verify"]["count"] >= 2
+    assert kdf_timings["hash"]["average_seconds"] > 0
+
+    # 2. Table and Prometheus
+    result = runner.invoke(cli.cli, ["metrics", "--kdf-samples", "1", "--work-factor", "4"])
+    assert "Password hashing (bcrypt work factor 4)" in result.output
+    assert "No metrics saved yet" in result.output
+    result = runner.invoke(cli.cli, ["metrics", "--format", "prometheus", "--kdf-samples", "1", "--work-factor", "4"])
+    assert "mindful_moments_kdf_work_factor 4" in result.output
+    assert "mindful_moments_kdf_verify_average_seconds " in result.output
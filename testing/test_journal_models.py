@@ -0,0 +1,755 @@
+# test_journal_models.py
+
+# PYTEST UNIT TESTING
+# Testing JournalManager and journal storage backends in journal_models.py and journal_storage.py using Pytest
+
+import sys
+import io
+import csv
+import json
+import multiprocessing
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+import pytest
+
+# Add the project root to the Python path so we can import from core
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from core.user_auth_models import UserAccount
+from core.journal_models import JournalManager, JournalEntry, JournalEntryBatch
+from core.journal_storage import JsonJournalStorage, AppendLogJournalStorage, ShardedJournalStorage, WriteBehindJournalStorage, create_journal_storage
+from core.sqlite_storage import SQLiteJournalStorage
+from core.mood_analytics import MoodSummary, MOOD_SCORES
+from core.exception_classes import ExportPermissionError, DataFileCorruptedError
+from core.file_paths import SQLITE_DATABASE_FILE
+import core.journal_models as journal_models
+
+
+def make_test_entry(number):
+    """Creates a dummy JournalEntry with a fixed timestamp so entries can be compared."""
+    return JournalEntry("Good", f"win {number}", f"challenge {number}", f"gratitude {number}", f"goal {number}",
+                        timestamp=f"2025-06-{number + 1:02d}T09:00:00")
+
+
+def test_append_log_save_and_reload(tmp_path: Path):
+    """
+    This test checks the append-only log storage backend.
+    It verifies:
+    1. Saving an entry appends one line to the log and does not rewrite the JSON snapshot
+    2. A new JournalManager replays the log and returns the saved entry
+    """
+
+    # Setup temporary JSON snapshot file (empty store)
+    test_json_path = tmp_path / "test_journal_entries.json"
+    test_json_path.write_text("{}")
+    current_user = UserAccount("pytestuser123", "dummyhash")
+
+    storage = AppendLogJournalStorage(test_json_path, compact_threshold=100)
+    journal_manager = JournalManager(test_json_path, current_user, storage=storage)
+
+    # 1. Save entry - log has 1 line and snapshot is untouched
+    assert journal_manager.save_journal_entry(make_test_entry(1))
+    assert len(storage.log_file_path.read_text().splitlines()) == 1
+    assert json.loads(test_json_path.read_text()) == {}
+
+    # 2. Reload from disk with a new manager
+    reloaded_manager = JournalManager(test_json_path, current_user, storage=AppendLogJournalStorage(test_json_path))
+    reloaded_entries = reloaded_manager.get_user_entries()
+    assert len(reloaded_entries) == 1
+    assert reloaded_entries[0].wins == "win 1"
+
+
+def test_append_log_compaction(tmp_path: Path):
+    """
+    This test checks that the log is compacted into the JSON snapshot once the threshold is reached.
+    It verifies:
+    1. Snapshot contains all entries and the log is empty after compaction
+    2. A torn (partially written) last log line is discarded on reload
+    """
+
+    test_json_path = tmp_path / "test_journal_entries.json"
+    test_json_path.write_text("{}")
+    current_user = UserAccount("pytestuser123", "dummyhash")
+
+    storage = AppendLogJournalStorage(test_json_path, compact_threshold=3)
+    journal_manager = JournalManager(test_json_path, current_user, storage=storage)
+    for number in range(3):
+        assert journal_manager.save_journal_entry(make_test_entry(number))
+
+    # 1. Compacted into snapshot
+    assert len(json.loads(test_json_path.read_text())["pytestuser123"]) == 3
+    assert storage.log_file_path.read_text() == ""
+
+    # 2. Simulate a crash part way through appending a record
+    storage.log_file_path.write_text('{"username": "pytestuser123", "entr')
+    reloaded_storage = AppendLogJournalStorage(test_json_path)
+    assert len(reloaded_storage.load_user_entries("pytestuser123")) == 3
+    assert reloaded_storage.log_file_path.read_text() == ""
+
+
+def test_sharded_storage_lazy_loading(tmp_path: Path):
+    """
+    This test checks the per-user sharded storage backend.
+    It verifies:
+    1. Existing entries in the single JSON file are split into per-user shards on first use
+    2. Loading one user's entries only reads that user's shard
+    3. New entries are appended to the user's own shard file
+    """
+
+    test_json_path = tmp_path / "test_journal_entries.json"
+    test_json_path.write_text(json.dumps({
+        "pytestuser123": [make_test_entry(1).to_dict()],
+        "otheruser456": [make_test_entry(2).to_dict()],
+    }))
+
+    # 1. Legacy store split into shards
+    storage = ShardedJournalStorage(test_json_path)
+    assert storage.shard_path("pytestuser123").exists()
+    assert storage.shard_path("otheruser456").exists()
+
+    # 2. Only current user's shard is loaded
+    journal_manager = JournalManager(test_json_path, UserAccount("pytestuser123", "dummyhash"), storage=storage)
+    assert [entry.wins for entry in journal_manager.get_user_entries()] == ["win 1"]
+    assert list(storage.loaded_entries) == ["pytestuser123"]
+
+    # 3. Save appends to user's shard, which reloads in a new storage instance
+    assert journal_manager.save_journal_entry(make_test_entry(3))
+    assert len(storage.shard_path("pytestuser123").read_text().splitlines()) == 2
+    assert len(ShardedJournalStorage(test_json_path).load_user_entries("pytestuser123")) == 2
+
+
+def test_sqlite_storage_date_range(tmp_path: Path):
+    """
+    This test checks the SQLite journal storage backend.
+    It verifies:
+    1. Saved entries are returned oldest first for the current user only
+    2. Date range query uses stored timestamps to return only entries in range
+    """
+
+    test_json_path = tmp_path / "test_journal_entries.json"
+    test_json_path.write_text("{}")
+    storage = SQLiteJournalStorage(tmp_path / "test_mindful_moments.db", legacy_json_file_path=test_json_path)
+    journal_manager = JournalManager(test_json_path, UserAccount("pytestuser123", "dummyhash"), storage=storage)
+    for number in range(5):
+        assert journal_manager.save_journal_entry(make_test_entry(number))
+    storage.append_entry("otheruser456", make_test_entry(9).to_dict())
+
+    # 1. Only current user's entries, oldest first
+    assert [entry.wins for entry in journal_manager.get_user_entries()] == [f"win {number}" for number in range(5)]
+
+    # 2. Entries from 2nd to 4th of June only
+    entries_in_range = storage.load_user_entries_between("pytestuser123", "2025-06-02T00:00:00", "2025-06-04T23:59:59")
+    assert [entry["wins"] for entry in entries_in_range] == ["win 1", "win 2", "win 3"]
+
+
+def test_sqlite_storage_search_out_of_timestamp_order(tmp_path: Path):
+    """
+    This test checks SQLite storage finds the right entries by index position when entries are saved out of
+    timestamp order (e.g. cli.py add with an earlier --timestamp).
+    It verifies:
+    1. Search returns the matching entries, not the entries at the same place in timestamp order
+    2. Search and date range still match after the search index is rebuilt from stored entries
+    """
+    test_json_path = tmp_path / "test_journal_entries.json"
+    test_json_path.write_text("{}")
+    storage = SQLiteJournalStorage(tmp_path / "test_mindful_moments.db", legacy_json_file_path=test_json_path)
+    journal_manager = JournalManager(test_json_path, UserAccount("pytestuser123", "dummyhash"), storage=storage)
+    for wins, day in [("apple pie", 3), ("banana bread", 1), ("cherry tart", 2), ("date loaf", 4)]:
+        assert journal_manager.save_journal_entry(JournalEntry("Good", wins, "c", "g", "x", timestamp=f"2025-06-{day:02d}T09:00:00"))
+
+    # 1. Search by index positions
+    assert [entry.wins for entry in journal_manager.search("cherry")] == ["cherry tart"]
+    assert [entry.wins for entry in journal_manager.search("bread")] == ["banana bread"]
+
+    # 2. Rebuilt index
+    rebuilt_manager = JournalManager(test_json_path, UserAccount("pytestuser123", "dummyhash"), storage=storage,
+                                     index_dir=tmp_path / "rebuilt_indexes")
+    assert [entry.wins for entry in rebuilt_manager.search("apple")] == ["apple pie"]
+    june_2_to_3 = rebuilt_manager.get_entries_between(datetime(2025, 6, 2), datetime(2025, 6, 3, 23, 59))
+    assert [entry.wins for entry in june_2_to_3] == ["cherry tart", "apple pie"]
+
+
+def test_sqlite_storage_entry_positions(tmp_path: Path):
+    """
+    This test checks SQLite storage keeps each entry's position (saved order per user) in an indexed column.
+    It verifies:
+    1. A database created before the position column gets it filled in per user when opened, and new entries carry on numbering
+    2. Entries are fetched by position through the username + position index
+    3. create_journal_storage() keeps the database next to the journal file it is given, not the app's database
+    """
+    database_path = tmp_path / "old_mindful_moments.db"
+    with sqlite3.connect(database_path) as old_database:
+        old_database.execute("CREATE TABLE journal_entries (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT NOT NULL, "
+                             "timestamp TEXT NOT NULL, entry_data TEXT NOT NULL)")
+        old_database.executemany("INSERT INTO journal_entries (username, timestamp, entry_data) VALUES (?, ?, ?)",
+                                 [(username, entry.timestamp, json.dumps(entry.to_dict()))
+                                  for username, entry in [("pytestuser123", make_test_entry(0)), ("otheruser456", make_test_entry(9)),
+                                                          ("pytestuser123", make_test_entry(1))]])
+    old_database.close()
+
+    # 1. Positions filled in, then continued
+    storage = SQLiteJournalStorage(database_path, legacy_json_file_path=None)
+    storage.append_entries("pytestuser123", [make_test_entry(2).to_dict()])
+    stored_positions = storage.database.query("SELECT username, position FROM journal_entries ORDER BY id")
+    assert stored_positions == [("pytestuser123", 0), ("otheruser456", 0), ("pytestuser123", 1), ("pytestuser123", 2)]
+
+    # 2. Indexed lookup by position
+    assert [entry_dict["wins"] for entry_dict in storage.load_user_entries_at("pytestuser123", [2, 0])] == ["win 2", "win 0"]
+    query_plan = storage.database.query("EXPLAIN QUERY PLAN SELECT entry_data FROM journal_entries WHERE username = ? AND position IN (1, 2)",
+                                        ("pytestuser123",))
+    assert any("idx_journal_entries_username_position" in row[-1] for row in query_plan)
+
+    # 3. Database next to the journal file
+    journal_storage = create_journal_storage(tmp_path / "journal_entries.json", backend="sqlite", write_behind=False)
+    assert journal_storage.database.database_path == tmp_path / SQLITE_DATABASE_FILE.name
+    assert journal_storage.count_user_entries("pytestuser123") == 0
+
+
+@pytest.mark.parametrize("indent", [4, None])
+def test_json_storage_loads_one_user(tmp_path: Path, indent):
+    """
+    This test checks the whole file JSON storage only loads the requested user's entries (saved with indent=4 or compact).
+    It verifies:
+    1. Only the requested user's entries are parsed and kept in memory
+    2. Usernames with entries are listed without loading entries
+    3. Saving a new entry keeps every other user's entries in the file
+    """
+
+    test_json_path = tmp_path / "test_journal_entries.json"
+    journal_data = {f"user{number}": [make_test_entry(number).to_dict()] for number in range(5)}
+    journal_data["emptyuser"] = []
+    test_json_path.write_text(json.dumps(journal_data, indent=indent))
+    storage = JsonJournalStorage(test_json_path)
+
+    # 1. One user loaded
+    assert storage.load_user_entries("user3") == journal_data["user3"]
+    assert storage.load_user_entries("newuser") == []
+    assert list(storage.journal_data) == ["user3", "newuser"]
+
+    # 2. Usernames with entries
+    assert sorted(storage.usernames()) == [f"user{number}" for number in range(5)]
+
+    # 3. Save keeps other users' entries
+    assert storage.append_entry("newuser", make_test_entry(9).to_dict())
+    stored_data = json.loads(test_json_path.read_text())
+    assert {username: len(user_entries) for username, user_entries in stored_data.items()} == {
+        **{f"user{number}": 1 for number in range(5)}, "emptyuser": 0, "newuser": 1
+    }
+
+
+@pytest.mark.parametrize("truncate_at", [28, 200, -1])
+def test_json_storage_truncated_file_fails_quickly(tmp_path: Path, truncate_at):
+    """
+    This test checks a truncated (or never closed) compact JSON journal file raises DataFileCorruptedError straight away,
+    instead of the scan for the end of each user's entries taking longer and longer as the file grows.
+    """
+    test_json_path = tmp_path / "test_journal_entries.json"
+    journal_data = {f"user{number}": [make_test_entry(number).to_dict() for _ in range(3)] for number in range(5)}
+    compact_json = json.dumps(journal_data)
+    test_json_path.write_text(compact_json[:truncate_at] if truncate_at > 0 else '{"user0": [' + "[" * 5000 + '"never closed')
+    started = time.perf_counter()
+    with pytest.raises(DataFileCorruptedError):
+        JsonJournalStorage(test_json_path).load_user_entries("user4")
+    assert time.perf_counter() - started < 1
+
+
+def save_entries_in_process(json_file_path, process_number, entry_count):
+    """Run in a separate process: saves entry_count entries with unique timestamps using the whole file JSON backend."""
+    journal_manager = JournalManager(json_file_path, UserAccount("pytestuser123", "dummyhash"),
+                                     storage=JsonJournalStorage(json_file_path))
+    for entry_number in range(entry_count):
+        journal_manager.save_journal_entry(JournalEntry("Okay", "win", "challenge", "gratitude", "goal",
+                                                        timestamp=f"2025-06-01T{process_number:02d}:00:{entry_number:02d}"))
+
+
+def test_json_storage_concurrent_processes(tmp_path: Path):
+    """
+    This test checks that several processes saving to the same JSON file at once don't lose entries.
+    It verifies:
+    1. All entries saved by 4 processes (10 entries each) are in the file afterwards
+    2. The file is still valid JSON (never left half written)
+    """
+
+    test_json_path = tmp_path / "test_journal_entries.json"
+    test_json_path.write_text("{}")
+
+    processes = [multiprocessing.Process(target=save_entries_in_process, args=(test_json_path, number, 10)) for number in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    # 1 + 2. All 40 entries stored in a valid JSON file
+    stored_entries = json.loads(test_json_path.read_text())["pytestuser123"]
+    assert len(stored_entries) == 40
+
+
+def test_iter_user_entries_pages(tmp_path: Path):
+    """
+    This test checks paging through entries with iter_user_entries().
+    It verifies:
+    1. Entry count is returned without decoding entries
+    2. Pages are returned newest first and only contain the requested entries
+    """
+
+    test_json_path = tmp_path / "test_journal_entries.json"
+    test_json_path.write_text("{}")
+    journal_manager = JournalManager(test_json_path, UserAccount("pytestuser123", "dummyhash"),
+                                     storage=ShardedJournalStorage(test_json_path))
+    for number in range(7):
+        journal_manager.save_journal_entry(make_test_entry(number))
+
+    # 1. Count of stored entries
+    assert journal_manager.count_user_entries() == 7
+
+    # 2. First page (newest 3) and last page (oldest 1)
+    assert [entry.wins for entry in journal_manager.iter_user_entries(offset=0, limit=3)] == ["win 6", "win 5", "win 4"]
+    assert [entry.wins for entry in journal_manager.iter_user_entries(offset=6, limit=3)] == ["win 0"]
+
+
+@pytest.mark.parametrize("storage_class", [ShardedJournalStorage, SQLiteJournalStorage])
+def test_get_entries_between(tmp_path: Path, storage_class):
+    """
+    This test checks date range queries with get_entries_between().
+    It verifies:
+    1. Only entries from start to end (inclusive) are returned, oldest first
+    2. An entry saved out of date order is still found (timestamp index stays sorted)
+    3. A range with no entries returns an empty list
+    """
+
+    test_json_path = tmp_path / "test_journal_entries.json"
+    test_json_path.write_text("{}")
+    if storage_class is SQLiteJournalStorage:
+        storage = SQLiteJournalStorage(tmp_path / "test_mindful_moments.db", legacy_json_file_path=test_json_path)
+    else:
+        storage = storage_class(test_json_path)
+    journal_manager = JournalManager(test_json_path, UserAccount("pytestuser123", "dummyhash"), storage=storage)
+    for number in [0, 1, 2, 5, 6, 3]:
+        assert journal_manager.save_journal_entry(make_test_entry(number))
+
+    # 1 + 2. Entries from 2nd to 4th of June (entry on 4th of June saved last)
+    june_entries = journal_manager.get_entries_between(datetime(2025, 6, 2), datetime(2025, 6, 4, 23, 59, 59))
+    assert [entry.wins for entry in june_entries] == ["win 1", "win 2", "win 3"]
+
+    # 3. No entries in range
+    assert journal_manager.get_entries_between(datetime(2025, 7, 1), datetime(2025, 7, 31)) == []
+
+
+def test_search_entries_with_index(tmp_path: Path):
+    """
+    This test checks searching journal entries with the per-user search index.
+    It verifies:
+    1. Entries containing every query word are returned newest first (case insensitive, any searchable field)
+    2. Index is updated on each save (without a rebuild), but only saved to file on close or once index_save_interval has passed
+    3. Index is rebuilt if it is out of date (e.g. entries saved by another process)
+    """
+
+    test_json_path = tmp_path / "test_journal_entries.json"
+    test_json_path.write_text("{}")
+    current_user = UserAccount("pytestuser123", "dummyhash")
+    storage = ShardedJournalStorage(test_json_path)
+    journal_manager = JournalManager(test_json_path, current_user, storage=storage)
+    journal_manager.save_journal_entry(JournalEntry("Good", "Went for a long run", "Rainy weather", "Family", "Run again", timestamp="2025-06-01T09:00:00"))
+    journal_manager.save_journal_entry(JournalEntry("Okay", "Finished project", "Tired", "Coffee", "Sleep early", timestamp="2025-06-02T09:00:00"))
+    journal_manager.save_journal_entry(JournalEntry("Great", "Morning run", "None", "Sunny weather", "Rest", timestamp="2025-06-03T09:00:00"))
+
+    # 1. Search across fields
+    assert [entry.timestamp for entry in journal_manager.search("RUN")] == ["2025-06-03T09:00:00", "2025-06-01T09:00:00"]
+    assert [entry.wins for entry in journal_manager.search("run weather")] == ["Morning run", "Went for a long run"]
+    assert journal_manager.search("holiday") == []
+
+    # 2. Saved index file includes new entry added incrementally, saved on close (not rewritten on each save)
+    index_path = journal_manager.get_user_index("search").index_path
+    journal_manager.save_journal_entry(JournalEntry("Good", "Evening run", "-", "-", "-", timestamp="2025-06-04T09:00:00"))
+    assert not index_path.exists()
+    journal_manager.close()
+    saved_index = json.loads(index_path.read_text())
+    assert saved_index["entry_count"] == 4
+    assert saved_index["postings"]["run"] == [0, 2, 3]
+    journal_manager.index_save_interval = 0     # Interval passed: saved with the next entry
+    journal_manager.save_journal_entry(JournalEntry("Okay", "Rest day", "-", "-", "-", timestamp="2025-06-04T18:00:00"))
+    assert json.loads(index_path.read_text())["entry_count"] == 5
+
+    # 3. Entry saved by another manager - index rebuilt on search
+    storage.append_entry("pytestuser123", JournalEntry("Good", "Trail run", "-", "-", "-", timestamp="2025-06-05T09:00:00").to_dict())
+    assert len(JournalManager(test_json_path, current_user, storage=storage).search("run")) == 4
+
+
+def make_mood_entries(day_offsets_and_moods):
+    """Creates entry dicts from (days after 1st June 2025, mood label) pairs."""
+    return [JournalEntry(mood, "win", "challenge", "gratitude", "goal",
+                         timestamp=(datetime(2025, 6, 1, 9) + timedelta(days=day_offset)).isoformat()).to_dict()
+            for day_offset, mood in day_offsets_and_moods]
+
+
+def test_mood_summary_running_totals(tmp_path: Path):
+    """
+    This test checks the mood summary kept up to date as entries are saved.
+    It verifies:
+    1. Mood distribution, overall/weekly/monthly averages
+    2. Current and longest streaks of consecutive days
+    3. Trend compares recent entries with earlier entries
+    4. Summary is updated per entry (not rebuilt) and saved on close
+    """
+
+    test_json_path = tmp_path / "test_journal_entries.json"
+    test_json_path.write_text("{}")
+    journal_manager = JournalManager(test_json_path, UserAccount("pytestuser123", "dummyhash"),
+                                     storage=ShardedJournalStorage(test_json_path))
+    # 1st-3rd June (3 day streak), gap, 6th-7th June, then moods improve
+    mood_entries = make_mood_entries([(0, "Sad"), (1, "Awful"), (2, "Sad"), (5, "Great"), (6, "Great"), (6, "Good")])
+    for entry_dict in mood_entries:
+        journal_manager.save_journal_entry(JournalEntry.from_dict(entry_dict))
+
+    mood_summary = journal_manager.get_user_index("mood").get_summary(today=date(2025, 6, 8))
+
+    # 1. Distribution and averages
+    assert mood_summary["mood_counts"] == {"Sad": 2, "Awful": 1, "Great": 2, "Good": 1}
+    assert mood_summary["average_score"] == pytest.approx(19 / 6)
+    assert mood_summary["weekly_averages"] == [("2025-W22", 2.0), ("2025-W23", pytest.approx(17 / 5))]
+    assert mood_summary["monthly_averages"] == [("2025-06", pytest.approx(19 / 6))]
+
+    # 2. Streaks (current streak still active on 8th June)
+    assert mood_summary["longest_streak"] == 3
+    assert mood_summary["current_streak"] == 2
+
+    # 3. Trend - last 3 entries average 4.67 vs first 3 entries average 1.67
+    assert mood_summary["trend"] == "improving"
+
+    # 4. Saved summary file includes all entries
+    journal_manager.close()
+    saved_summary = json.loads(journal_manager.get_user_index("mood").index_path.read_text())
+    assert saved_summary["entry_count"] == 6
+
+
+def test_mood_summary_numpy_rebuild_matches():
+    """
+    This test checks the optional NumPy rebuild gives the same totals as adding entries one at a time.
+    Skipped if NumPy isn't installed.
+    """
+    pytest.importorskip("numpy")
+    moods = list(MOOD_SCORES) + ["Free text mood"]
+    # Entries (in date order) across a year boundary (ISO weeks), with gaps and several entries on some days
+    day_offsets = sorted(200 + day // 2 + (day % 7 == 0) * 3 for day in range(300))
+    entry_dicts = make_mood_entries([(day_offset, moods[number % len(moods)]) for number, day_offset in enumerate(day_offsets)])
+
+    incremental_summary = MoodSummary("pytestuser123", "unused")
+    for entry_dict in entry_dicts:
+        incremental_summary.add_entry(entry_dict)
+    numpy_summary = MoodSummary("pytestuser123", "unused")
+    numpy_summary.rebuild_with_numpy(entry_dicts)
+
+    assert numpy_summary.get_index_data() == incremental_summary.get_index_data()
+    assert numpy_summary.entry_count == incremental_summary.entry_count
+
+
+def test_compact_journal_entry_and_batch():
+    """
+    This test checks compact JournalEntry/JournalEntryBatch storage keeps every field when converting to/from dicts.
+    """
+    entry_dicts = [make_test_entry(number).to_dict() for number in range(3)]
+    entry_dicts[1]["mood"] = "Free text mood"
+
+    # 1. Entries have no per-instance __dict__ and round-trip to the same dict
+    entry = JournalEntry.from_dict(entry_dicts[1])
+    assert not hasattr(entry, "__dict__")
+    assert entry.to_dict() == entry_dicts[1]
+    assert entry.get_datetime() == datetime(2025, 6, 2, 9)
+
+    # 2. Rated moods are stored as their score, free text moods kept as text
+    assert JournalEntry.from_dict(entry_dicts[0]).mood_code == MOOD_SCORES["Good"]
+    assert entry.mood_code == 0 and entry.mood == "Free text mood"
+
+    # 3. Batch stores fields in arrays and gives back the same entries
+    entry_batch = JournalEntryBatch.from_dicts(entry_dicts)
+    assert len(entry_batch) == 3
+    assert list(entry_batch.mood_codes) == [4, 0, 4]
+    assert list(entry_batch.iter_dicts()) == entry_dicts
+    assert entry_batch[-2].to_dict() == entry_dicts[1]
+
+
+def test_display_entries_render_cache():
+    """
+    This test checks displaying entries with the render cache (journal_models.render_entry).
+    It verifies:
+    1. A page of entries is printed in one write with separators, each entry rendered once
+    2. Displaying the same entries again uses the cache (no new renders)
+    3. A changed entry or a different terminal width is rendered again
+    """
+    journal_models.render_entry.cache_clear()
+    entries = [make_test_entry(number) for number in range(3)]
+
+    # 1. One write for the whole page
+    with journal_models.console.capture() as capture:
+        journal_models.display_entries(entries, separator="=" * 60)
+    page_output = capture.get()
+    assert all(f"win {number}" in page_output for number in range(3))
+    assert "03-06-2025 09:00" in page_output
+    assert page_output.count("=" * 60) == 3
+    assert journal_models.render_entry.cache_info().misses == 3
+
+    # 2. Displayed again from the cache
+    with journal_models.console.capture() as capture:
+        journal_models.display_entries(entries, separator="=" * 60)
+        entries[0].display_entry()
+    assert capture.get().startswith(page_output)
+    assert journal_models.render_entry.cache_info().misses == 3
+    assert journal_models.render_entry.cache_info().hits == 4
+
+    # 3. Edited entry and resized terminal
+    entries[0].wins = "edited win"
+    with journal_models.console.capture() as capture:
+        entries[0].display_entry()
+    assert "edited win" in capture.get()
+    journal_models.render_entry(entries[1].get_render_key(), 60)
+    assert journal_models.render_entry.cache_info().misses == 5
+
+
+def test_display_entry_pages_prompt(monkeypatch):
+    """
+    This test checks the entry pager in journal.py (display_entry_pages()).
+    It verifies:
+    1. The pager prompt lists the page options shown (letters, not "Enter a number")
+    2. Page options are accepted in upper or lower case, and only the requested pages are loaded
+    """
+    import journal
+    entries = [make_test_entry(number) for number in range(journal.JOURNAL_PAGE_SIZE + 1)]
+    prompts, answers, page_offsets = [], iter(["N", "p", "b"]), []
+
+    def fake_input(prompt):
+        prompts.append(prompt)
+        return next(answers)
+
+    def get_page_entries(offset, limit):
+        page_offsets.append(offset)
+        return entries[offset:offset + limit]
+
+    monkeypatch.setattr("builtins.input", fake_input)
+    with journal_models.console.capture(), journal.console.capture():
+        journal.display_entry_pages(len(entries), get_page_entries)
+
+    # 1. Prompt written for the pager
+    assert prompts == ["Choose a page option. Enter n, b: ", "Choose a page option. Enter p, b: ",
+                       "Choose a page option. Enter n, b: "]
+    assert not any("number" in prompt for prompt in prompts)
+
+    # 2. Next, Previous then Back
+    assert page_offsets == [0, journal.JOURNAL_PAGE_SIZE, 0]
+
+
+@pytest.mark.parametrize("storage_class", [JsonJournalStorage, ShardedJournalStorage, SQLiteJournalStorage])
+def test_export_entries_streaming(tmp_path: Path, monkeypatch, storage_class):
+    """
+    This test checks streaming export of journal entries with export_entries().
+    It verifies:
+    1. User's entries exported oldest first as JSONL, CSV and Markdown
+    2. Sharded storage reads the shard line by line, and JSON storage one user's value at a time (entries aren't kept in memory after export)
+    3. Exporting every user's entries needs an admin account, and includes each entry's username (not kept in memory either)
+    """
+
+    test_json_path = tmp_path / "test_journal_entries.json"
+    test_json_path.write_text("{}")
+    if storage_class is SQLiteJournalStorage:
+        storage = SQLiteJournalStorage(tmp_path / "test_mindful_moments.db", legacy_json_file_path=test_json_path)
+    else:
+        storage = storage_class(test_json_path)
+    storage.append_entries("pytestuser123", [make_test_entry(number).to_dict() for number in range(3)])
+    storage.append_entries("otheruser456", [make_test_entry(9).to_dict()])
+    if storage_class is not SQLiteJournalStorage:
+        storage = storage_class(test_json_path)     # New instance, so no entries are cached yet
+    journal_manager = JournalManager(test_json_path, UserAccount("pytestuser123", "dummyhash"), storage=storage)
+
+    # 1. JSONL, CSV and Markdown exports
+    jsonl_file, csv_file, markdown_file = io.StringIO(), io.StringIO(), io.StringIO()
+    assert journal_manager.export_entries(jsonl_file, "jsonl") == 3
+    assert [json.loads(line)["wins"] for line in jsonl_file.getvalue().splitlines()] == ["win 0", "win 1", "win 2"]
+    journal_manager.export_entries(csv_file, "csv")
+    csv_rows = list(csv.DictReader(io.StringIO(csv_file.getvalue())))
+    assert [row["wins"] for row in csv_rows] == ["win 0", "win 1", "win 2"]
+    assert csv_rows[0]["timestamp"] == "2025-06-01T09:00:00"
+    journal_manager.export_entries(markdown_file, "markdown")
+    assert "## 01-06-2025 09:00 - Good" in markdown_file.getvalue()
+    assert "- **Wins of the day:** win 2" in markdown_file.getvalue()
+
+    # 2. Streamed without caching
+    if storage_class is ShardedJournalStorage:
+        assert storage.loaded_entries == {}
+    if storage_class is JsonJournalStorage:
+        assert storage.journal_data == {}
+
+    # 3. All users export for admins only
+    with pytest.raises(ExportPermissionError):
+        journal_manager.export_entries(io.StringIO(), "jsonl", all_users=True)
+    monkeypatch.setattr(journal_models, "ADMIN_USERNAMES", ("pytestuser123",))
+    all_users_file = io.StringIO()
+    assert journal_manager.export_entries(all_users_file, "jsonl", all_users=True) == 4
+    exported_usernames = [json.loads(line)["username"] for line in all_users_file.getvalue().splitlines()]
+    assert exported_usernames == ["otheruser456"] + ["pytestuser123"] * 3
+    if storage_class is JsonJournalStorage:
+        assert storage.journal_data == {}
+
+
+@pytest.mark.parametrize("storage_class", [ShardedJournalStorage, SQLiteJournalStorage])
+def test_write_behind_storage(tmp_path: Path, storage_class):
+    """
+    This test checks write-behind saves (write-ahead log + background flusher) wrapped around a storage backend.
+    It verifies:
+    1. Saves are appended to the WAL only, and reads include them (entries, count, pages, date range, search)
+    2. Background flusher moves entries into storage once max_pending entries are waiting
+    3. Closing (logout) flushes waiting entries and saves user indexes (not saved on each save)
+    4. A WAL left behind (app killed) is moved into storage on startup, without duplicating entries already moved
+    """
+
+    test_json_path = tmp_path / "test_journal_entries.json"
+    test_json_path.write_text("{}")
+    wal_path = tmp_path / "test_journal_entries.wal.jsonl"
+
+    def create_inner_storage():
+        if storage_class is SQLiteJournalStorage:
+            return SQLiteJournalStorage(tmp_path / "test_mindful_moments.db", legacy_json_file_path=None)
+        return ShardedJournalStorage(test_json_path)
+
+    storage = WriteBehindJournalStorage(create_inner_storage(), wal_path, flush_interval=3600, max_pending=4)
+    journal_manager = JournalManager(test_json_path, UserAccount("pytestuser123", "dummyhash"), storage=storage,
+                                     index_dir=tmp_path / "user_indexes")
+
+    # 1. Saved to WAL only, but visible to reads
+    for number in range(3):
+        assert journal_manager.save_journal_entry(make_test_entry(number))
+    assert len(wal_path.read_text().splitlines()) == 3
+    assert create_inner_storage().count_user_entries("pytestuser123") == 0
+    assert [entry.wins for entry in journal_manager.get_user_entries()] == ["win 0", "win 1", "win 2"]
+    assert journal_manager.count_user_entries() == 3
+    assert [entry.wins for entry in journal_manager.iter_user_entries(offset=1, limit=1)] == ["win 1"]
+    assert [entry.wins for entry in journal_manager.get_entries_between(datetime(2025, 6, 2), datetime(2025, 6, 30))] == ["win 1", "win 2"]
+    assert [entry.wins for entry in journal_manager.search("win 2")] == ["win 2"]
+    assert not (tmp_path / "user_indexes").exists()
+
+    # 2. Flushed in the background once 4 entries are waiting
+    assert journal_manager.save_journal_entry(make_test_entry(3))
+    flush_deadline = time.monotonic() + 5
+    while storage.pending_entries and time.monotonic() < flush_deadline:
+        time.sleep(0.01)
+    assert storage.pending_entries == {}
+    assert wal_path.read_text() == ""
+    assert create_inner_storage().count_user_entries("pytestuser123") == 4
+
+    # 3. Close flushes waiting entries and stops the flusher
+    assert journal_manager.save_journal_entry(make_test_entry(4))
+    assert journal_manager.close() == 1
+    assert not storage.flusher.is_alive()
+    assert len(list((tmp_path / "user_indexes").iterdir())) == 3
+    assert create_inner_storage().count_user_entries("pytestuser123") == 5
+
+    # 4. WAL left behind: last stored entry also in WAL (killed after moving it but before emptying the WAL) + one new entry
+    wal_path.write_text("".join(json.dumps({"username": "pytestuser123", "entry": make_test_entry(number).to_dict()}) + "\n"
+                                for number in (4, 5)))
+    recovered_storage = WriteBehindJournalStorage(create_inner_storage(), wal_path, flush_interval=3600)
+    assert wal_path.read_text() == ""
+    assert [entry_dict["wins"] for entry_dict in recovered_storage.load_user_entries("pytestuser123")] == [f"win {number}" for number in range(6)]
+    recovered_storage.close()
+
+
+@pytest.mark.parametrize("storage_class", [JsonJournalStorage, ShardedJournalStorage, SQLiteJournalStorage])
+def test_write_behind_streams_release_lock(tmp_path: Path, storage_class):
+    """
+    This test checks streaming and paging through write-behind storage while the flusher runs in another thread.
+    It verifies:
+    1. A part read stream or page of entries doesn't hold the lock, so flushing from another thread isn't blocked
+    2. Entries moved into storage by that flush part way through are streamed once
+    3. An abandoned stream doesn't block saves or flushes
+    """
+    test_json_path = tmp_path / "test_journal_entries.json"
+    test_json_path.write_text("{}")
+    if storage_class is SQLiteJournalStorage:
+        inner_storage = SQLiteJournalStorage(tmp_path / "test_mindful_moments.db", legacy_json_file_path=None)
+    else:
+        inner_storage = storage_class(test_json_path)
+    storage = WriteBehindJournalStorage(inner_storage, tmp_path / "test_journal_entries.wal.jsonl", flush_interval=3600)
+    storage.append_entries("pytestuser123", [make_test_entry(0).to_dict()])
+    storage.flush()
+    storage.append_entries("pytestuser123", [make_test_entry(number).to_dict() for number in (1, 2)])
+
+    def flush_in_thread():
+        flush_thread = threading.Thread(target=storage.flush, daemon=True)
+        flush_thread.start()
+        flush_thread.join(timeout=5)
+        return not flush_thread.is_alive()
+
+    # 1. Flushing while a stream and a page are part read
+    entry_stream = storage.stream_user_entries("pytestuser123")
+    streamed_wins = [next(entry_stream)["wins"]]
+    entry_page = storage.iter_user_entries("pytestuser123", offset=0, limit=2)
+    paged_wins = [next(entry_page)["wins"]]
+    assert flush_in_thread()
+    assert storage.pending_entries == {}
+
+    # 2. Each entry streamed once
+    streamed_wins += [entry_dict["wins"] for entry_dict in entry_stream]
+    paged_wins += [entry_dict["wins"] for entry_dict in entry_page]
+    assert streamed_wins == ["win 0", "win 1", "win 2"]
+    assert paged_wins == ["win 2", "win 1"]
+
+    # 3. Abandoned stream
+    abandoned_stream = storage.stream_user_entries("pytestuser123")
+    next(abandoned_stream)
+    storage.append_entries("pytestuser123", [make_test_entry(3).to_dict()])
+    assert flush_in_thread()
+    assert storage.count_user_entries("pytestuser123") == 4
+    storage.close()
+
+
+
+@pytest.mark.parametrize("storage_class", [JsonJournalStorage, ShardedJournalStorage, SQLiteJournalStorage])
+def test_write_behind_storage_shared_wal(tmp_path: Path, storage_class):
+    """
+    This test checks two processes using write-behind saves on the same journal (both share one WAL file).
+    It verifies:
+    1. Entries saved by the first process and moved into storage by the second process's startup aren't read twice
+    2. The same after the second process flushes the WAL, with entries still waiting in the WAL read once
+    3. Indexes aren't rebuilt from duplicated entries (entry count stays correct)
+    """
+    test_json_path = tmp_path / "test_journal_entries.json"
+    test_json_path.write_text("{}")
+    wal_path = tmp_path / "test_journal_entries.wal.jsonl"
+
+    def create_write_behind_storage():
+        if storage_class is SQLiteJournalStorage:
+            inner_storage = SQLiteJournalStorage(tmp_path / "test_mindful_moments.db", legacy_json_file_path=None)
+        else:
+            inner_storage = storage_class(test_json_path)
+        return WriteBehindJournalStorage(inner_storage, wal_path, flush_interval=3600)
+
+    first_storage = create_write_behind_storage()
+    journal_manager = JournalManager(test_json_path, UserAccount("pytestuser123", "dummyhash"), storage=first_storage,
+                                     index_dir=tmp_path / "user_indexes")
+    assert journal_manager.save_journal_entry(make_test_entry(0))
+    assert [entry.wins for entry in journal_manager.search("win 0")] == ["win 0"]
+
+    # 1. Second process starts up and moves the first process's entry from the WAL into storage
+    second_storage = create_write_behind_storage()
+    assert wal_path.read_text() == ""
+    assert second_storage.count_user_entries("pytestuser123") == 1
+    assert first_storage.count_user_entries("pytestuser123") == 1
+    assert [entry_dict["wins"] for entry_dict in first_storage.load_user_entries("pytestuser123")] == ["win 0"]
+
+    # 2. Second process flushes one of two more entries saved by the first process
+    assert journal_manager.save_journal_entry(make_test_entry(1))
+    assert second_storage.flush() == 1
+    assert journal_manager.save_journal_entry(make_test_entry(2))
+    assert first_storage.pending_entries == {"pytestuser123": [make_test_entry(2).to_dict()]}
+    assert [entry.wins for entry in journal_manager.iter_user_entries(newest_first=False)] == ["win 0", "win 1", "win 2"]
+    assert [entry_dict["wins"] for entry_dict in first_storage.load_user_entries_at("pytestuser123", [2, 0])] == ["win 2", "win 0"]
+
+    # 3. Search index still matches each entry once
+    assert journal_manager.count_user_entries() == 3
+    assert [entry.wins for entry in journal_manager.search("win")] == ["win 2", "win 1", "win 0"]
+    journal_manager.close()
+    second_storage.close()
+    reopened_storage = create_write_behind_storage()
+    assert reopened_storage.count_user_entries("pytestuser123") == 3
+    reopened_storage.close()
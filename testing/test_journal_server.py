@@ -0,0 +1,113 @@
+# test_journal_server.py
+
+# PYTEST UNIT TESTING
+# Testing the asyncio journal server (journal_server.py) and its client (journal_client.py) using Pytest
+
+import sys
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+import pytest
+
+# Add the project root to the Python path so we can import from core
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from core.user_auth_models import UserManager
+from core.journal_models import JournalManager, JournalEntry
+from core.journal_storage import ShardedJournalStorage
+from core.journal_server import JournalServer
+from core.journal_client import JournalClient, RemoteUserManager, RemoteJournalManager
+from core.exception_classes import JournalServerError, UserNotFoundError
+
+
+@pytest.fixture
+def running_server(tmp_path: Path):
+    """Starts a JournalServer on a Unix socket in tmp_path (in a background thread), stops it after the test."""
+    accounts_path = tmp_path / "test_user_accounts.json"
+    accounts_path.write_text("{}")
+    journal_path = tmp_path / "test_journal_entries.json"
+    journal_server = JournalServer(journal_file_path=journal_path, user_manager=UserManager(accounts_path, work_factor=4),
+                                   journal_storage=ShardedJournalStorage(journal_path))
+    socket_path = tmp_path / "test.sock"
+    server_thread = threading.Thread(target=asyncio.run, args=(journal_server.serve(socket_path),))
+    server_thread.start()
+    assert journal_server.serving.wait(timeout=10)
+    yield journal_server, server_thread, socket_path, accounts_path, journal_path
+    if server_thread.is_alive():
+        journal_server.stop()
+        server_thread.join(timeout=10)
+
+
+def test_journal_server_sessions(running_server):
+    """
+    This test checks app sessions using the journal server instead of loading the data files.
+    It verifies:
+    1. Accounts can be registered and logged in through the server (wrong password and unknown user rejected)
+    2. Journal commands are refused before login, and a session token from the server resumes a new session
+    3. Entries saved by several sessions at once are all stored (writes serialized by the server)
+    4. Sessions read entries back (paging, search, date range, mood summary)
+    5. Entries are in the data files when the server stops
+    """
+    journal_server, server_thread, socket_path, accounts_path, journal_path = running_server
+    client = JournalClient(socket_path)
+    user_manager = RemoteUserManager(client)
+
+    # 1. Register and login
+    assert user_manager.register_user("pytestuser123", "password123")
+    assert not user_manager.register_user("pytestuser123", "password123")      # Username taken
+    assert not user_manager.register_user("a b", "password123")                # Invalid username
+    with pytest.raises(UserNotFoundError):
+        user_manager.get_user_account("nosuchuser")
+    user_account = user_manager.get_user_account("pytestuser123")
+    assert user_manager.authenticate_user(user_account, "wrongpass") is None
+
+    # 2. Not logged in yet
+    with pytest.raises(JournalServerError):
+        client.request("count_entries")
+    assert user_manager.authenticate_user(user_account, "password123") is user_account
+    session_token = user_manager.create_session_token(user_account)
+    resumed_client = JournalClient(socket_path)
+    assert RemoteUserManager(resumed_client).resume_session("pytestuser123", session_token).username == "pytestuser123"
+    assert RemoteJournalManager(resumed_client, user_account).count_user_entries() == 0
+    assert RemoteUserManager(resumed_client).resume_session("pytestuser123", session_token + "x") is None
+    resumed_client.close()
+
+    # 3. Many sessions saving at once
+    def save_from_new_session(session_number):
+        session_client = JournalClient(socket_path)
+        RemoteUserManager(session_client).authenticate_user(user_account, "password123")
+        journal_manager = RemoteJournalManager(session_client, user_account)
+        saved = all(journal_manager.save_journal_entry(
+            JournalEntry("Good", f"win {session_number}-{number}", f"session{session_number}", "g", "x", timestamp=f"2025-06-{session_number + 1:02d}T09:{number:02d}:00"))
+            for number in range(5))
+        session_client.close()
+        return saved
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        assert all(executor.map(save_from_new_session, range(4)))
+
+    # 4. Read entries back
+    journal_manager = RemoteJournalManager(client, user_account)
+    assert journal_manager.count_user_entries() == 20
+    all_entries = journal_manager.iter_user_entries()
+    assert sorted(entry.wins for entry in all_entries) == sorted(f"win {session}-{number}" for session in range(4) for number in range(5))
+    newest_entries = journal_manager.iter_user_entries(offset=0, limit=3)
+    assert [entry.wins for entry in newest_entries] == [entry.wins for entry in all_entries[:3]]
+    assert sorted(entry.wins for entry in journal_manager.search("session2")) == [f"win 2-{number}" for number in range(5)]
+    june_2_entries = journal_manager.get_entries_between(datetime(2025, 6, 2), datetime(2025, 6, 2, 23, 59))
+    assert [entry.wins for entry in june_2_entries] == [f"win 1-{number}" for number in range(5)]
+    assert journal_manager.get_mood_summary()["mood_counts"] == {"Good": 20}
+    journal_manager.close()
+    with pytest.raises(JournalServerError):
+        client.request("count_entries")
+    client.close()
+
+    # 5. Stored in the data files after the server stops
+    journal_server.stop()
+    server_thread.join(timeout=10)
+    assert not socket_path.exists()
+    assert "pytestuser123" in UserManager(accounts_path).user_accounts
+    stored_entries = JournalManager(journal_path, user_account, storage=ShardedJournalStorage(journal_path)).get_user_entries()
+    assert len(stored_entries) == 20
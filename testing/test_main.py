@@ -1,3 +1,30 @@
 # test_main.py
 
 # Manual testing, integration testing, functional testing and end-to-end/acceptance testing
+
+# PYTEST UNIT TESTING
+# Testing main.py startup (lazy imports) using Pytest
+
+import subprocess
+import sys
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+
+
+def test_main_startup_lazy_imports():
+    """
+    This test checks importing main.py (app startup) doesn't import slow modules that are only needed later.
+    It verifies:
+    1. Journal modules, NumPy, bcrypt and rich_pyfiglet are not imported until used
+    2. No accounts are loaded (UserManager is created on first use)
+    """
+    check_imports = (
+        "import sys, main; "
+        "print(sorted(name for name in ('journal', 'core.journal_models', 'numpy', 'bcrypt', 'rich_pyfiglet') if name in sys.modules)); "
+        "print(main.user_manager)"
+    )
+    result = subprocess.run([sys.executable, "-c", check_imports], cwd=project_root, capture_output=True, text=True, check=True)
+
+    # 1 + 2. No slow modules imported and no UserManager created
+    assert result.stdout.splitlines() == ["[]", "None"]
@@ -0,0 +1,92 @@
+# test_metrics.py
+
+# PYTEST UNIT TESTING
+# Testing opt-in timers/counters (core/metrics.py) and saving them as JSON and Prometheus text
+
+import os
+import sys
+import json
+import subprocess
+from pathlib import Path
+
+# Add the project root to the Python path so we can import from core
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from core import metrics
+
+
+def test_metrics_timers_counters_and_files(tmp_path: Path, monkeypatch):
+    """
+    This test checks timers and counters are only recorded when metrics are enabled, and saved totals add up.
+    It verifies:
+    1. Disabled @timed returns the original function and count() records nothing
+    2. Enabled @timed/timer()/count() record calls, total and max time
+    3. write_metrics adds this run's metrics to the saved JSON totals and writes Prometheus text
+    """
+    metrics.reset_metrics()
+
+    # 1. Disabled (default unless MINDFUL_MOMENTS_METRICS=1)
+    monkeypatch.setattr(metrics, "METRICS_ENABLED", False)
+    def add_one(number):
+        return number + 1
+    assert metrics.timed("test.add_one")(add_one) is add_one
+    metrics.count("test.calls")
+    with metrics.timer("test.block"):
+        pass
+    assert metrics.get_metrics() == {"timers": {}, "counters": {}}
+
+    # 2. Enabled
+    monkeypatch.setattr(metrics, "METRICS_ENABLED", True)
+    timed_add_one = metrics.timed("test.add_one")(add_one)
+    assert timed_add_one is not add_one and timed_add_one.__name__ == "add_one"
+    assert [timed_add_one(number) for number in range(3)] == [1, 2, 3]
+    metrics.count("test.calls", 2)
+    with metrics.timer("test.block"):
+        pass
+    recorded = metrics.get_metrics()
+    assert recorded["timers"]["test.add_one"]["count"] == 3
+    assert recorded["timers"]["test.block"]["count"] == 1
+    assert 0 <= recorded["timers"]["test.add_one"]["max_seconds"] <= recorded["timers"]["test.add_one"]["total_seconds"]
+    assert recorded["counters"] == {"test.calls": 2}
+
+    # 3. Saved totals across runs + Prometheus text
+    metrics_file, prometheus_file = tmp_path / "metrics.json", tmp_path / "metrics.prom"
+    metrics.write_metrics(metrics_file, prometheus_file)
+    assert metrics.get_metrics() == {"timers": {}, "counters": {}}     # Reset once saved
+    metrics.count("test.calls")
+    totals = metrics.write_metrics(metrics_file, prometheus_file)
+    assert totals["counters"] == {"test.calls": 3}
+    assert json.loads(metrics_file.read_text()) == totals
+    prometheus_text = prometheus_file.read_text()
+    assert "# TYPE mindful_moments_test_add_one_seconds summary" in prometheus_text
+    assert "mindful_moments_test_add_one_seconds_count 3" in prometheus_text
+    assert "mindful_moments_test_calls_total 3" in prometheus_text
+
+
+def test_metrics_recorded_by_app_when_enabled(tmp_path: Path):
+    """
+    This test checks app hot paths are instrumented when the app runs with MINDFUL_MOMENTS_METRICS=1.
+    It verifies:
+    1. Registering/logging in (with a failed login) records auth timings and a failed login count
+    2. Metrics are saved to data_storage/metrics.json and metrics.prom when the process exits
+    """
+    (tmp_path / "data_storage").mkdir()
+    app_script = (
+        "from core.user_auth_models import UserManager\n"
+        "user_manager = UserManager('data_storage/user_accounts.json', work_factor=4)\n"
+        "user_manager.register_user('pytestuser123', 'password123')\n"
+        "user_account = user_manager.get_user_account('pytestuser123')\n"
+        "assert user_manager.authenticate_user(user_account, 'password123')\n"
+        "assert user_manager.authenticate_user(user_account, 'wrongpassword') is None\n"
+    )
+    (tmp_path / "data_storage" / "user_accounts.json").write_text("{}")
+    environment = {**os.environ, metrics.METRICS_ENV_VAR: "1", "PYTHONPATH": str(project_root)}
+    subprocess.run([sys.executable, "-c", app_script], cwd=tmp_path, env=environment, check=True)
+
+    saved_metrics = json.loads((tmp_path / "data_storage" / "metrics.json").read_text())
+    assert saved_metrics["timers"]["auth.register_user"]["count"] == 1
+    assert saved_metrics["timers"]["auth.authenticate_user"]["count"] == 2
+    assert saved_metrics["timers"]["auth.bcrypt_verify"]["count"] == 2
+    assert saved_metrics["counters"]["auth.failed_logins"] == 1
+    assert "mindful_moments_auth_failed_logins_total 1" in (tmp_path / "data_storage" / "metrics.prom").read_text()
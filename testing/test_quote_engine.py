@@ -0,0 +1,68 @@
+# test_quote_engine.py
+
+# PYTEST UNIT TESTING
+# Testing encouragement quote packs and per-user shuffle bags (quote_engine.py) using Pytest
+
+import sys
+from pathlib import Path
+
+# Add the project root to the Python path so we can import from core
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from core.quote_engine import QuoteLibrary, QuoteShuffleBag
+from core.quotes import encouragement_quotes
+
+
+def test_quote_packs_and_shuffle_bag(tmp_path: Path):
+    """
+    This test checks quote packs and the per-user quote shuffle bag.
+    It verifies:
+    1. A mood's pack files are only loaded when that mood is first chosen (comments and blank lines skipped)
+    2. Every quote for a mood is shown once before any quote repeats
+    3. The user's place in the bag is kept between sessions, and other users have their own bags
+    4. A large pack only keeps line positions in memory
+    5. The shipped quote packs add to the built-in quotes
+    """
+    pack_dir = tmp_path / "quote_packs"
+    (pack_dir / "4").mkdir(parents=True)
+    (pack_dir / "4" / "pack.txt").write_text("# Good day quotes\nPack quote one\n\nPack quote two\n", encoding="utf-8")
+    (pack_dir / "5").mkdir()
+    (pack_dir / "5" / "big_pack.txt").write_text("".join(f"Great quote {number}\n" for number in range(5000)), encoding="utf-8")
+    bag_dir = tmp_path / "quote_bags"
+    quote_library = QuoteLibrary(pack_dir, builtin_quotes={"4": ["Built-in quote"]})
+
+    # 1. Loaded on demand
+    quote_bag = QuoteShuffleBag(quote_library, "pytestuser123", bag_dir)
+    assert quote_library.loaded_moods == {}
+    first_quote = quote_bag.next_quote("4")
+    assert list(quote_library.loaded_moods) == ["4"]
+    assert len(quote_library.get_mood_quotes("4")) == 3
+
+    # 2. No repeats within a bag, and the next bag doesn't start with the last quote shown
+    shown_quotes = [first_quote, quote_bag.next_quote("4"), quote_bag.next_quote("4")]
+    assert sorted(shown_quotes) == ["Built-in quote", "Pack quote one", "Pack quote two"]
+    for _ in range(20):
+        next_quote = quote_bag.next_quote("4")
+        assert next_quote != shown_quotes[-1]
+        shown_quotes.append(next_quote)
+
+    # 3. Bag position saved per user
+    saved_bag = QuoteShuffleBag(quote_library, "pytestuser123", bag_dir)
+    bag_position = saved_bag.bags["4"]["position"]
+    bag_quotes = shown_quotes[-bag_position:] + [saved_bag.next_quote("4") for _ in range(3 - bag_position)]
+    assert sorted(bag_quotes) == ["Built-in quote", "Pack quote one", "Pack quote two"]
+    other_user_bag = QuoteShuffleBag(quote_library, "otheruser", bag_dir)
+    assert other_user_bag.bags == {}
+
+    # 4. Thousands of quotes, read one line at a time
+    great_quotes = {quote_bag.next_quote("5") for _ in range(1000)}
+    assert len(great_quotes) == 1000
+    assert all(quote.startswith("Great quote ") for quote in great_quotes)
+    assert quote_library.get_mood_quotes("5").get_quote(4999) == "Great quote 4999"
+    assert quote_bag.next_quote("1") is None        # No quotes for this mood
+
+    # 5. Shipped packs
+    shipped_library = QuoteLibrary(project_root / "quote_packs")
+    for mood_key in encouragement_quotes:
+        assert len(shipped_library.get_mood_quotes(mood_key)) > len(encouragement_quotes[mood_key])
@@ -0,0 +1,167 @@
+# test_schema_migrations.py
+
+# PYTEST UNIT TESTING
+# Testing versioned record schemas and stored record migrations (schema_migrations.py) using Pytest
+
+import sys
+import json
+from pathlib import Path
+import pytest
+
+# Add the project root to the Python path so we can import from core
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from core.user_auth_models import UserAccount, UserManager
+from core.journal_models import JournalManager
+from core.journal_storage import JsonJournalStorage, AppendLogJournalStorage, ShardedJournalStorage, WriteBehindJournalStorage
+from core.sqlite_storage import SQLiteJournalStorage
+from core.schema_migrations import RecordSchema, migrate_journal_entries, JOURNAL_ENTRY_SCHEMA_VERSION
+from core.exception_classes import SchemaMigrationError
+
+
+def make_old_entry_dict(number):
+    """Journal entry dict as saved before schema versions were added (version 0)."""
+    return {"timestamp": f"2025-06-{number + 1:02d}T09:00:00", "mood": "Good", "wins": f"win {number}",
+            "challenges": "c", "gratitude": "g", "goals": "x"}
+
+
+def test_record_schema_upgrades():
+    """
+    This test checks upgrading a record through several schema versions with RecordSchema.
+    It verifies:
+    1. Migrations run in order from the record's version, and the record gets the current version
+    2. Current (and newer) records are returned as they are, without copying
+    3. A missing migration raises SchemaMigrationError
+    """
+    test_schema = RecordSchema("test", 2)
+    @test_schema.migration(0)
+    def add_field(record):
+        record["added"] = True
+        return record
+
+    @test_schema.migration(1)
+    def rename_field(record):
+        record["renamed"] = record.pop("old_name")
+        return record
+
+    # 1. Upgraded one version at a time
+    old_record = {"old_name": "value"}
+    assert test_schema.upgrade(old_record) == {"added": True, "renamed": "value", "schema_version": 2}
+    assert old_record == {"old_name": "value"}      # Stored record itself not changed
+    assert test_schema.upgrade({"schema_version": 1, "old_name": "value"}) == {"renamed": "value", "schema_version": 2}
+
+    # 2. Current records unchanged
+    current_record = {"schema_version": 2, "renamed": "value"}
+    assert test_schema.upgrade(current_record) is current_record
+    newer_record = {"schema_version": 3}
+    assert test_schema.upgrade(newer_record) is newer_record
+
+    # 3. No migration
+    del test_schema.migrations[1]
+    with pytest.raises(SchemaMigrationError):
+        test_schema.upgrade({"old_name": "value"})
+
+
+def test_old_records_upgraded_on_read(tmp_path: Path):
+    """
+    This test checks records saved before schema versions were added are upgraded lazily when read.
+    It verifies:
+    1. An old user account can log in and gets session_version 0, without the accounts file being rewritten
+    2. upgrade_user_accounts() saves old accounts in the current version (only once)
+    3. Old journal entries are read, searched and summarised as usual, and new entries are saved with a schema version
+    """
+    # 1. Old user account
+    accounts_path = tmp_path / "test_user_accounts.json"
+    accounts_path.write_text("{}")
+    user_manager = UserManager(accounts_path, work_factor=4)
+    hashed_password = user_manager.hash_password("password123")
+    accounts_path.write_text(json.dumps({"pytestuser123": {"hashed_password": hashed_password}}))
+    user_manager = UserManager(accounts_path, work_factor=4)
+    user_account = user_manager.get_user_account("pytestuser123")
+    assert user_manager.authenticate_user(user_account, "password123") is user_account
+    assert user_account.session_version == 0
+    assert json.loads(accounts_path.read_text()) == {"pytestuser123": {"hashed_password": hashed_password}}
+
+    # 2. Background upgrade of accounts
+    assert user_manager.upgrade_user_accounts() == 1
+    assert json.loads(accounts_path.read_text())["pytestuser123"] == UserAccount("pytestuser123", hashed_password).to_dict()
+    assert json.loads(accounts_path.read_text())["pytestuser123"]["schema_version"] == 1
+    assert UserManager(accounts_path).upgrade_user_accounts() == 0
+
+    # 3. Old journal entries
+    journal_path = tmp_path / "test_journal_entries.json"
+    storage = ShardedJournalStorage(journal_path)
+    storage.append_entries("pytestuser123", [make_old_entry_dict(number) for number in range(3)])
+    journal_manager = JournalManager(journal_path, user_account, storage=storage)
+    assert [entry.wins for entry in journal_manager.iter_user_entries()] == ["win 2", "win 1", "win 0"]
+    assert [entry.wins for entry in journal_manager.search("win 1")] == ["win 1"]
+    assert journal_manager.get_mood_summary()["mood_counts"] == {"Good": 3}
+    assert journal_manager.get_entry_batch()[0].to_dict()["schema_version"] == JOURNAL_ENTRY_SCHEMA_VERSION
+    journal_manager.save_journal_entry(journal_manager.get_user_entries()[0])
+    stored_versions = [entry_dict.get("schema_version") for entry_dict in ShardedJournalStorage(journal_path).load_user_entries("pytestuser123")]
+    assert stored_versions == [None, None, None, JOURNAL_ENTRY_SCHEMA_VERSION]
+
+
+@pytest.mark.parametrize("storage_name", ["json", "log", "sharded", "sqlite", "write_behind"])
+def test_migrate_journal_entries_resumes(tmp_path: Path, storage_name):
+    """
+    This test checks the background migration pass over stored journal entries (python cli.py migrate).
+    It verifies:
+    1. Progress is reported and saved after each batch of users (one user, or every user in one write of the file
+       for json/log storage), so a stopped pass carries on from the next user
+    2. Every old entry is rewritten in the current version, current entries are left as they are
+    3. The progress file is removed when finished, and running again changes nothing
+    """
+    journal_path = tmp_path / "test_journal_entries.json"
+    progress_path = tmp_path / "test_schema_migration.json"
+    journal_path.write_text("{}")
+    def make_storage():
+        if storage_name == "json":
+            return JsonJournalStorage(journal_path)
+        if storage_name == "log":
+            return AppendLogJournalStorage(journal_path)
+        if storage_name == "sqlite":
+            return SQLiteJournalStorage(tmp_path / "test_mindful_moments.db", legacy_json_file_path=None)
+        storage = ShardedJournalStorage(journal_path)
+        return WriteBehindJournalStorage(storage, tmp_path / "test.wal.jsonl") if storage_name == "write_behind" else storage
+    storage = make_storage()
+    for user_number in range(3):
+        storage.append_entries(f"user{user_number}", [make_old_entry_dict(number) for number in range(4)])
+    storage.append_entries("user0", [{**make_old_entry_dict(5), "schema_version": JOURNAL_ENTRY_SCHEMA_VERSION}])
+
+    # 1. Stopped after the first batch
+    batch_size = 3 if storage_name in ("json", "log") else 1
+    reported_progress = []
+    def stop_after_first_batch(users_done, total_users):
+        reported_progress.append((users_done, total_users))
+        if users_done:
+            raise KeyboardInterrupt
+    if batch_size > 1:
+        save_json_file = storage.save_json_file
+        saved_files = []
+        storage.save_json_file = lambda journal_data: saved_files.append(journal_data) or save_json_file(journal_data)
+    with pytest.raises(KeyboardInterrupt):
+        migrate_journal_entries(storage, progress_path, stop_after_first_batch)
+    assert reported_progress == [(0, 3), (batch_size, 3)]
+    assert json.loads(progress_path.read_text())["last_username"] == f"user{batch_size - 1}"
+    if batch_size > 1:
+        assert len(saved_files) == 1        # Whole file rewritten once for every user
+    storage.close()
+
+    # 2. Carries on from the next user in a new run
+    storage = make_storage()
+    reported_progress.clear()
+    assert migrate_journal_entries(storage, progress_path, lambda *progress: reported_progress.append(progress)) == 12
+    assert reported_progress == [(users_done, 3) for users_done in range(batch_size, 4, batch_size)]
+    reloaded_storage = make_storage()
+    stored_entries = [entry_dict for user_number in range(3) for entry_dict in reloaded_storage.load_user_entries(f"user{user_number}")]
+    reloaded_storage.close()
+    assert len(stored_entries) == 13
+    assert all(entry_dict["schema_version"] == JOURNAL_ENTRY_SCHEMA_VERSION for entry_dict in stored_entries)
+    assert [entry_dict["wins"] for entry_dict in stored_entries[:5]] == ["win 0", "win 1", "win 2", "win 3", "win 5"]
+
+    # 3. Finished
+    assert not progress_path.exists()
+    assert migrate_journal_entries(storage, progress_path) == 0
+    storage.close()
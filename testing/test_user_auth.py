@@ -13,7 +13,10 @@ import pytest
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from core.user_auth_models import UserManager, UserAccount, UserNotFoundError
+from core.user_auth_models import UserManager, UserAccount, UserNotFoundError, get_bcrypt_cost, get_kdf_timings
+from core.login_limiter import LOGIN_ATTEMPT_BURST, LOCKOUT_BASE_SECONDS
+from core.session_tokens import SESSION_TOKEN_DAYS, save_session_token, load_session_token, delete_session_token
+from core.exception_classes import LoginRateLimitedError
 from core.file_paths import USER_ACCOUNTS_JSON_FILE
 
 def test_register_and_authenticate_user(tmp_path: Path):
@@ -129,3 +132,323 @@ def test_register_duplicate_user(tmp_path: Path):
 
     # 2. Second registration with same username should fail
     assert not user_manager.register_user(dummy_username, "differentpass")
+
+
+def test_register_user_sqlite_engine(tmp_path: Path):
+    """
+    This test checks registering and retrieving users with the SQLite storage engine.
+    It verifies:
+    1. Existing accounts in the JSON file are copied into the database on first use
+    2. A new user can be registered and retrieved from the database (no JSON file rewrite)
+    3. Accounts persist for a new UserManager using the same database
+    """
+
+    # Setup temporary JSON file with an existing dummy account and a temporary database path
+    test_json_path = tmp_path / "test_user_accounts.json"
+    test_json_path.write_text('{"existinguser": {"hashed_password": "dummyhash"}}')
+    test_database_path = tmp_path / "test_mindful_moments.db"
+
+    user_manager = UserManager(test_json_path, storage_engine="sqlite", database_path=test_database_path)
+
+    # 1. Existing JSON account copied across
+    assert user_manager.is_existing_user("existinguser")
+
+    # 2. Register new user, JSON file is left unchanged
+    assert user_manager.register_user("sqliteuser123", "sqlitepassword123")
+    assert user_manager.get_user_account("sqliteuser123").verify_password("sqlitepassword123")
+    assert "sqliteuser123" not in test_json_path.read_text()
+
+    # 3. New UserManager reads account from database
+    reloaded_manager = UserManager(test_json_path, storage_engine="sqlite", database_path=test_database_path)
+    assert reloaded_manager.is_existing_user("sqliteuser123")
+
+
+def test_concurrent_managers_no_lost_accounts(tmp_path: Path):
+    """
+    This test checks that two UserManagers (e.g. two app processes) sharing the same JSON file don't overwrite each other.
+    It verifies:
+    1. Each manager registers a different user after both loaded the same (empty) file
+    2. Second save merges in the first manager's account instead of losing it
+    3. No temporary files are left behind after atomic saves
+    """
+
+    test_json_path = tmp_path / "test_user_accounts.json"
+    test_json_path.write_text("{}")
+
+    # 1. Both managers load the empty file before either registers a user
+    first_manager = UserManager(test_json_path)
+    second_manager = UserManager(test_json_path)
+    first_manager.add_user_account(UserAccount("firstuser123", "dummyhash1"))
+    second_manager.add_user_account(UserAccount("seconduser123", "dummyhash2"))
+
+    # 2. Both accounts stored on disk and in second manager's memory
+    assert UserManager(test_json_path).is_existing_user("firstuser123")
+    assert UserManager(test_json_path).is_existing_user("seconduser123")
+    assert second_manager.is_existing_user("firstuser123")
+
+    # 3. Only the data file and its lock file remain
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["test_user_accounts.json", "test_user_accounts.json.lock"]
+
+
+def test_rehash_on_login_with_new_work_factor(tmp_path: Path):
+    """
+    This test checks configurable bcrypt work factor and rehash on successful login.
+    It verifies:
+    1. Registered password hash uses the configured (low, for test speed) work factor
+    2. Logging in with a manager configured with a different work factor rehashes and saves the password
+    3. Wrong password does not trigger a rehash
+    4. Hash and verify timings are recorded
+    """
+
+    test_json_path = tmp_path / "test_user_accounts.json"
+    test_json_path.write_text("{}")
+
+    # 1. Register with work factor 4
+    user_manager = UserManager(test_json_path, work_factor=4)
+    assert user_manager.register_user("rehashuser123", "rehashpassword123")
+    assert get_bcrypt_cost(user_manager.get_user_account("rehashuser123").hashed_password) == 4
+
+    # 2. Login with manager configured for work factor 5 - stored hash upgraded
+    upgraded_manager = UserManager(test_json_path, work_factor=5)
+    user_account = upgraded_manager.get_user_account("rehashuser123")
+    assert upgraded_manager.authenticate_user(user_account, "rehashpassword123") is not None
+    stored_account = UserManager(test_json_path).get_user_account("rehashuser123")
+    assert get_bcrypt_cost(stored_account.hashed_password) == 5
+    assert stored_account.verify_password("rehashpassword123")
+
+    # 3. Wrong password - no rehash
+    downgraded_manager = UserManager(test_json_path, work_factor=4)
+    assert downgraded_manager.authenticate_user(downgraded_manager.get_user_account("rehashuser123"), "wrongpass") is None
+    assert get_bcrypt_cost(UserManager(test_json_path).get_user_account("rehashuser123").hashed_password) == 5
+
+    # 4. Timings recorded
+    kdf_timings = get_kdf_timings()
+    assert kdf_timings["hash"]["count"] > 0
+    assert kdf_timings["verify"]["last_seconds"] is not None
+
+
+def test_bulk_register_users(tmp_path: Path):
+    """
+    This test checks registering many accounts at once with bulk_register_users().
+    It verifies:
+    1. Valid accounts are imported and can log in
+    2. Invalid, duplicate and existing usernames are skipped with a reason
+    3. All new accounts are stored in the JSON file
+    """
+
+    test_json_path = tmp_path / "test_user_accounts.json"
+    test_json_path.write_text("{}")
+    user_manager = UserManager(test_json_path, work_factor=4)
+    assert user_manager.register_user("existinguser", "existingpass1")
+
+    credentials = [(f"bulkuser{number:03d}", f"bulkpass{number:03d}") for number in range(20)]
+    credentials += [("bulkuser000", "duplicate123"), ("existinguser", "existingpass1"), ("bad", "shortpw"), ("spaced user", "password123")]
+
+    # 1. 20 valid accounts imported
+    report = user_manager.bulk_register_users(credentials)
+    assert report["imported"] == 20
+    assert user_manager.get_user_account("bulkuser007").verify_password("bulkpass007")
+
+    # 2. Duplicate, existing and invalid entries skipped
+    assert [username for username, reason in report["skipped"]] == ["bulkuser000", "existinguser", "bad", "spaced user"]
+
+    # 3. Stored in file
+    assert len(UserManager(test_json_path).user_accounts) == 21
+
+
+def test_register_without_reload_and_detect_changes(tmp_path: Path, monkeypatch):
+    """
+    This test checks that registering a user doesn't reload the accounts file, and other processes' changes are picked up.
+    It verifies:
+    1. Registering a user saves once and doesn't re-read the JSON file
+    2. An account added by another manager (another process) is found after the file changes
+    """
+
+    test_json_path = tmp_path / "test_user_accounts.json"
+    test_json_path.write_text("{}")
+    user_manager = UserManager(test_json_path, work_factor=4)
+
+    # Count JSON file loads made by user_manager
+    load_calls = []
+    original_load_json_file = user_manager.load_json_file
+    monkeypatch.setattr(user_manager, "load_json_file", lambda: load_calls.append(1) or original_load_json_file())
+
+    # 1. No file loads during registration or lookups afterwards
+    assert user_manager.register_user("noreloaduser", "noreloadpass1")
+    assert user_manager.is_existing_user("noreloaduser")
+    assert load_calls == []
+
+    # 2. Another manager adds a user - file change is detected and reloaded once
+    UserManager(test_json_path).add_user_account(UserAccount("otherprocess1", "dummyhash"))
+    assert user_manager.is_existing_user("otherprocess1")
+    assert user_manager.is_existing_user("noreloaduser")
+    assert load_calls == [1]
+
+
+def test_login_rate_limiting_and_lockout(tmp_path: Path, monkeypatch):
+    """
+    This test checks failed login limits (token bucket per username and per source, with lockouts).
+    It verifies:
+    1. Successful logins don't use up attempts
+    2. After LOGIN_ATTEMPT_BURST failed logins, attempts are turned away without checking the password
+    3. Lockouts double with each further failure, and limits are kept by a new UserManager (survive restarts)
+    4. Other accounts can still log in, and the username unlocks once the lockout has passed
+    5. A remote source failing for many usernames is locked out itself
+    """
+
+    test_json_path = tmp_path / "test_user_accounts.json"
+    test_json_path.write_text("{}")
+    user_manager = UserManager(test_json_path, work_factor=4)
+    assert user_manager.register_user("limituser123", "limitpass123")
+    assert user_manager.register_user("otheruser123", "otherpass123")
+    user_account = user_manager.get_user_account("limituser123")
+    fake_time = [1_000_000.0]
+    user_manager.login_limiter.clock = lambda: fake_time[0]
+
+    # 1. Many successful logins are fine
+    for _ in range(LOGIN_ATTEMPT_BURST + 2):
+        assert user_manager.authenticate_user(user_account, "limitpass123") is not None
+
+    # 2. Failed logins use up the bucket, then no password check is made
+    for _ in range(LOGIN_ATTEMPT_BURST):
+        assert user_manager.authenticate_user(user_account, "wrongpass") is None
+    verify_calls = []
+    monkeypatch.setattr(UserAccount, "verify_password", lambda self, password: verify_calls.append(password))
+    with pytest.raises(LoginRateLimitedError) as rate_limited:
+        user_manager.authenticate_user(user_account, "limitpass123")
+    assert verify_calls == []
+    assert rate_limited.value.retry_after_seconds == LOCKOUT_BASE_SECONDS
+    monkeypatch.undo()
+
+    # 3. Lockout survives a restart (new manager reading the attempts file), and doubles after the next failure
+    restarted_manager = UserManager(test_json_path, work_factor=4)
+    restarted_manager.login_limiter.clock = lambda: fake_time[0]
+    with pytest.raises(LoginRateLimitedError):
+        restarted_manager.authenticate_user(user_account, "limitpass123")
+    fake_time[0] += LOCKOUT_BASE_SECONDS
+    assert restarted_manager.authenticate_user(user_account, "wrongpass") is None
+    with pytest.raises(LoginRateLimitedError) as rate_limited:
+        restarted_manager.authenticate_user(user_account, "limitpass123")
+    assert rate_limited.value.retry_after_seconds == LOCKOUT_BASE_SECONDS * 2
+
+    # 4. Another account can still log in (locally or from another source), and the locked username unlocks later
+    other_account = restarted_manager.get_user_account("otheruser123")
+    assert restarted_manager.authenticate_user(other_account, "otherpass123", source="tcp:127.0.0.2") is not None
+    assert restarted_manager.authenticate_user(other_account, "otherpass123") is not None
+    fake_time[0] += LOCKOUT_BASE_SECONDS * 2
+    assert restarted_manager.authenticate_user(user_account, "limitpass123") is not None
+
+    # 5. A remote source guessing passwords for many accounts is limited on its own
+    for attempt_number in range(LOGIN_ATTEMPT_BURST):
+        attempted_account = UserAccount(f"guessuser{attempt_number}", user_account.hashed_password)
+        assert restarted_manager.authenticate_user(attempted_account, "wrongpass", source="tcp:10.0.0.9") is None
+    with pytest.raises(LoginRateLimitedError):
+        restarted_manager.authenticate_user(other_account, "otherpass123", source="tcp:10.0.0.9")
+    assert restarted_manager.authenticate_user(other_account, "otherpass123") is not None
+
+
+def test_local_failed_logins_dont_lock_out_other_users(tmp_path: Path):
+    """
+    This test checks failed logins typed on this computer only lock out the username they were for.
+    It verifies user A failing LOGIN_ATTEMPT_BURST times (and locked out) doesn't stop user B logging in on the same computer.
+    """
+    test_json_path = tmp_path / "test_user_accounts.json"
+    test_json_path.write_text("{}")
+    user_manager = UserManager(test_json_path, work_factor=4)
+    assert user_manager.register_user("kioskusera", "passworda1")
+    assert user_manager.register_user("kioskuserb", "passwordb1")
+    user_a = user_manager.get_user_account("kioskusera")
+    for _ in range(LOGIN_ATTEMPT_BURST):
+        assert user_manager.authenticate_user(user_a, "wrongpass") is None
+    with pytest.raises(LoginRateLimitedError):
+        user_manager.authenticate_user(user_a, "passworda1")
+    assert user_manager.authenticate_user(user_manager.get_user_account("kioskuserb"), "passwordb1") is not None
+
+
+def test_session_tokens_resume_and_revoke(tmp_path: Path, monkeypatch):
+    """
+    This test checks "stay logged in" session tokens.
+    It verifies:
+    1. A saved token resumes the session without a bcrypt password check
+    2. Tampered tokens and tokens for another username are rejected
+    3. Tokens expire
+    4. revoke_sessions() revokes every token issued for the account (other accounts unaffected)
+    5. Tokens are saved per user on the device (files named by username hash, so any username stays inside the folder) and can be deleted
+    """
+
+    test_json_path = tmp_path / "test_user_accounts.json"
+    test_json_path.write_text("{}")
+    user_manager = UserManager(test_json_path, work_factor=4)
+    assert user_manager.register_user("tokenuser123", "tokenpass123")
+    assert user_manager.register_user("otheruser123", "otherpass123")
+    fake_time = [1_000_000.0]
+    user_manager.session_signer.clock = lambda: fake_time[0]
+    session_token = user_manager.create_session_token(user_manager.get_user_account("tokenuser123"))
+    other_token = user_manager.create_session_token(user_manager.get_user_account("otheruser123"))
+
+    # 1. Resume without bcrypt
+    monkeypatch.setattr(UserAccount, "verify_password", lambda self, password: pytest.fail("bcrypt should not be used"))
+    assert user_manager.resume_session("tokenuser123", session_token).username == "tokenuser123"
+
+    # 2. Tampered / wrong user
+    tampered_token = session_token[:-2] + ("AA" if not session_token.endswith("AA") else "BB")
+    assert user_manager.resume_session("tokenuser123", tampered_token) is None
+    assert user_manager.resume_session("otheruser123", session_token) is None
+    assert user_manager.resume_session("tokenuser123", "not a token") is None
+
+    # 3. Expired
+    fake_time[0] += SESSION_TOKEN_DAYS * 24 * 60 * 60 + 1
+    assert user_manager.resume_session("tokenuser123", session_token) is None
+    fake_time[0] = 1_000_000.0
+
+    # 4. Revoked (checked by a new manager, as another app launch would)
+    assert user_manager.revoke_sessions(user_manager.get_user_account("tokenuser123"))
+    relaunched_manager = UserManager(test_json_path, work_factor=4)
+    relaunched_manager.session_signer.clock = lambda: fake_time[0]
+    assert relaunched_manager.resume_session("tokenuser123", session_token) is None
+    assert relaunched_manager.resume_session("otheruser123", other_token) is not None
+    new_token = relaunched_manager.create_session_token(relaunched_manager.get_user_account("tokenuser123"))
+    assert relaunched_manager.resume_session("tokenuser123", new_token) is not None
+
+    # 5. Saved per user on this device
+    token_dir = tmp_path / "sessions"
+    save_session_token("tokenuser123", new_token, token_dir)
+    assert load_session_token("tokenuser123", token_dir) == new_token
+    assert load_session_token("otheruser123", token_dir) is None
+    delete_session_token("tokenuser123", token_dir)
+    assert load_session_token("tokenuser123", token_dir) is None
+    save_session_token("../escaped", new_token, token_dir)
+    assert load_session_token("../escaped", token_dir) == new_token
+    assert [token_file.parent for token_file in tmp_path.rglob("*.token")] == [token_dir]
+
+
+@pytest.mark.parametrize("storage_engine", ["json", "sqlite"])
+def test_stale_account_save_keeps_revoke(tmp_path: Path, storage_engine):
+    """
+    This test checks an account saved by another app process that loaded it before a revoke_sessions() (e.g. rehashing
+    the password after logging in) doesn't bring back the old session_version.
+    It verifies:
+    1. Rehash is saved, but session_version stays at the revoked version
+    2. Tokens issued before the revoke stay revoked, new tokens from the older process are valid
+    """
+    test_json_path = tmp_path / "test_user_accounts.json"
+    test_json_path.write_text("{}")
+    def make_user_manager(work_factor=4):
+        return UserManager(test_json_path, storage_engine, tmp_path / "test_mindful_moments.db", work_factor=work_factor)
+    user_manager = make_user_manager()
+    assert user_manager.register_user("tokenuser123", "tokenpass123")
+    old_token = user_manager.create_session_token(user_manager.get_user_account("tokenuser123"))
+    stale_manager = make_user_manager(work_factor=5)
+    stale_account = stale_manager.get_user_account("tokenuser123")
+
+    # 1. Revoked by one process, then the older copy is rehashed and saved by the other
+    assert user_manager.revoke_sessions(user_manager.get_user_account("tokenuser123"))
+    assert stale_manager.authenticate_user(stale_account, "tokenpass123") is stale_account
+    relaunched_manager = make_user_manager()
+    saved_account = relaunched_manager.get_user_account("tokenuser123")
+    assert get_bcrypt_cost(saved_account.hashed_password) == 5
+    assert saved_account.session_version == stale_account.session_version == 1
+
+    # 2. Still revoked
+    assert relaunched_manager.resume_session("tokenuser123", old_token) is None
+    assert relaunched_manager.resume_session("tokenuser123", stale_manager.create_session_token(stale_account)) is not None
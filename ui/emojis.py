@@ -8,9 +8,13 @@ EMOJI_CREATE_USER = "➕👤"
 EMOJI_EXIT = "❌"
 EMOJI_CREATE_ENTRY = "📝"
 EMOJI_VIEW_ENTRIES = "📅"
+EMOJI_SEARCH = "🔍"
+EMOJI_DATE_RANGE = "🗓️"
 EMOJI_MOOD_SUMMARY = "📊"
 EMOJI_LOGOUT = "🔒"
 EMOJI_MENU = "📋"
+EMOJI_NEXT_PAGE = "➡️"
+EMOJI_PREVIOUS_PAGE = "⬅️"
 
 # STATUS/ERROR EMOJIS
 EMOJI_SUCCESSFUL = "✅"
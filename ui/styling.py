@@ -1,32 +1,45 @@
 # styling.py
 
-from rich_pyfiglet import RichFiglet
+from functools import lru_cache
+
 from rich.console import Console
 
 console = Console()
 
-# CUSTOM WELCOME TO APP BANNER
-custom_welcome_banner = RichFiglet(
-    "Welcome to Mindful Moments App", # Rendered text welcome message
-    font="ansi_shadow",
-    colors=["light_sky_blue1", "medium_purple", "light_steel_blue", "plum2"],
-    animation="smooth_strobe",
-    fps=5,
-)
+# BANNER DISPLAY MODE (set from main.py command line options)
+# "animated" = animated figlet banner, "static" = figlet banner without animation, "off" = no banner
+BANNER_MODES = ("animated", "static", "off")
+banner_mode = "animated"
+
+def set_banner_mode(mode):
+    """Sets how banners are displayed, one of BANNER_MODES."""
+    global banner_mode
+    if mode not in BANNER_MODES:
+        raise ValueError(f"Banner mode must be one of {BANNER_MODES}")
+    banner_mode = mode
+
+# CUSTOM BANNERS - Built on first display only, as importing rich_pyfiglet and rendering fonts is slow at startup
+@lru_cache(maxsize=None)
+def get_banner(banner_text, animated=True):
+    """Returns RichFiglet banner for banner_text (cached, so each banner is only built once)."""
+    from rich_pyfiglet import RichFiglet
+    return RichFiglet(
+        banner_text, # Rendered text welcome message
+        font="ansi_shadow",
+        colors=["light_sky_blue1", "medium_purple", "light_steel_blue", "plum2"],
+        animation="smooth_strobe" if animated else None,
+        fps=5 if animated else None,
+    )
+
+def display_banner(banner_text):
+    """Displays banner_text as a figlet banner using the current banner_mode."""
+    if banner_mode != "off":
+        console.print(get_banner(banner_text, animated=banner_mode == "animated"))
 
 # FUNCTION TO DISPLAY CUSTOM WELCOME BANNER
 def display_welcome_banner():
-    console.print(custom_welcome_banner)
-
-# CUSTOM WELCOME TO JOURNAL BANNER
-custom_journal_banner = RichFiglet(
-    "Welcome to your Journal", # Rendered text welcome message
-    font="ansi_shadow",
-    colors=["light_sky_blue1", "medium_purple", "light_steel_blue", "plum2"],
-    animation="smooth_strobe",
-    fps=5,
-)
+    display_banner("Welcome to Mindful Moments App")
 
 # FUNCTION TO DISPLAY CUSTOM JOURNAL BANNER
 def display_journal_banner():
-    console.print(custom_journal_banner)
\ No newline at end of file
+    display_banner("Welcome to your Journal")